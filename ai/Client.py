@@ -1,172 +1,294 @@
-import cv2
 import requests
+from requests.adapters import HTTPAdapter
+import threading
 import time
 import subprocess
+import shlex
 import numpy as np
 from datetime import datetime
 import os
 
-# URLs de las APIs
-URL_DETECCION = "https://greeting-ryan-requesting-june.trycloudflare.com/predict"
-URL_VERIFICACION = "http://192.168.100.11:8003/verificar-patente"
-URL_REGISTRO_RESIDENTE = "http://192.168.100.11:8003/registrar-ingreso-residente"
-URL_REGISTRO_VISITANTE = "http://192.168.100.11:8003/registrar-ingreso-visitante"
-url = "Video prueba.mp4"
+from autorizados import ListaAutorizados
+from cola_eventos import ColaEventos
+from preprocesado import Preprocesador
 
+# URLs de las APIs (se pueden sobreescribir por variables de entorno, por
+# ejemplo para apuntar al servidor simulado de fake_server.py)
+URL_DETECCION = os.getenv("URL_DETECCION", "https://greeting-ryan-requesting-june.trycloudflare.com/predict")
+URL_API = os.getenv("URL_API", "http://192.168.100.11:8003")
+URL_VERIFICACION = f"{URL_API}/verificar-patente"
+URL_REGISTRO_LOTE = f"{URL_API}/registrar-eventos"
+URL_AUTORIZADOS = f"{URL_API}/autorizados"
+url = os.getenv("VIDEO_URL", "Video prueba.mp4")
 
-# Configuración de la camara
-cap = cv2.VideoCapture(url)
+# Procesar cada N frames (para no saturar)
+CADA_N_FRAMES = int(os.getenv("CADA_N_FRAMES", "10"))
 
-if not cap.isOpened():
-    print("Error: No se puede acceder a la cámara")
-    exit()
+# Comando que abre el portón (vacío = no abrir, útil en pruebas)
+COMANDO_PORTON = os.getenv("COMANDO_PORTON", "python3 /home/aceve/remoto.py")
+
+# Cola local de eventos de acceso pendientes de enviar al backend
+COLA_EVENTOS_PATH = os.getenv("COLA_EVENTOS", "cola_eventos.db")
+
+# Archivo de configuración de cámaras (si no existe se usa solo `url`)
+CAMARAS_CONFIG = os.getenv("CAMARAS_CONFIG", "camaras.json")
+
+mapeo_cars = {'car': 1, 'auto': 1}
+# Tipo con que se verifica un vehículo de clase no mapeada (camión, bus, ...)
+TIPO_VEHICULO_POR_DEFECTO = 1
+
+# Preprocesamiento por defecto: frame completo en JPEG (calidad por defecto de OpenCV)
+PREPROCESADOR = Preprocesador()
+
+# Sesión HTTP compartida por todas las cámaras (reutiliza conexiones)
+SESION = requests.Session()
+
+
+def configurar_pool(conexiones: int):
+    """Ajusta el tamaño del pool de conexiones de la sesión compartida."""
+    adapter = HTTPAdapter(pool_connections=conexiones, pool_maxsize=conexiones)
+    SESION.mount("http://", adapter)
+    SESION.mount("https://", adapter)
+
+
+_cola: ColaEventos | None = None
+_autorizados: ListaAutorizados | None = None
+_lock_servicios = threading.Lock()
+
+
+def cola_eventos() -> ColaEventos:
+    """Cola de eventos compartida (se crea e inicia en el primer uso)."""
+    global _cola
+    with _lock_servicios:
+        if _cola is None:
+            _cola = ColaEventos(COLA_EVENTOS_PATH, URL_REGISTRO_LOTE, SESION)
+            _cola.iniciar()
+        return _cola
+
+
+def lista_autorizados() -> ListaAutorizados:
+    """Lista local de autorizados (se crea y empieza a sincronizar en el primer uso)."""
+    global _autorizados
+    with _lock_servicios:
+        if _autorizados is None:
+            _autorizados = ListaAutorizados(URL_AUTORIZADOS, SESION)
+            _autorizados.iniciar()
+        return _autorizados
 
-print("Iniciando procesamiento de camara. Presiona 'Ctrl+C' para detener.")
 
 # Función para verificar patente
 def verificar_patente(patente: str, tipo_vehiculo: int) -> dict:
     try:
-        response = requests.get(
+        response = SESION.get(
             f"{URL_VERIFICACION}/{patente}/{tipo_vehiculo}",
             timeout=5
         )
         return response.json() if response.status_code == 200 else {
-            "existe": False, 
+            "existe": False,
             "valido": False,
             "mensaje": "Error en verificación"
         }
     except Exception as e:
         return {
             "existe": False,
-            "valido": False, 
+            "valido": False,
             "mensaje": f"Error de conexión: {str(e)}"
         }
 
-# Función para registrar ingreso
-def registrar_ingreso(patente: str, tipo_vehiculo: str) -> dict:
-    try:
-        if tipo_vehiculo == "residente":
-            url = f"{URL_REGISTRO_RESIDENTE}/{patente}"
-        elif tipo_vehiculo == "visitante":
-            url = f"{URL_REGISTRO_VISITANTE}/{patente}"
-        else:
-            return {"success": False, "mensaje": "Tipo de vehículo inválido"}
-        
-        response = requests.post(url, timeout=5)
-        return response.json() if response.status_code == 200 else {
-            "success": False,
-            "mensaje": "Error en registro"
-        }
-    except Exception as e:
-        return {
-            "success": False,
-            "mensaje": f"Error de conexión: {str(e)}"
-        }
+class ErrorDeteccion(Exception):
+    """El servidor de detección respondió con un error."""
 
-frame_count = 0
-processed_frames = 0
-detection_count = 0
-plates = []
-tiempo = False
-mapeo_cars = {'car': 1, 'auto': 1}
 
-try:
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("Servidor desconectado...")
-            break
-
-        #cv2.imshow("Stream RTSP", frame)
-        frame_count += 1
-
-        # Procesar cada 10 frames (para no saturar)
-        if frame_count % (10) == 0:
-            processed_frames += 1
-            
-            # Codificar imagen
-            _, img_encoded = cv2.imencode(".jpg", frame)    
-            files = {"file": ("frame.jpg", img_encoded.tobytes(), "image/jpeg")}
-            ts = datetime.now().strftime("%H:%M:%S")
+class DetectorRemoto:
+    """Detección vía `POST /predict` al servidor con GPU."""
+
+    def __init__(self, url: str | None = None, timeout: float = 15):
+        self.url = url
+        self.timeout = timeout
 
+    def detectar(self, frame: np.ndarray, preprocesador: Preprocesador, timeout: float | None = None) -> dict:
+        imagen = preprocesador.codificar(frame)
+        response = SESION.post(
+            self.url or URL_DETECCION,
+            files={"file": imagen.como_archivo()},
+            timeout=timeout or self.timeout,
+        )
+        if response.status_code != 200:
+            raise ErrorDeteccion(f"Error del servidor de detección: {response.status_code}")
+        return response.json()
+
+
+class DetectorConRespaldo:
+    """
+    Usa el detector remoto mientras responda dentro de `umbral_s`; si tarda
+    más o falla, resuelve el frame con el detector local y deja de intentar
+    el remoto durante `enfriamiento_s` segundos.
+    """
+
+    def __init__(self, remoto: DetectorRemoto, local, umbral_s: float = 0.8, enfriamiento_s: float = 30):
+        self.remoto = remoto
+        self.local = local
+        self.umbral_s = umbral_s
+        self.enfriamiento_s = enfriamiento_s
+        self.remoto_bloqueado_hasta = 0.0
+
+    def detectar(self, frame: np.ndarray, preprocesador: Preprocesador) -> dict:
+        if time.monotonic() >= self.remoto_bloqueado_hasta:
             try:
-                # 1. ENVIAR PARA DETECCIÓN
-                response = requests.post(URL_DETECCION, files=files, timeout=15)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    # Mostrar información de detecciones en consola
-                    if "detections" in data and data["detections"]:
-                        for detection in data["detections"]:
-                            detection_count += 1
-                            
-                            patente_text = detection.get('plate_text', '')
-                            tipo_vehiculo_detectado = detection.get('vehicle_type', 1)
-                            confianza_vehiculo = detection.get('vehicle_confidence', 0)
-                            confianza_patente = detection.get('plate_confidence', 0)
-
-                            
-                            print(f"[{ts}] ✅ DETECTADO (Frame {frame_count}):")
-                            print(f"   🚗 Vehículo: {tipo_vehiculo_detectado}")
-                            print(f"   📊 Conf. Vehículo: {confianza_vehiculo:.3f}")
-                            print(f"   🔢 Patente: {patente_text}")
-                            print(f"   📈 Conf. Patente: {confianza_patente:.3f}")
-                            
-                            # 2. VERIFICAR PATENTE
-                            if patente_text and patente_text != 'No detectada':
-                                print(f"   🔍 Verificando patente...")
-
-                                tipo_vehiculo_detectado = mapeo_cars[tipo_vehiculo_detectado]
-                                resultado_verificacion = verificar_patente(patente_text, tipo_vehiculo_detectado)
-                                
-                                if resultado_verificacion["existe"] and resultado_verificacion["valido"]:
-
-                                    # 3. REGISTRAR INGRESO   Aqui deberia abrirse el porton
-
-
-
-                                    
-
-                                    resultado_registro = registrar_ingreso(patente_text, resultado_verificacion["tipo"])
-                                    
-                                    if resultado_registro["success"]:
-                                        print(f"   ✅ {resultado_registro['mensaje']}")
-                                        tiempo = True
-                                        ## Codigo para abrir el porton
-                                        subprocess.run(["python3", "/home/aceve/remoto.py"])
-                                        #time.sleep(5)
-                                    else:
-                                        print(f"   ⚠️  Error en registro: {resultado_registro['mensaje']}")
-                                else:
-                                    print(f"   ❌ {resultado_verificacion['mensaje']}")
-                            
-                            if patente_text not in plates:
-                                plates.append(patente_text)
-                            
-                            print("-" * 50)
-                    
-                
+                return self.remoto.detectar(frame, preprocesador, timeout=self.umbral_s)
+            except (requests.exceptions.RequestException, ErrorDeteccion) as e:
+                print(f"   ↪️  Detector remoto lento o caído ({e.__class__.__name__}); usando detector local")
+                self.remoto_bloqueado_hasta = time.monotonic() + self.enfriamiento_s
+        return self.local.detectar(frame, preprocesador)
+
+
+# Detector por defecto (modo de una cámara y replay)
+DETECTOR = DetectorRemoto()
+
+
+# Función para abrir el portón
+def abrir_porton():
+    if COMANDO_PORTON:
+        subprocess.run(shlex.split(COMANDO_PORTON))
+
+
+def nuevo_resumen() -> dict:
+    """Contadores acumulados durante el procesamiento."""
+    return {"detecciones": 0, "patentes": [], "recientes": {}}
+
+
+def es_repetido(resumen: dict, patente: str, ventana_s: float) -> bool:
+    """
+    True si la patente ya generó un evento en esta cámara hace menos de
+    `ventana_s` segundos (el mismo auto aparece en varios frames seguidos).
+    """
+    ahora = time.monotonic()
+    anterior = resumen["recientes"].get(patente)
+    if anterior is not None and ahora - anterior < ventana_s:
+        return True
+    resumen["recientes"][patente] = ahora
+    return False
+
+
+def procesar_frame(
+    frame: np.ndarray,
+    frame_count: int,
+    resumen: dict,
+    detector=None,
+    carril: str = "entrada",
+    camara: str | None = None,
+    preprocesador: Preprocesador | None = None,
+    ventana_repeticion_s: float = 30.0,
+) -> dict | None:
+    """
+    Envía un frame al detector (remoto por defecto) y, por cada patente
+    detectada, verifica y registra el ingreso. Devuelve la respuesta de
+    detección (o None si hubo error).
+
+    En cámaras de carril de salida se registra la salida (sin verificar).
+    Cada patente genera a lo más un evento por `ventana_repeticion_s`.
+    """
+    ts = datetime.now().strftime("%H:%M:%S")
+    if camara:
+        ts = f"{ts}][{camara}"
+
+    try:
+        # 1. ENVIAR PARA DETECCIÓN
+        data = (detector or DETECTOR).detectar(frame, preprocesador or PREPROCESADOR)
+
+        # Mostrar información de detecciones en consola
+        for detection in data.get("detections") or []:
+            resumen["detecciones"] += 1
+
+            patente_text = detection.get('plate_text', '')
+            tipo_vehiculo_detectado = detection.get('vehicle_type', 1)
+            confianza_vehiculo = detection.get('vehicle_confidence', 0)
+            confianza_patente = detection.get('plate_confidence', 0)
+
+            print(f"[{ts}] ✅ DETECTADO (Frame {frame_count}):")
+            print(f"   🚗 Vehículo: {tipo_vehiculo_detectado}")
+            print(f"   📊 Conf. Vehículo: {confianza_vehiculo:.3f}")
+            print(f"   🔢 Patente: {patente_text}")
+            print(f"   📈 Conf. Patente: {confianza_patente:.3f}")
+
+            # 2. VERIFICAR PATENTE
+            if carril == "entrada" and patente_text and patente_text != 'No detectada':
+                print(f"   🔍 Verificando patente...")
+
+                tipo_vehiculo_detectado = mapeo_cars.get(tipo_vehiculo_detectado, TIPO_VEHICULO_POR_DEFECTO)
+                # Primero la lista local; solo las patentes desconocidas van al backend
+                resultado_verificacion = (
+                    lista_autorizados().verificar(patente_text, tipo_vehiculo_detectado)
+                    or verificar_patente(patente_text, tipo_vehiculo_detectado)
+                )
+
+                if resultado_verificacion["existe"] and resultado_verificacion["valido"]:
+                    # 3. REGISTRAR INGRESO (se encola; el envío al backend es asíncrono)
+                    if not es_repetido(resumen, patente_text, ventana_repeticion_s):
+                        cola_eventos().encolar(patente_text, resultado_verificacion["tipo"])
+                    print(f"   ✅ {resultado_verificacion['mensaje']} (ingreso encolado)")
+                    ## Codigo para abrir el porton
+                    abrir_porton()
                 else:
-                    print(f"[{ts}] ❌ Error del servidor de detección: {response.status_code}")
-
-            except requests.exceptions.Timeout:
-                print(f"[{ts}] ⏰ Timeout: Servidor no responde")
-            except requests.exceptions.ConnectionError:
-                print(f"[{ts}] 🔌 Error de conexión")
-            except Exception as e:
-                print(f"[{ts}] ⚠️  Error: {e}")
-
-        # Pequeña pausa para no saturar el servidor
-        time.sleep(0.01)
-
-except KeyboardInterrupt:
-    print("\n🛑 Deteniendo el procesamiento...")
-
-finally:
-    cap.release()
-    print("✅ Procesamiento terminado.")
-    print(f"📊 Resumen:")
-    print(f"   Detecciones encontradas: {detection_count}")
-    print(f"   Patentes detectadas: {plates}")
-    
+                    print(f"   ❌ {resultado_verificacion['mensaje']}")
+
+            # 2b. REGISTRAR SALIDA (el backend cierra la estadía abierta)
+            elif carril == "salida" and patente_text and patente_text != 'No detectada':
+                if not es_repetido(resumen, patente_text, ventana_repeticion_s):
+                    cola_eventos().encolar(patente_text, "", evento="salida")
+                    print(f"   🚪 Salida encolada")
+
+            if patente_text not in resumen["patentes"]:
+                resumen["patentes"].append(patente_text)
+
+            print("-" * 50)
+
+        return data
+
+    except ErrorDeteccion as e:
+        print(f"[{ts}] ❌ {e}")
+    except requests.exceptions.Timeout:
+        print(f"[{ts}] ⏰ Timeout: Servidor no responde")
+    except requests.exceptions.ConnectionError:
+        print(f"[{ts}] 🔌 Error de conexión")
+    except Exception as e:
+        print(f"[{ts}] ⚠️  Error: {e}")
+    return None
+
+
+def main():
+    import camaras
+
+    if os.path.exists(CAMARAS_CONFIG):
+        general, configs = camaras.cargar_config(CAMARAS_CONFIG)
+    else:
+        # Modo clásico: una sola cámara definida por `url`
+        general = {}
+        configs = [camaras.ConfigCamara(id="camara", url=url, cada_n_frames=CADA_N_FRAMES)]
+
+    servicio = camaras.ServicioCamaras(configs, **general)
+    lista_autorizados()  # empezar a sincronizar antes del primer vehículo
+    print(f"Iniciando procesamiento de {len(configs)} cámara(s). Presiona 'Ctrl+C' para detener.")
+
+    try:
+        servicio.ejecutar()
+
+    except KeyboardInterrupt:
+        print("\n🛑 Deteniendo el procesamiento...")
+        servicio.detener()
+
+    finally:
+        if _autorizados is not None:
+            _autorizados.detener()
+        if _cola is not None:
+            _cola.cerrar()
+        print("✅ Procesamiento terminado.")
+        servicio.imprimir_resumen()
+
+
+if __name__ == "__main__":
+    # camaras.py importa `Client`: main() debe correr en ese módulo y no en
+    # __main__, que sería una segunda copia con su propia cola, lista de
+    # autorizados y sesión
+    import Client
+    Client.main()
@@ -0,0 +1,130 @@
+"""
+Lista local de patentes autorizadas para decidir la apertura sin esperar
+una consulta HTTP por vehículo.
+
+Se sincroniza en segundo plano contra `GET /autorizados` del backend de
+patentes: la primera vez se descarga la lista completa y luego solo los
+cambios (delta) desde la última versión. La decisión local replica la de
+`/verificar-patente`:
+
+- residente con el mismo tipo de vehículo -> válido
+- residente con otro tipo -> existe pero no válido
+- visitante con reserva vigente en este momento -> válido
+
+Si la patente no está en la lista (o la lista nunca se pudo cargar) se
+devuelve None y el cliente consulta al backend como antes, por lo que una
+reserva recién creada no queda bloqueada hasta la próxima sincronización.
+"""
+import threading
+from datetime import datetime
+
+import requests
+
+
+def _a_datetime(valor: str) -> datetime:
+    hora = datetime.fromisoformat(valor)
+    # Columnas sin zona horaria: se interpretan en la hora local del equipo
+    return hora if hora.tzinfo else hora.astimezone()
+
+
+class ListaAutorizados:
+    def __init__(
+        self,
+        url: str,
+        sesion: requests.Session | None = None,
+        intervalo_s: float = 15.0,
+        horizonte_horas: int = 12,
+    ):
+        self.url = url
+        self.sesion = sesion or requests.Session()
+        self.intervalo_s = intervalo_s
+        self.horizonte_horas = horizonte_horas
+
+        self.autorizados: dict[str, list[dict]] = {}
+        self.version: int | None = None
+        self.hasta: str | None = None
+        self.cargada = False
+
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._bucle, name="autorizados", daemon=True)
+
+    def iniciar(self):
+        self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+
+    def sincronizar(self):
+        params = {"horizonte_horas": self.horizonte_horas}
+        if self.cargada:
+            params.update(version=self.version, hasta=self.hasta)
+        response = self.sesion.get(self.url, params=params, timeout=10)
+        response.raise_for_status()
+        data = response.json()
+
+        cambios = {
+            patente: [
+                {**e, "desde": _a_datetime(e["desde"]), "hasta": _a_datetime(e["hasta"])}
+                if e["tipo"] == "visitante" else e
+                for e in entradas
+            ]
+            for patente, entradas in data["autorizados"].items()
+        }
+        with self._lock:
+            if data["completo"]:
+                self.autorizados = {p: e for p, e in cambios.items() if e}
+            else:
+                for patente, entradas in cambios.items():
+                    if entradas:
+                        self.autorizados[patente] = entradas
+                    else:
+                        self.autorizados.pop(patente, None)
+            self.version = data["version"]
+            self.hasta = data["hasta"]
+            self.cargada = True
+
+    def verificar(self, patente: str, tipo_vehiculo: int) -> dict | None:
+        """Decisión local con el mismo formato que `/verificar-patente`, o None."""
+        with self._lock:
+            entradas = self.autorizados.get(patente)
+        if not entradas:
+            return None
+
+        residentes = [e for e in entradas if e["tipo"] == "residente"]
+        for e in residentes:
+            if e["tipo_vehiculo"] == tipo_vehiculo:
+                return {
+                    "existe": True,
+                    "tipo": "residente",
+                    "valido": True,
+                    "datos": {"placa_patente": patente, **e},
+                    "mensaje": "Vehículo residente válido (lista local)",
+                }
+        if residentes:
+            return {
+                "existe": True,
+                "tipo": "residente",
+                "valido": False,
+                "mensaje": "Vehículo residente encontrado pero tipo no coincide (lista local)",
+            }
+
+        ahora = datetime.now().astimezone()
+        for e in entradas:
+            if e["tipo"] == "visitante" and e["desde"] <= ahora <= e["hasta"]:
+                return {
+                    "existe": True,
+                    "tipo": "visitante",
+                    "valido": True,
+                    "datos": {"placa_patente": patente, "departamento_visitado": e["departamento"]},
+                    "mensaje": "Visitante con reserva activa encontrado (lista local)",
+                }
+        return None
+
+    def _bucle(self):
+        while not self._detener.is_set():
+            try:
+                self.sincronizar()
+            except (requests.exceptions.RequestException, KeyError, ValueError) as e:
+                print(f"   🔄 No se pudo sincronizar la lista de autorizados ({e.__class__.__name__})")
+            self._detener.wait(self.intervalo_s)
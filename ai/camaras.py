@@ -0,0 +1,303 @@
+"""
+Servicio multi-cámara del control de acceso.
+
+Cada cámara definida en el archivo de configuración tiene su propio hilo de
+captura (que lee el stream de forma continua para no acumular retraso) y su
+propio hilo de procesamiento, que toma siempre el último frame muestreado.
+Todas las cámaras comparten la sesión HTTP de `Client.py` y un presupuesto
+común de detecciones concurrentes.
+
+Formato del archivo (ver `camaras.example.json`):
+
+    {
+      "max_detecciones_concurrentes": 2,
+      "pool_conexiones": 8,
+      "intervalo_stats_s": 30,
+      "camaras": [
+        {"id": "entrada-1", "url": "rtsp://...", "carril": "entrada",
+         "roi": [0.1, 0.4, 0.9, 0.9], "cada_n_frames": 10,
+         "intervalo_min_s": 0.5, "detector_url": "http://.../predict"}
+      ]
+    }
+
+`roi` se expresa como fracciones [x1, y1, x2, y2] del ancho/alto del frame.
+Las cámaras de carril "salida" registran la salida de cada patente leída;
+`ventana_repeticion_s` evita registrar varias veces el mismo auto.
+Opcionalmente cada cámara acepta `"preprocesado": {"lado_max": 960,
+"formato": "jpg", "calidad": 80}` (ver `preprocesado.py`) y
+`"aceleracion_hw": true` para pedir a OpenCV decodificación por hardware.
+
+`"detector"` elige el backend de cada cámara: "remoto" (por defecto, vía
+`detector_url`), "local" (ONNX en proceso, ver `deteccion_local.py`) o
+"auto" (remoto con respaldo local si tarda más de `umbral_remoto_s`). Los
+modos local/auto requieren la sección general `"detector_local"` con las
+rutas de los modelos; el detector local es uno solo y agrupa en lotes los
+frames de todas las cámaras.
+"""
+import contextlib
+import json
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+
+import cv2
+
+import Client
+from preprocesado import Preprocesador
+
+CARRILES = ("entrada", "salida")
+DETECTORES = ("remoto", "local", "auto")
+
+
+@dataclass
+class ConfigCamara:
+    id: str
+    url: str
+    carril: str = "entrada"
+    roi: list[float] | None = None
+    cada_n_frames: int = 10
+    intervalo_min_s: float = 0.0
+    detector_url: str | None = None
+    preprocesado: dict = field(default_factory=dict)
+    aceleracion_hw: bool = False
+    detector: str = "remoto"
+    umbral_remoto_s: float = 0.8
+    ventana_repeticion_s: float = 30.0
+
+    def __post_init__(self):
+        if self.carril not in CARRILES:
+            raise ValueError(f"Carril inválido para {self.id}: {self.carril}")
+        if self.detector not in DETECTORES:
+            raise ValueError(f"Detector inválido para {self.id}: {self.detector}")
+        if self.roi is not None and len(self.roi) != 4:
+            raise ValueError(f"ROI inválido para {self.id}: {self.roi}")
+
+
+@dataclass
+class StatsCamara:
+    leidos: int = 0
+    procesados: int = 0
+    descartados: int = 0
+    reconexiones: int = 0
+    lag_total: float = 0.0
+    lag_max: float = 0.0
+    inicio: float = field(default_factory=time.perf_counter)
+
+    def registrar_lag(self, lag: float):
+        self.procesados += 1
+        self.lag_total += lag
+        self.lag_max = max(self.lag_max, lag)
+
+    def texto(self) -> str:
+        duracion = max(time.perf_counter() - self.inicio, 1e-9)
+        lag_prom = self.lag_total / self.procesados if self.procesados else 0.0
+        return (
+            f"captura {self.leidos / duracion:.1f} fps | "
+            f"procesados {self.procesados / duracion:.2f} fps | "
+            f"descartados {self.descartados} | "
+            f"lag prom {lag_prom * 1000:.0f} ms, máx {self.lag_max * 1000:.0f} ms | "
+            f"reconexiones {self.reconexiones}"
+        )
+
+
+def cargar_config(path: str) -> tuple[dict, list[ConfigCamara]]:
+    """Lee el archivo de cámaras y devuelve (opciones generales, cámaras)."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    configs = [ConfigCamara(**c) for c in data.pop("camaras", [])]
+    if not configs:
+        raise ValueError(f"{path} no define cámaras")
+    ids = [c.id for c in configs]
+    if len(set(ids)) != len(ids):
+        raise ValueError(f"{path} tiene ids de cámara repetidos")
+    return data, configs
+
+
+def es_stream(url: str) -> bool:
+    return url.startswith(("rtsp://", "rtmp://", "http://", "https://"))
+
+
+def abrir_captura(config: ConfigCamara) -> cv2.VideoCapture:
+    if config.aceleracion_hw:
+        # Decodificación por hardware si el backend FFmpeg de OpenCV la soporta
+        return cv2.VideoCapture(
+            config.url, cv2.CAP_FFMPEG,
+            [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY],
+        )
+    return cv2.VideoCapture(config.url)
+
+
+class CamaraWorker:
+    """Captura y procesamiento de una cámara."""
+
+    def __init__(self, config: ConfigCamara, detector, presupuesto: threading.Semaphore, detener: threading.Event):
+        self.config = config
+        self.detector = detector
+        self.presupuesto = presupuesto
+        self.detener = detener
+        self.stats = StatsCamara()
+        self.resumen = Client.nuevo_resumen()
+        self.preprocesador = Preprocesador(roi=config.roi, **config.preprocesado)
+        # Solo se guarda el último frame muestreado: si la detección va lenta,
+        # los frames viejos se descartan en vez de acumular retraso.
+        self.ultimo: queue.Queue = queue.Queue(maxsize=1)
+        self.hilos = [
+            threading.Thread(target=self.capturar, name=f"captura-{config.id}", daemon=True),
+            threading.Thread(target=self.procesar, name=f"proceso-{config.id}", daemon=True),
+        ]
+        self.fin_captura = threading.Event()
+
+    def iniciar(self):
+        for hilo in self.hilos:
+            hilo.start()
+
+    def join(self, timeout: float | None = None):
+        for hilo in self.hilos:
+            hilo.join(timeout)
+
+    def vivo(self) -> bool:
+        return any(hilo.is_alive() for hilo in self.hilos)
+
+    def publicar(self, item):
+        try:
+            self.ultimo.put_nowait(item)
+        except queue.Full:
+            try:
+                self.ultimo.get_nowait()
+                self.stats.descartados += 1
+            except queue.Empty:
+                pass
+            self.ultimo.put_nowait(item)
+
+    def capturar(self):
+        cfg = self.config
+        cap = abrir_captura(cfg)
+        frame_count = 0
+        ultimo_envio = 0.0
+
+        try:
+            while not self.detener.is_set():
+                ret, frame = cap.read() if cap.isOpened() else (False, None)
+                if not ret:
+                    if not es_stream(cfg.url):
+                        print(f"[{cfg.id}] Fin del video")
+                        break
+                    # Los streams en vivo se cortan: reintentar la conexión
+                    print(f"[{cfg.id}] Cámara desconectada, reintentando...")
+                    cap.release()
+                    self.detener.wait(2)
+                    cap = abrir_captura(cfg)
+                    self.stats.reconexiones += 1
+                    continue
+
+                frame_count += 1
+                self.stats.leidos += 1
+                if frame_count % cfg.cada_n_frames:
+                    continue
+
+                ahora = time.perf_counter()
+                if ahora - ultimo_envio < cfg.intervalo_min_s:
+                    continue
+                ultimo_envio = ahora
+                self.publicar((frame_count, ahora, frame))
+
+                if not es_stream(cfg.url):
+                    # Un archivo se lee tan rápido como se procese
+                    while not self.ultimo.empty() and not self.detener.is_set():
+                        time.sleep(0.005)
+        finally:
+            cap.release()
+            self.fin_captura.set()
+
+    def procesar(self):
+        cfg = self.config
+        while not self.detener.is_set():
+            try:
+                frame_count, capturado, frame = self.ultimo.get(timeout=0.2)
+            except queue.Empty:
+                if self.fin_captura.is_set():
+                    break
+                continue
+
+            # El presupuesto limita las detecciones remotas en vuelo; el
+            # detector local ya serializa su propia cola de inferencia.
+            limite = self.presupuesto if cfg.detector != "local" else contextlib.nullcontext()
+            with limite:
+                Client.procesar_frame(
+                    frame, frame_count, self.resumen,
+                    detector=self.detector, carril=cfg.carril, camara=cfg.id,
+                    preprocesador=self.preprocesador,
+                    ventana_repeticion_s=cfg.ventana_repeticion_s,
+                )
+            self.stats.registrar_lag(time.perf_counter() - capturado)
+
+
+class ServicioCamaras:
+    """Administra N cámaras con recursos compartidos."""
+
+    def __init__(
+        self,
+        configs: list[ConfigCamara],
+        max_detecciones_concurrentes: int = 2,
+        pool_conexiones: int = 8,
+        intervalo_stats_s: float = 30.0,
+        detector_local: dict | None = None,
+        enfriamiento_remoto_s: float = 30.0,
+    ):
+        Client.configurar_pool(pool_conexiones)
+        self.detener_evento = threading.Event()
+        self.presupuesto = threading.BoundedSemaphore(max_detecciones_concurrentes)
+        self.intervalo_stats_s = intervalo_stats_s
+        self.enfriamiento_remoto_s = enfriamiento_remoto_s
+
+        self.detector_local = None
+        if any(c.detector != "remoto" for c in configs):
+            if not detector_local:
+                raise ValueError("Hay cámaras con detector local/auto pero falta la sección 'detector_local'")
+            from deteccion_local import DetectorLocal
+
+            # Se carga y calienta antes de abrir las cámaras
+            self.detector_local = DetectorLocal(**detector_local)
+
+        self.workers = [
+            CamaraWorker(c, self.crear_detector(c), self.presupuesto, self.detener_evento) for c in configs
+        ]
+
+    def crear_detector(self, config: ConfigCamara):
+        if config.detector == "local":
+            return self.detector_local
+        remoto = Client.DetectorRemoto(config.detector_url)
+        if config.detector == "auto":
+            return Client.DetectorConRespaldo(
+                remoto, self.detector_local, config.umbral_remoto_s, self.enfriamiento_remoto_s
+            )
+        return remoto
+
+    def ejecutar(self):
+        """Bloquea hasta que todas las cámaras terminen (o se llame a detener)."""
+        for worker in self.workers:
+            worker.iniciar()
+
+        ultimo_reporte = time.perf_counter()
+        while any(w.vivo() for w in self.workers):
+            time.sleep(0.5)
+            if self.intervalo_stats_s and time.perf_counter() - ultimo_reporte >= self.intervalo_stats_s:
+                self.imprimir_stats()
+                ultimo_reporte = time.perf_counter()
+
+    def detener(self):
+        self.detener_evento.set()
+        for worker in self.workers:
+            worker.join(timeout=5)
+
+    def imprimir_stats(self):
+        for worker in self.workers:
+            print(f"📈 [{worker.config.id}] {worker.stats.texto()}")
+
+    def imprimir_resumen(self):
+        print(f"📊 Resumen:")
+        for worker in self.workers:
+            print(f"   [{worker.config.id}] ({worker.config.carril}) {worker.stats.texto()}")
+            print(f"      Detecciones encontradas: {worker.resumen['detecciones']}")
+            print(f"      Patentes detectadas: {worker.resumen['patentes']}")
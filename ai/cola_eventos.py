@@ -0,0 +1,137 @@
+"""
+Cola local persistente (SQLite en modo WAL) de eventos de acceso.
+
+El cliente ya no registra los ingresos de forma síncrona: cada evento se
+guarda localmente con una clave de idempotencia (UUID) y un hilo en segundo
+plano los envía por lotes al backend (`POST /registrar-eventos`). Si el
+backend no responde, los eventos quedan en disco y se reintentan con backoff
+exponencial; como el backend ignora claves ya registradas, reenviar un lote
+nunca duplica filas en `registro_evento_acceso`.
+"""
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+
+import requests
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS eventos (
+    id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    clave   TEXT NOT NULL UNIQUE,
+    evento  TEXT NOT NULL,
+    patente TEXT NOT NULL,
+    tipo    TEXT NOT NULL,
+    hora    TEXT NOT NULL
+)
+"""
+
+
+class ColaEventos:
+    def __init__(
+        self,
+        path: str,
+        url_lote: str,
+        sesion: requests.Session | None = None,
+        lote: int = 100,
+        intervalo_s: float = 2.0,
+        backoff_max_s: float = 60.0,
+    ):
+        self.url_lote = url_lote
+        self.sesion = sesion or requests.Session()
+        self.lote = lote
+        self.intervalo_s = intervalo_s
+        self.backoff_max_s = backoff_max_s
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL: un commit no espera fsync, pero sobrevive a un reinicio del proceso
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(ESQUEMA)
+
+        self._despertar = threading.Event()
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._bucle, name="cola-eventos", daemon=True)
+
+    def iniciar(self):
+        self._hilo.start()
+
+    def encolar(self, patente: str, tipo: str, evento: str = "ingreso") -> str:
+        """Guarda el evento localmente y devuelve su clave de idempotencia."""
+        clave = str(uuid.uuid4())
+        hora = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO eventos (clave, evento, patente, tipo, hora) VALUES (?, ?, ?, ?, ?)",
+                (clave, evento, patente, tipo, hora),
+            )
+        self._despertar.set()
+        return clave
+
+    def pendientes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM eventos").fetchone()[0]
+
+    def vaciar(self) -> int:
+        """Envía un lote al backend. Devuelve cuántos eventos se confirmaron."""
+        with self._lock:
+            filas = self._conn.execute(
+                "SELECT clave, evento, patente, tipo, hora FROM eventos ORDER BY id LIMIT ?",
+                (self.lote,),
+            ).fetchall()
+        if not filas:
+            return 0
+
+        eventos = [
+            {"clave": clave, "evento": evento, "patente": patente, "tipo": tipo, "hora": hora}
+            for clave, evento, patente, tipo, hora in filas
+        ]
+        response = self.sesion.post(self.url_lote, json={"eventos": eventos}, timeout=10)
+        response.raise_for_status()
+
+        # Registrados, duplicados y rechazados ya tienen respuesta definitiva
+        resultados = response.json()["resultados"]
+        for r in resultados:
+            if r["estado"] == "rechazado":
+                print(f"   ⚠️  Evento {r['clave']} rechazado por el backend: {r.get('mensaje')}")
+        confirmadas = [(r["clave"],) for r in resultados]
+        with self._lock:
+            self._conn.executemany("DELETE FROM eventos WHERE clave = ?", confirmadas)
+        return len(confirmadas)
+
+    def cerrar(self):
+        """Detiene el hilo e intenta un último envío."""
+        self._detener.set()
+        self._despertar.set()
+        if self._hilo.is_alive():
+            self._hilo.join(timeout=5)
+        try:
+            while self.vaciar():
+                pass
+        except requests.exceptions.RequestException:
+            pass
+        restantes = self.pendientes()
+        if restantes:
+            print(f"📦 {restantes} evento(s) quedan en la cola local para el próximo inicio")
+
+    def _bucle(self):
+        espera = self.intervalo_s
+        while not self._detener.is_set():
+            if espera > self.intervalo_s:
+                # En backoff no se reintenta con cada evento nuevo
+                self._detener.wait(espera)
+            else:
+                self._despertar.wait(espera)
+            self._despertar.clear()
+            if self._detener.is_set():
+                break
+            try:
+                # Vaciar todo lo acumulado (p. ej. después de una caída)
+                while self.vaciar() == self.lote:
+                    pass
+                espera = self.intervalo_s
+            except (requests.exceptions.RequestException, KeyError, ValueError) as e:
+                espera = min(espera * 2, self.backoff_max_s)
+                print(f"   📦 Backend no disponible ({e.__class__.__name__}); "
+                      f"{self.pendientes()} evento(s) en cola, reintento en {espera:.0f} s")
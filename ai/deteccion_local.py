@@ -0,0 +1,302 @@
+"""
+Detector embebido (en proceso) con ONNX Runtime en CPU.
+
+Reproduce el pipeline del servidor remoto (`serverAI.ipynb`) sin salir de la
+máquina: YOLO de vehículos -> YOLO de patentes sobre cada vehículo -> OCR de
+la patente, y devuelve la misma respuesta que `/predict`:
+
+    {"detections": [{"vehicle_type", "vehicle_confidence",
+                     "plate_confidence", "plate_text"}]}
+
+Modelos esperados:
+- `vehiculos` / `patentes`: YOLO exportados con
+  `YOLO(...).export(format="onnx", dynamic=True)` (salida `(N, 4 + clases, anclas)`).
+- `ocr` (opcional): reconocedor tipo CRNN/PaddleOCR con salida `(N, T, C)` y
+  decodificación CTC (índice 0 = blank); `alfabeto` son los caracteres de los
+  índices 1..C-1. Sin OCR se informa `plate_text = "No detectada"`.
+
+Del YOLO de vehículos solo se conservan las clases de `clases_vehiculo`
+(por nombre, según la metadata del modelo): un modelo tipo COCO también
+detecta personas, semáforos, etc. Un modelo sin nombres en su metadata se
+toma como de una sola clase, "car".
+
+Las peticiones de todas las cámaras pasan por una única cola: el hilo de
+inferencia junta hasta `max_lote` frames (esperando como máximo
+`espera_lote_ms`) y los ejecuta en un solo lote. Requiere `onnxruntime`
+(`pip install onnxruntime`).
+"""
+import ast
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import cv2
+import numpy as np
+
+ALFABETO_PATENTES = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+CLASES_VEHICULO = ("car", "auto", "truck", "bus", "motorcycle")
+
+
+class ModeloOnnx:
+    """Sesión de ONNX Runtime con la forma de entrada ya resuelta."""
+
+    def __init__(self, path: str, hilos: int | None = None):
+        try:
+            import onnxruntime as ort
+        except ImportError as exc:
+            raise RuntimeError("onnxruntime no está instalado (pip install onnxruntime)") from exc
+
+        opciones = ort.SessionOptions()
+        if hilos:
+            opciones.intra_op_num_threads = hilos
+        self.sesion = ort.InferenceSession(path, opciones, providers=["CPUExecutionProvider"])
+        entrada = self.sesion.get_inputs()[0]
+        self.nombre_entrada = entrada.name
+        self.batch_dinamico = not isinstance(entrada.shape[0], int)
+        self.alto, self.ancho = (d if isinstance(d, int) else 640 for d in entrada.shape[2:4])
+        self.metadata = self.sesion.get_modelmeta().custom_metadata_map
+
+    def nombres_clases(self) -> dict[int, str]:
+        nombres = self.metadata.get("names")
+        return ast.literal_eval(nombres) if nombres else {}
+
+    def ejecutar(self, lote: np.ndarray) -> np.ndarray:
+        if self.batch_dinamico or len(lote) == 1:
+            return self.sesion.run(None, {self.nombre_entrada: lote})[0]
+        # Modelo exportado con batch fijo: una ejecución por imagen
+        return np.concatenate([
+            self.sesion.run(None, {self.nombre_entrada: lote[i:i + 1]})[0] for i in range(len(lote))
+        ])
+
+
+def letterbox(imagen: np.ndarray, alto: int, ancho: int) -> tuple[np.ndarray, float, int, int]:
+    """Redimensiona manteniendo proporción y rellena (como Ultralytics)."""
+    h, w = imagen.shape[:2]
+    escala = min(alto / h, ancho / w)
+    nh, nw = round(h * escala), round(w * escala)
+    salida = np.full((alto, ancho, 3), 114, dtype=np.uint8)
+    dy, dx = (alto - nh) // 2, (ancho - nw) // 2
+    salida[dy:dy + nh, dx:dx + nw] = cv2.resize(imagen, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    return salida, escala, dx, dy
+
+
+def a_tensor_yolo(imagenes: list[np.ndarray]) -> np.ndarray:
+    """Lote BGR uint8 (N, H, W, 3) -> RGB float32 (N, 3, H, W) en [0, 1]."""
+    lote = np.stack(imagenes)[..., ::-1].transpose(0, 3, 1, 2)
+    return np.ascontiguousarray(lote, dtype=np.float32) / 255.0
+
+
+def cajas_yolo(salida: np.ndarray, conf: float, iou: float = 0.45) -> list[tuple[list[float], float, int]]:
+    """Decodifica una salida YOLO `(4 + clases, anclas)` con NMS."""
+    pred = salida.T
+    scores = pred[:, 4:]
+    clases = scores.argmax(axis=1)
+    confs = scores[np.arange(len(pred)), clases]
+    mask = confs >= conf
+    if not mask.any():
+        return []
+
+    cx, cy, w, h = pred[mask, :4].T
+    cajas = np.stack([cx - w / 2, cy - h / 2, w, h], axis=1)
+    confs, clases = confs[mask], clases[mask]
+    indices = cv2.dnn.NMSBoxes(cajas.tolist(), confs.tolist(), conf, iou)
+    return [
+        ([x, y, x + bw, y + bh], float(confs[i]), int(clases[i]))
+        for i in np.array(indices).flatten()
+        for x, y, bw, bh in [cajas[i]]
+    ]
+
+
+def detectar_yolo(
+    modelo: ModeloOnnx, imagenes: list[np.ndarray], conf: float, clases: set[int] | None = None
+) -> list[list]:
+    """
+    Ejecuta un YOLO sobre un lote y devuelve, por imagen, [(caja, conf, clase)]
+    con la caja [x1, y1, x2, y2] en píxeles de la imagen original, solo de
+    `clases` si se indican.
+    """
+    cajas_lote, ajustes = [], []
+    for imagen in imagenes:
+        caja, escala, dx, dy = letterbox(imagen, modelo.alto, modelo.ancho)
+        cajas_lote.append(caja)
+        ajustes.append((escala, dx, dy))
+
+    salidas = modelo.ejecutar(a_tensor_yolo(cajas_lote))
+    resultados = []
+    for salida, (escala, dx, dy), imagen in zip(salidas, ajustes, imagenes):
+        h, w = imagen.shape[:2]
+        cajas = []
+        for (x1, y1, x2, y2), confianza, clase in cajas_yolo(salida, conf):
+            if clases is not None and clase not in clases:
+                continue
+            x1, x2 = np.clip([(x1 - dx) / escala, (x2 - dx) / escala], 0, w).astype(int)
+            y1, y2 = np.clip([(y1 - dy) / escala, (y2 - dy) / escala], 0, h).astype(int)
+            if x2 > x1 and y2 > y1:
+                cajas.append(([x1, y1, x2, y2], confianza, clase))
+        resultados.append(cajas)
+    return resultados
+
+
+class DetectorVehiculos:
+    """
+    Solo el YOLO de vehículos, sin patentes: la primera etapa de
+    DetectorLocal y la fuente de cajas del monitor de ocupación
+    (backend/parking-monitor).
+    """
+
+    def __init__(
+        self,
+        modelo: str,
+        conf: float = 0.7,
+        clases_vehiculo: tuple[str, ...] = CLASES_VEHICULO,
+        hilos: int | None = None,
+    ):
+        self.modelo = ModeloOnnx(modelo, hilos)
+        self.nombres = self.modelo.nombres_clases()
+        # None: modelo sin nombres de clases, se aceptan todas
+        self.ids_vehiculo = (
+            {i for i, nombre in self.nombres.items() if nombre in clases_vehiculo} if self.nombres else None
+        )
+        if self.ids_vehiculo == set():
+            print(f"⚠️ El modelo de vehículos no tiene ninguna de las clases {clases_vehiculo}: {self.nombres}")
+        self.conf = conf
+
+    def detectar_lote(self, imagenes: list[np.ndarray]) -> list[list]:
+        return detectar_yolo(self.modelo, imagenes, self.conf, self.ids_vehiculo)
+
+    def cajas(self, frame: np.ndarray) -> list[list[int]]:
+        """Cajas [x1, y1, x2, y2] de los vehículos del frame, en sus píxeles."""
+        return [caja for caja, _, _ in self.detectar_lote([frame])[0]]
+
+
+class DetectorLocal:
+    """Detección de vehículos y patentes en proceso, con inferencia por lotes."""
+
+    def __init__(
+        self,
+        vehiculos: str,
+        patentes: str,
+        ocr: str | None = None,
+        alfabeto: str = ALFABETO_PATENTES,
+        conf: float = 0.7,
+        clases_vehiculo: tuple[str, ...] = CLASES_VEHICULO,
+        max_lote: int = 4,
+        espera_lote_ms: float = 10.0,
+        hilos: int | None = None,
+    ):
+        self.vehiculos = DetectorVehiculos(vehiculos, conf, clases_vehiculo, hilos)
+        self.modelo_patentes = ModeloOnnx(patentes, hilos)
+        self.modelo_ocr = ModeloOnnx(ocr, hilos) if ocr else None
+        self.nombres = self.vehiculos.nombres
+        self.alfabeto = alfabeto
+        self.conf = conf
+        self.max_lote = max_lote
+        self.espera_lote = espera_lote_ms / 1000
+
+        self.cola: queue.Queue = queue.Queue()
+        self.calentar()
+        threading.Thread(target=self._bucle, name="detector-local", daemon=True).start()
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+    def detectar(self, frame: np.ndarray, preprocesador=None) -> dict:
+        """Encola el frame y espera su resultado (mismo formato que /predict)."""
+        imagen = preprocesador.preparar(frame) if preprocesador else frame
+        futuro: Future = Future()
+        self.cola.put((imagen, futuro))
+        return futuro.result()
+
+    def calentar(self):
+        """Primera inferencia en vacío para no pagarla con el primer auto."""
+        inicio = time.perf_counter()
+        for modelo in (self.vehiculos.modelo, self.modelo_patentes, self.modelo_ocr):
+            if modelo:
+                modelo.ejecutar(np.zeros((1, 3, modelo.alto, modelo.ancho), dtype=np.float32))
+        print(f"🔥 Detector local listo ({(time.perf_counter() - inicio) * 1000:.0f} ms de calentamiento)")
+
+    # ------------------------------------------------------------------
+    # Inferencia
+    # ------------------------------------------------------------------
+    def _bucle(self):
+        while True:
+            pendientes = [self.cola.get()]
+            limite = time.perf_counter() + self.espera_lote
+            while len(pendientes) < self.max_lote:
+                restante = limite - time.perf_counter()
+                if restante <= 0:
+                    break
+                try:
+                    pendientes.append(self.cola.get(timeout=restante))
+                except queue.Empty:
+                    break
+
+            try:
+                resultados = self._inferir([imagen for imagen, _ in pendientes])
+                for (_, futuro), resultado in zip(pendientes, resultados):
+                    futuro.set_result(resultado)
+            except Exception as exc:
+                for _, futuro in pendientes:
+                    futuro.set_exception(exc)
+
+    def _leer_patentes(self, recortes: list[np.ndarray]) -> list[str]:
+        if not self.modelo_ocr or not recortes:
+            return ["No detectada"] * len(recortes)
+
+        modelo = self.modelo_ocr
+        lote = np.zeros((len(recortes), 3, modelo.alto, modelo.ancho), dtype=np.float32)
+        for i, recorte in enumerate(recortes):
+            h, w = recorte.shape[:2]
+            nw = min(modelo.ancho, max(1, round(w * modelo.alto / h)))
+            img = cv2.resize(recorte, (nw, modelo.alto))[..., ::-1].astype(np.float32)
+            lote[i, :, :, :nw] = ((img / 255.0 - 0.5) / 0.5).transpose(2, 0, 1)
+
+        textos = []
+        for indices in modelo.ejecutar(lote).argmax(axis=2):
+            # CTC greedy: colapsar repetidos y quitar blanks
+            anterior, chars = 0, []
+            for idx in indices:
+                if idx and idx != anterior and idx - 1 < len(self.alfabeto):
+                    chars.append(self.alfabeto[idx - 1])
+                anterior = idx
+            textos.append("".join(chars) or "No detectada")
+        return textos
+
+    def _inferir(self, imagenes: list[np.ndarray]) -> list[dict]:
+        vehiculos_por_imagen = self.vehiculos.detectar_lote(imagenes)
+
+        # Un único lote de patentes con todos los vehículos de todas las imágenes
+        recortes, origen = [], []
+        for i, (imagen, vehiculos) in enumerate(zip(imagenes, vehiculos_por_imagen)):
+            for (x1, y1, x2, y2), conf, clase in vehiculos:
+                recortes.append(imagen[y1:y2, x1:x2])
+                origen.append((i, conf, clase))
+
+        detecciones: list[list[dict]] = [[] for _ in imagenes]
+        if not recortes:
+            return [{"detections": d} for d in detecciones]
+
+        placas, confs_placa, origen_placas = [], [], []
+        for recorte, cajas, datos in zip(recortes, detectar_yolo(self.modelo_patentes, recortes, self.conf), origen):
+            if not cajas:
+                continue
+            (px1, py1, px2, py2), conf_placa, _ = max(cajas, key=lambda c: c[1])
+            # Mismo margen que el servidor remoto
+            h, w = recorte.shape[:2]
+            pw, ph = int((px2 - px1) * 0.08), int((py2 - py1) * 0.08)
+            placa = recorte[max(0, py1 - ph):min(h, py2 + ph), max(0, px1 - pw):min(w, px2 + pw)]
+            if placa.size == 0:
+                continue
+            placas.append(placa)
+            confs_placa.append(conf_placa)
+            origen_placas.append(datos)
+
+        for texto, conf_placa, (i, conf, clase) in zip(self._leer_patentes(placas), confs_placa, origen_placas):
+            detecciones[i].append({
+                "vehicle_type": self.nombres.get(clase, "car"),
+                "vehicle_confidence": round(conf, 3),
+                "plate_confidence": round(conf_placa, 3),
+                "plate_text": texto,
+            })
+        return [{"detections": d} for d in detecciones]
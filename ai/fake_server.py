@@ -0,0 +1,143 @@
+"""
+Servidor de detección simulado para probar el cliente sin la GPU.
+
+Expone el mismo contrato que el servidor real (`POST /predict` con un archivo
+`file`) y además los endpoints de verificación/registro del backend de
+patentes, de modo que `Client.py` y `replay.py` pueden apuntar completamente
+a esta máquina:
+
+    python fake_server.py --latencia 0.4 --jitter 0.1
+    URL_DETECCION=http://127.0.0.1:9000/predict URL_API=http://127.0.0.1:9000 \
+        python replay.py --video "Video prueba.mp4" --velocidad 4
+
+Modos de respuesta de `/predict`:
+- Grabado: `--respuestas archivo.jsonl` (una respuesta JSON por línea, por
+  ejemplo grabadas con `replay.py --grabar`). Se devuelven en orden y en ciclo.
+- Determinista: sin archivo, cada `--cada` peticiones se devuelve una
+  detección con la siguiente patente de `--patentes`; el resto, sin detecciones.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+
+import uvicorn
+from fastapi import FastAPI, File, UploadFile
+from fastapi.responses import JSONResponse
+
+
+def cargar_respuestas(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def crear_app(
+    respuestas: list[dict] | None = None,
+    patentes: list[str] | None = None,
+    cada: int = 5,
+    latencia: float = 0.0,
+    jitter: float = 0.0,
+    seed: int = 0,
+) -> FastAPI:
+    """Construye la app simulada con latencia `latencia ± jitter` segundos."""
+    app = FastAPI(title="Servidor de detección simulado")
+    rng = random.Random(seed)
+    contador = itertools.count(1)
+    ciclo_respuestas = itertools.cycle(respuestas) if respuestas else None
+    ciclo_patentes = itertools.cycle(patentes or ["ABCD12"])
+    stats = {"peticiones": 0, "bytes": 0, "eventos_registrados": 0}
+
+    async def esperar():
+        demora = latencia + rng.uniform(-jitter, jitter)
+        if demora > 0:
+            await asyncio.sleep(demora)
+
+    def respuesta_determinista(n: int) -> dict:
+        if n % cada:
+            return {"detections": []}
+        return {
+            "detections": [{
+                "vehicle_type": "car",
+                "vehicle_confidence": 0.9,
+                "plate_confidence": 0.9,
+                "plate_text": next(ciclo_patentes),
+            }]
+        }
+
+    @app.post("/predict")
+    async def predict(file: UploadFile = File(...)):
+        contents = await file.read()
+        n = next(contador)
+        stats["peticiones"] += 1
+        stats["bytes"] += len(contents)
+        await esperar()
+        data = next(ciclo_respuestas) if ciclo_respuestas else respuesta_determinista(n)
+        return JSONResponse(content=data)
+
+    @app.get("/verificar-patente/{patente}/{tipo_vehiculo}")
+    async def verificar_patente(patente: str, tipo_vehiculo: int):
+        return {
+            "existe": True,
+            "tipo": "residente",
+            "valido": True,
+            "datos": {"placa_patente": patente, "tipo_vehiculo": tipo_vehiculo, "departamento": "SIM"},
+            "mensaje": "Vehículo residente válido (simulado)",
+        }
+
+    @app.get("/autorizados")
+    async def autorizados():
+        return {
+            "version": 1,
+            "hasta": "9999-12-31T00:00:00+00:00",
+            "completo": True,
+            "autorizados": {
+                p: [{"tipo": "residente", "tipo_vehiculo": 1, "departamento": "SIM"}] for p in patentes or []
+            },
+        }
+
+    claves_registradas: set[str] = set()
+
+    @app.post("/registrar-eventos")
+    async def registrar_eventos(lote: dict):
+        resultados = []
+        for evento in lote.get("eventos", []):
+            clave = evento["clave"]
+            estado = "duplicado" if clave in claves_registradas else "registrado"
+            claves_registradas.add(clave)
+            resultados.append({"clave": clave, "estado": estado})
+        stats["eventos_registrados"] = len(claves_registradas)
+        return {"resultados": resultados}
+
+    @app.get("/stats")
+    async def ver_stats():
+        return stats
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor de detección simulado")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--respuestas", help="Archivo .jsonl con respuestas grabadas de /predict")
+    parser.add_argument("--patentes", default="ABCD12,XYZW34", help="Patentes del modo determinista (separadas por coma)")
+    parser.add_argument("--cada", type=int, default=5, help="Devolver una detección cada N peticiones")
+    parser.add_argument("--latencia", type=float, default=0.0, help="Latencia base en segundos")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Variación uniforme de la latencia en segundos")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    app = crear_app(
+        respuestas=cargar_respuestas(args.respuestas) if args.respuestas else None,
+        patentes=[p.strip() for p in args.patentes.split(",") if p.strip()],
+        cada=args.cada,
+        latencia=args.latencia,
+        jitter=args.jitter,
+        seed=args.seed,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Etapa de preprocesamiento de frames antes de enviarlos al detector.
+
+Recorta el frame a la zona de interés (como vista, sin copiar), lo reduce al
+tamaño de entrada del detector reutilizando el mismo buffer de salida entre
+frames y lo codifica con el formato/calidad configurados. El resultado se
+entrega como `memoryview` sobre el buffer codificado, evitando la copia extra
+de `.tobytes()`.
+
+Formatos:
+- "jpg" / "webp": con pérdida, `calidad` 0-100.
+- "png": sin pérdida, `calidad` se usa como nivel de compresión 0-9.
+- "raw": sin codificar (array BGR contiguo). Solo sirve para detectores
+  locales; el servidor remoto espera una imagen codificada.
+"""
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+FORMATOS = {
+    "jpg": (".jpg", "image/jpeg", cv2.IMWRITE_JPEG_QUALITY),
+    "webp": (".webp", "image/webp", cv2.IMWRITE_WEBP_QUALITY),
+    "png": (".png", "image/png", cv2.IMWRITE_PNG_COMPRESSION),
+}
+
+
+@dataclass
+class ImagenCodificada:
+    nombre: str
+    datos: memoryview
+    mime: str
+
+    def como_archivo(self) -> tuple:
+        """Tupla lista para el parámetro `files` de requests."""
+        return (self.nombre, self.datos, self.mime)
+
+
+def recortar_roi(frame: np.ndarray, roi: list[float] | None) -> np.ndarray:
+    """Recorta el frame a la zona configurada (vista, sin copiar).
+
+    `roi` son fracciones [x1, y1, x2, y2] del ancho/alto del frame.
+    """
+    if roi is None:
+        return frame
+    h, w = frame.shape[:2]
+    x1, y1, x2, y2 = roi
+    return frame[int(y1 * h):int(y2 * h), int(x1 * w):int(x2 * w)]
+
+
+class Preprocesador:
+    """Recorte + reducción + codificación de frames.
+
+    Cada instancia mantiene su propio buffer de reducción, por lo que no debe
+    compartirse entre hilos (se usa una por cámara).
+    """
+
+    def __init__(
+        self,
+        roi: list[float] | None = None,
+        lado_max: int | None = None,
+        formato: str = "jpg",
+        calidad: int | None = None,
+    ):
+        if formato != "raw" and formato not in FORMATOS:
+            raise ValueError(f"Formato no soportado: {formato}")
+        self.roi = roi
+        self.lado_max = lado_max
+        self.formato = formato
+        self.calidad = calidad
+        self._buffer: np.ndarray | None = None
+
+    def preparar(self, frame: np.ndarray) -> np.ndarray:
+        """Recorta y reduce el frame; nunca lo agranda."""
+        frame = recortar_roi(frame, self.roi)
+        if not self.lado_max:
+            return frame
+
+        h, w = frame.shape[:2]
+        escala = self.lado_max / max(h, w)
+        if escala >= 1:
+            return frame
+
+        tamano = (max(1, round(w * escala)), max(1, round(h * escala)))
+        if self._buffer is None or self._buffer.shape[:2] != (tamano[1], tamano[0]):
+            self._buffer = np.empty((tamano[1], tamano[0], frame.shape[2]), dtype=frame.dtype)
+        cv2.resize(frame, tamano, dst=self._buffer, interpolation=cv2.INTER_AREA)
+        return self._buffer
+
+    def codificar(self, frame: np.ndarray) -> ImagenCodificada:
+        imagen = self.preparar(frame)
+
+        if self.formato == "raw":
+            imagen = np.ascontiguousarray(imagen)
+            h, w = imagen.shape[:2]
+            return ImagenCodificada(f"frame_{w}x{h}.bgr", memoryview(imagen).cast("B"), "application/octet-stream")
+
+        extension, mime, flag = FORMATOS[self.formato]
+        params = [flag, self.calidad] if self.calidad is not None else []
+        ok, buffer = cv2.imencode(extension, imagen, params)
+        if not ok:
+            raise ValueError(f"No se pudo codificar el frame como {self.formato}")
+        return ImagenCodificada(f"frame{extension}", memoryview(buffer).cast("B"), mime)
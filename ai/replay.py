@@ -0,0 +1,162 @@
+"""
+Reproduce un video grabado a través del pipeline del cliente y mide su
+rendimiento: frames/s leídos y procesados, profundidad de la cola entre
+captura y procesamiento, y latencia de decisión (desde que el frame se
+captura hasta que el cliente termina de decidir sobre él).
+
+    python replay.py --video "Video prueba.mp4" --velocidad 4 \
+        --detector http://127.0.0.1:9000/predict --api http://127.0.0.1:9000
+
+`--velocidad 1` reproduce a la tasa real del video, `--velocidad 0` lo más
+rápido posible. Con `--grabar` se guardan las respuestas de `/predict` en un
+.jsonl reutilizable por `fake_server.py --respuestas`.
+"""
+import argparse
+import contextlib
+import json
+import os
+import queue
+import threading
+import time
+
+import cv2
+
+import Client
+
+FIN = object()
+
+
+def configurar_urls(detector: str | None, api: str | None):
+    if detector:
+        Client.URL_DETECCION = detector
+    if api:
+        Client.URL_API = api
+        Client.URL_VERIFICACION = f"{api}/verificar-patente"
+        Client.URL_REGISTRO_LOTE = f"{api}/registrar-eventos"
+        Client.URL_AUTORIZADOS = f"{api}/autorizados"
+
+
+def percentil(valores: list[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    orden = sorted(valores)
+    return orden[min(len(orden) - 1, int(round(p / 100 * (len(orden) - 1))))]
+
+
+def capturar(cap, cola: queue.Queue, velocidad: float, cada: int, stats: dict, detener: threading.Event):
+    """Lee el video a la tasa indicada y encola los frames muestreados."""
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    intervalo = 1.0 / (fps * velocidad) if velocidad > 0 else 0.0
+    inicio = time.perf_counter()
+    frame_count = 0
+
+    while not detener.is_set():
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frame_count += 1
+        stats["leidos"] = frame_count
+
+        if intervalo:
+            # Mantener el ritmo del video (real o acelerado)
+            espera = inicio + frame_count * intervalo - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+
+        if frame_count % cada == 0:
+            try:
+                cola.put_nowait((frame_count, time.perf_counter(), frame))
+            except queue.Full:
+                # En una cámara en vivo el frame se pierde si el cliente no da abasto
+                stats["descartados"] += 1
+
+    cola.put(FIN)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay de video para medir el cliente")
+    parser.add_argument("--video", default=Client.url)
+    parser.add_argument("--velocidad", type=float, default=1.0, help="1 = tiempo real, 0 = sin límite")
+    parser.add_argument("--cada", type=int, default=Client.CADA_N_FRAMES, help="Procesar cada N frames")
+    parser.add_argument("--cola", type=int, default=8, help="Tamaño máximo de la cola de frames")
+    parser.add_argument("--detector", help="URL de /predict (por defecto la de Client.py)")
+    parser.add_argument("--api", help="URL base del backend de patentes")
+    parser.add_argument("--grabar", help="Guardar las respuestas de /predict en este .jsonl")
+    parser.add_argument("--cola-eventos", default=":memory:", help="Base SQLite de la cola de eventos")
+    parser.add_argument("--verbose", action="store_true", help="Mostrar la salida del cliente")
+    args = parser.parse_args()
+
+    configurar_urls(args.detector, args.api)
+    Client.COMANDO_PORTON = ""  # nunca abrir el portón durante un replay
+    Client.COLA_EVENTOS_PATH = args.cola_eventos
+
+    cap = cv2.VideoCapture(args.video)
+    if not cap.isOpened():
+        print(f"Error: No se puede abrir el video {args.video}")
+        return
+
+    cola: queue.Queue = queue.Queue(maxsize=args.cola)
+    stats = {"leidos": 0, "descartados": 0}
+    detener = threading.Event()
+    productor = threading.Thread(
+        target=capturar, args=(cap, cola, args.velocidad, args.cada, stats, detener), daemon=True
+    )
+
+    resumen = Client.nuevo_resumen()
+    latencias: list[float] = []
+    profundidades: list[int] = []
+    procesados = 0
+    grabacion = open(args.grabar, "a", encoding="utf-8") if args.grabar else None
+    salida = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+
+    print(f"▶️  Replay de {args.video} a velocidad x{args.velocidad or '∞'} (cada {args.cada} frames)")
+    inicio = time.perf_counter()
+    productor.start()
+
+    try:
+        while True:
+            item = cola.get()
+            if item is FIN:
+                break
+            profundidades.append(cola.qsize())
+            frame_count, capturado, frame = item
+
+            with salida:
+                data = Client.procesar_frame(frame, frame_count, resumen)
+
+            latencias.append(time.perf_counter() - capturado)
+            procesados += 1
+            if grabacion and data is not None:
+                grabacion.write(json.dumps(data, ensure_ascii=False) + "\n")
+
+    except KeyboardInterrupt:
+        print("\n🛑 Deteniendo el replay...")
+        detener.set()
+
+    finally:
+        duracion = time.perf_counter() - inicio
+        productor.join(timeout=1)
+        cap.release()
+        if grabacion:
+            grabacion.close()
+        if Client._autorizados is not None:
+            Client._autorizados.detener()
+        if Client._cola is not None:
+            Client._cola.cerrar()
+
+    print("📊 Resultados del replay:")
+    print(f"   Duración:              {duracion:.2f} s")
+    print(f"   Frames leídos:         {stats['leidos']} ({stats['leidos'] / duracion:.1f} fps)")
+    print(f"   Frames procesados:     {procesados} ({procesados / duracion:.2f} fps)")
+    print(f"   Frames descartados:    {stats['descartados']}")
+    if profundidades:
+        print(f"   Cola (prom / máx):     {sum(profundidades) / len(profundidades):.2f} / {max(profundidades)}")
+    print(f"   Latencia decisión p50: {percentil(latencias, 50) * 1000:.1f} ms")
+    print(f"   Latencia decisión p95: {percentil(latencias, 95) * 1000:.1f} ms")
+    print(f"   Latencia decisión máx: {max(latencias, default=0) * 1000:.1f} ms")
+    print(f"   Detecciones:           {resumen['detecciones']}")
+    print(f"   Patentes:              {resumen['patentes']}")
+
+
+if __name__ == "__main__":
+    main()
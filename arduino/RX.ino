@@ -23,6 +23,12 @@ const char* DEVICE_ID = "4bb61efc-6b58-4f75-b150-f3a8ed573bb3";  // UUID (verifi
 
 WiFiClientSecure https; // (no usado directamente; lo dejo por si lo necesitas)
 
+// --------- Modo gateway ----------
+// true: cada paquete se reenvía por serial como "PKT <payload> <rssi> <snr>"
+// al gateway (backend/parking-availability/app/gateway_lora.py), que lo
+// escribe en la base; no se usa WiFi ni Supabase.
+const bool MODO_GATEWAY = true;
+
 // --------- LEDs (rojo/verde) ----------
 const int LED_R = 25;
 const int LED_G = 26;
@@ -155,6 +161,10 @@ void setup() {
   delay(200);
   setupLeds();
   setupLoRa();
+  if (MODO_GATEWAY) {
+    Serial.println("RX listo: reenvío los paquetes LoRa por serial al gateway.");
+    return;
+  }
   connectWiFi();
   Serial.println("RX listo: recibo '0'/'1' por LoRa y envío a Supabase.");
 }
@@ -169,11 +179,19 @@ void loop() {
 
   if (payload.length() == 0) return;
 
-  Serial.print("LoRa RX: \""); Serial.print(payload); Serial.println("\"");
+  if (MODO_GATEWAY) {
+    Serial.print("PKT "); Serial.print(payload);
+    Serial.print(" "); Serial.print(LoRa.packetRssi());
+    Serial.print(" "); Serial.println(LoRa.packetSnr(), 1);
+  } else {
+    Serial.print("LoRa RX: \""); Serial.print(payload); Serial.println("\"");
+  }
 
+  // El estado es el último carácter ("1" o "<estacionamiento>:<secuencia>:1")
+  char estado = payload[payload.length() - 1];
   bool ocupado;
-  if (payload[0] == '1')      ocupado = true;
-  else if (payload[0] == '0') ocupado = false;
+  if (estado == '1')      ocupado = true;
+  else if (estado == '0') ocupado = false;
   else {
     Serial.print("Payload inválido: "); Serial.println(payload);
     return;
@@ -181,6 +199,7 @@ void loop() {
 
   // LED local
   setLed(ocupado);
+  if (MODO_GATEWAY) return;
 
   // WiFi + POST a Supabase
   connectWiFi();
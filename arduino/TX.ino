@@ -1,4 +1,7 @@
 // === TX: ESP32 LoRa + Ultrasonido (envía 0/1) ===
+// Paquete: "<estacionamiento>:<secuencia>:<estado>", p. ej. "12:345:1".
+// La secuencia sube en cada envío (el gateway descarta repetidos y cuenta
+// perdidos) y el estado se repite cada HEARTBEAT_MS como latido.
 #include <SPI.h>
 #include <LoRa.h>
 
@@ -24,9 +27,15 @@ bool lastBtn = HIGH;
 const int LED_R = 25;
 const int LED_G = 26;
 
+// --- Identidad del sensor ---
+const int ESTACIONAMIENTO = 1;   // número del estacionamiento que mide este sensor
+
 // --- Estado ---
 uint8_t state = 0;       // 0=verde (lejos), 1=rojo (cerca)
 uint8_t lastSent = 255;  // valor imposible para forzar primer envío
+uint16_t seq = 0;        // secuencia de paquetes (vuelve a 0 al reiniciar)
+unsigned long lastSentMs = 0;
+const unsigned long HEARTBEAT_MS = 60000UL;  // latido aunque no cambie el estado
 
 // --- Timings ---
 unsigned long lastMeasureMs = 0;
@@ -61,12 +70,14 @@ void setupLoRa() {
 }
 
 void sendState(uint8_t s) {
+  String paquete = String(ESTACIONAMIENTO) + ":" + String(seq++) + ":" + (s ? "1" : "0");
   LoRa.beginPacket();
-  LoRa.write(s ? '1' : '0');   // envía '0' o '1'
+  LoRa.print(paquete);
   LoRa.endPacket();
   Serial.print("TX -> ");
-  Serial.println(s);
+  Serial.println(paquete);
   lastSent = s;
+  lastSentMs = millis();
 }
 
 void sendSyncRequest() {
@@ -170,6 +181,9 @@ void loop() {
 
   // --- Medición periódica de distancia ---
   unsigned long now = millis();
+  if (now - lastSentMs >= HEARTBEAT_MS) {
+    sendState(state);  // latido
+  }
   if (now - lastMeasureMs >= MEASURE_EVERY_MS) {
     lastMeasureMs = now;
 
@@ -0,0 +1,100 @@
+# backend/combinado/main.py
+"""
+Modo combinado para sitios chicos: los cuatro servicios en un solo proceso.
+
+    cd backend/combinado && uvicorn main:app --host 0.0.0.0 --port 8000
+
+Cada servicio se monta completo (rutas y middlewares) bajo su prefijo:
+
+    /web                        backend/web
+    /mobile                     backend/mobile
+    /licence-plate-recognition  backend/licence-plate-recognition
+    /parking-availability       backend/parking-availability
+
+Los servicios no cambian y siguen funcionando en sus contenedores; aquí solo
+se importan. Como los cuatro se llaman `app`, se cargan de a uno: al terminar
+cada uno sus módulos salen de sys.modules (quedan vivos por sus referencias)
+y el siguiente importa su propio `app`.
+
+Compartido en este modo:
+- Un solo .env (combinado/.env) con DATABASE_URL, SECRET_KEY, etc.
+- Un solo pool de SQLAlchemy para web, licence-plate-recognition y
+  parking-availability, de DB_CONEXIONES conexiones (+ DB_MAX_OVERFLOW): sus
+  app/db.py piden el engine a comun/db.py, que da uno por URL en el proceso.
+  Lo mismo para la réplica de lectura opcional (DATABASE_URL_REPLICA).
+  mobile usa asyncpg y mantiene su pool, de DB_CONEXIONES_MOBILE.
+- Un solo estado canónico en memoria, con una sola escucha del NOTIFY, para
+  web y parking-availability (comun/estado.py da uno por engine).
+
+Nada se conecta al importar. El startup y shutdown de cada servicio corren
+aquí con el lifespan del propio servicio (un Mount no los ejecuta); lo
+compartido tolera que cada servicio lo inicie y lo detenga.
+"""
+import importlib
+import os
+import sys
+from contextlib import AsyncExitStack, asynccontextmanager
+from pathlib import Path
+
+from fastapi import FastAPI
+
+BACKEND = Path(__file__).resolve().parent.parent
+# backend/comun, compartido por los servicios
+sys.path.insert(0, str(BACKEND))
+
+os.environ.setdefault("DB_POOL_SIZE", os.getenv("DB_CONEXIONES", "5"))
+os.environ.setdefault("DB_MAX_OVERFLOW", "5")
+
+
+def cargar(servicio: str, **entorno: str) -> dict:
+    """
+    Importa app.main del servicio, con `entorno` en os.environ mientras se
+    importa; devuelve sus módulos por nombre ("main", "db", ...).
+    """
+    for nombre in [n for n in sys.modules if n == "app" or n.startswith("app.")]:
+        del sys.modules[nombre]
+    anterior = {clave: os.environ.get(clave) for clave in entorno}
+    os.environ.update(entorno)
+    ruta = str(BACKEND / servicio)
+    sys.path.insert(0, ruta)
+    try:
+        importlib.import_module("app.main")
+    finally:
+        sys.path.remove(ruta)
+        for clave, valor in anterior.items():
+            if valor is None:
+                del os.environ[clave]
+            else:
+                os.environ[clave] = valor
+    modulos = {n.removeprefix("app."): m for n, m in sys.modules.items() if n.startswith("app.")}
+    for nombre in modulos:
+        del sys.modules[f"app.{nombre}"]
+    del sys.modules["app"]
+    return modulos
+
+
+servicios = {
+    "web": cargar("web"),
+    "mobile": cargar("mobile", DB_POOL_SIZE=os.getenv("DB_CONEXIONES_MOBILE", "2")),
+    "licence-plate-recognition": cargar("licence-plate-recognition"),
+    "parking-availability": cargar("parking-availability"),
+}
+
+
+@asynccontextmanager
+async def ciclo(_app: FastAPI):
+    async with AsyncExitStack() as pila:
+        for modulos in servicios.values():
+            app_servicio = modulos["main"].app
+            await pila.enter_async_context(app_servicio.router.lifespan_context(app_servicio))
+        yield
+
+
+app = FastAPI(title="Backend combinado", lifespan=ciclo)
+for servicio, modulos in servicios.items():
+    app.mount(f"/{servicio}", modulos["main"].app)
+
+
+@app.get("/")
+def root():
+    return {"message": "Backend combinado funcionando", "servicios": [f"/{s}" for s in servicios]}
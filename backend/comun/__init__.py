@@ -0,0 +1,11 @@
+# backend/comun/__init__.py
+"""
+Código compartido por los servicios de backend/ (web, mobile,
+licence-plate-recognition y parking-availability).
+
+Las imágenes de cada servicio se construyen desde backend/ y copian este
+paquete junto a su `app/` (ver el Dockerfile de cada uno). Para correr un
+servicio fuera de Docker, desde su directorio:
+
+    PYTHONPATH=.. uvicorn app.main:app --reload
+"""
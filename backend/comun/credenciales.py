@@ -0,0 +1,84 @@
+# backend/comun/credenciales.py
+"""
+Lo común de app/credenciales.py de web y mobile: el formato del hash, la
+verificación bcrypt y el límite de intentos de login. Cada servicio pone el
+pool de hilos donde corre checkpw (síncrono en web, con asyncio en mobile).
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import bcrypt
+
+# Largo máximo aceptado en el login; de todas formas bcrypt solo usa los
+# primeros MAX_BYTES_BCRYPT bytes
+MAX_LARGO_CONTRASENA = 256
+MAX_BYTES_BCRYPT = 72
+
+
+class LoginSaturado(Exception):
+    """Hay demasiadas verificaciones pendientes."""
+
+
+def es_bcrypt(hash_guardado: str) -> bool:
+    return hash_guardado.startswith(("$2a$", "$2b$", "$2y$"))
+
+
+def checkpw(contrasena: str, hash_guardado: str) -> bool:
+    """
+    bcrypt.checkpw con la contraseña recortada a 72 bytes, como hacía
+    crypt() de pgcrypto (bcrypt 5 rechaza las más largas). Un hash mal
+    formado no verifica.
+    """
+    try:
+        return bcrypt.checkpw(contrasena.encode()[:MAX_BYTES_BCRYPT], hash_guardado.encode())
+    except ValueError:
+        return False
+
+
+class LimitadorIntentos:
+    """
+    Token bucket por clave: `capacidad` intentos seguidos y luego uno cada
+    60/por_minuto segundos. Guarda a lo más `max_claves` cubetas y olvida las
+    menos usadas (una cubeta olvidada vuelve llena).
+
+    Con lock: en web las rutas síncronas llegan desde el threadpool.
+    """
+
+    def __init__(self, capacidad: int, por_minuto: float, max_claves: int = 10000):
+        self.capacidad = capacidad
+        self.recarga_s = por_minuto / 60
+        self.max_claves = max_claves
+        self._cubetas: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def intentar(self, clave: str) -> float:
+        """Gasta una ficha. Devuelve 0 si había, o los segundos hasta la siguiente."""
+        with self._lock:
+            ahora = time.monotonic()
+            fichas, visto = self._cubetas.pop(clave, (self.capacidad, ahora))
+            fichas = min(self.capacidad, fichas + (ahora - visto) * self.recarga_s)
+            espera = 0.0
+            if fichas >= 1:
+                fichas -= 1
+            else:
+                espera = (1 - fichas) / self.recarga_s
+            self._cubetas[clave] = (fichas, ahora)
+            while len(self._cubetas) > self.max_claves:
+                self._cubetas.popitem(last=False)
+            return espera
+
+
+def limitadores_login() -> tuple[LimitadorIntentos, LimitadorIntentos]:
+    """(por cuenta, por IP) con los límites LOGIN_INTENTOS_*; cada servicio tiene los suyos."""
+    por_cuenta = LimitadorIntentos(
+        capacidad=int(os.getenv("LOGIN_INTENTOS_CUENTA", "5")),
+        por_minuto=float(os.getenv("LOGIN_INTENTOS_CUENTA_MIN", "5")),
+    )
+    # Un edificio puede salir a internet por una sola IP
+    por_ip = LimitadorIntentos(
+        capacidad=int(os.getenv("LOGIN_INTENTOS_IP", "30")),
+        por_minuto=float(os.getenv("LOGIN_INTENTOS_IP_MIN", "30")),
+    )
+    return por_cuenta, por_ip
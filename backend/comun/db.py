@@ -0,0 +1,93 @@
+# backend/comun/db.py
+"""
+Piezas de app/db.py comunes a los servicios con SQLAlchemy: web,
+parking-availability y licence-plate-recognition.
+
+Los engines y las réplicas son uno por URL en cada proceso (engine_de,
+replica_de): en el modo combinado (backend/combinado) los tres servicios
+comparten pool sin que nadie los reemplace.
+"""
+from typing import Iterator
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+
+from comun.replica import RETRASO_REPLICA, SaludReplica
+
+
+class Replica:
+    """Engine de la réplica de lectura (si hay URL) y su salud (ver comun/replica.py)."""
+
+    def __init__(self, url: str | None, pool_size: int, max_overflow: int):
+        self.engine = None
+        self.Session = None
+        if url:
+            self.engine = create_engine(url, pool_size=pool_size, max_overflow=max_overflow, pool_pre_ping=True)
+            self.Session = sessionmaker(bind=self.engine, autocommit=False, autoflush=False)
+        self.salud = SaludReplica()
+
+    def disponible(self) -> bool:
+        if self.engine is None:
+            return False
+        if self.salud.toca_revisar():
+            try:
+                with self.engine.connect() as conn:
+                    self.salud.medido(conn.execute(text(RETRASO_REPLICA)).scalar())
+            except Exception as e:
+                self.salud.fallo(e)
+        return self.salud.disponible
+
+
+_engines: dict[str, Engine] = {}
+_replicas: dict[str | None, Replica] = {}
+
+
+def engine_de(url: str, pool_size: int, max_overflow: int) -> Engine:
+    """Engine de `url` en este proceso; el primer servicio que lo pide fija el pool. No se conecta."""
+    if url not in _engines:
+        _engines[url] = create_engine(url, pool_size=pool_size, max_overflow=max_overflow)
+    return _engines[url]
+
+
+def replica_de(url: str | None, pool_size: int, max_overflow: int) -> Replica:
+    """Como engine_de, para la réplica: una revisión del retraso por proceso."""
+    if url not in _replicas:
+        _replicas[url] = Replica(url, pool_size, max_overflow)
+    return _replicas[url]
+
+
+def sesion_lectura(SessionLocal: sessionmaker, replica: Replica) -> Iterator[Session]:
+    """
+    Para la dependencia get_db_lectura de cada servicio: sesión en la réplica
+    si está al día, si no en el primario. Si la réplica falla a mitad del
+    request, ese request falla y los siguientes van al primario.
+    """
+    db = replica.Session() if replica.disponible() else SessionLocal()
+    try:
+        yield db
+    except OperationalError as e:
+        if db.get_bind() is replica.engine:
+            replica.salud.fallo(e)
+        raise
+    finally:
+        db.close()
+
+
+def calentar(engine: Engine, pool_size: int, consultas: tuple[str, ...] = ()):
+    """
+    Abre las `pool_size` conexiones del pool y ejecuta en cada una las
+    consultas de `consultas`, para que el primer request no pague la conexión
+    ni la carga del catálogo y los planes de esas consultas.
+    """
+    conexiones = []
+    try:
+        for _ in range(pool_size):
+            conexiones.append(engine.connect())
+        for conn in conexiones:
+            for sql in consultas:
+                conn.execute(text(sql)).fetchall()
+    finally:
+        for conn in conexiones:
+            conn.close()
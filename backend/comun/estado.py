@@ -0,0 +1,136 @@
+# backend/comun/estado.py
+"""
+Estado canónico de los estacionamientos (migración 008_estado_estacionamiento.sql)
+para los servicios con SQLAlchemy: web y parking-availability. mobile usa
+asyncpg y tiene su propia versión en app/estado.py.
+
+La base recalcula el estado de cada estacionamiento una vez por cambio y
+avisa por NOTIFY estado_estacionamiento. El servicio guarda la última
+lectura en memoria y solo vuelve a consultar cuando llega un aviso. Mientras
+no está escuchando (arranque o conexión caída) cada lectura va a la base.
+
+Hay un estado por engine en cada proceso (estado_de): en el modo combinado
+web y parking-availability comparten engine, y con él la lectura en memoria
+y la escucha.
+
+A diferencia de estacionamiento_estado (lectura cruda del sensor, con
+2 = pendiente), aquí 2 significa reservado.
+"""
+import select
+import threading
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+CANAL = "estado_estacionamiento"
+CONSULTA = "SELECT * FROM estado_estacionamiento_actual()"
+ETIQUETAS = {0: "libre", 1: "ocupado", 2: "reservado", 3: "desconocido"}
+# Sensor sin latido (migración 010): no cuenta como libre ni como ocupado
+ESTADO_DESCONOCIDO = 3
+ESPERA_S = 5
+REINTENTO_S = 5
+
+
+class EstadoEstacionamientos:
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self._lock = threading.Lock()
+        self._actual: dict | None = None
+        self._escuchando = False
+        self._detener = threading.Event()
+        # Servicios que llamaron iniciar() sin su detener()
+        self._usuarios = 0
+
+    def leer(self) -> dict:
+        """
+        {"version", "estados": [{"id", "estado", "estado_label", "desde"}],
+         "reservas_sin_asignar"}
+        """
+        actual = self._actual
+        if actual is not None:
+            return actual
+        with self._lock:
+            if self._actual is not None:
+                return self._actual
+            actual = self._consultar()
+            # Un aviso que llegue durante la consulta espera el lock y la descarta
+            if self._escuchando:
+                self._actual = actual
+            return actual
+
+    def _consultar(self) -> dict:
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(CONSULTA)).mappings().all()
+        return {
+            "version": rows[0]["version"] if rows else None,
+            "estados": [
+                {
+                    "id": r["id_estacionamiento"],
+                    "estado": r["estado"],
+                    "estado_label": ETIQUETAS.get(r["estado"], "desconocido"),
+                    "desde": r["desde"],
+                }
+                for r in rows
+            ],
+            "reservas_sin_asignar": rows[0]["reservas_sin_asignar"] if rows else 0,
+        }
+
+    def _invalidar(self):
+        with self._lock:
+            self._actual = None
+
+    def _conectar(self):
+        """Conexión del driver fuera del pool: la escucha la ocupa mientras el servicio vive."""
+        cargs, cparams = self.engine.dialect.create_connect_args(self.engine.url)
+        return self.engine.dialect.connect(*cargs, **cparams)
+
+    def _escuchar(self):
+        while not self._detener.is_set():
+            pg = None
+            try:
+                pg = self._conectar()
+                pg.autocommit = True
+                pg.cursor().execute(f"LISTEN {CANAL}")
+                # Lo leído antes de escuchar pudo perder avisos
+                self._invalidar()
+                self._escuchando = True
+                while not self._detener.is_set():
+                    if select.select([pg], [], [], ESPERA_S) == ([], [], []):
+                        continue
+                    pg.poll()
+                    if pg.notifies:
+                        pg.notifies.clear()
+                        self._invalidar()
+            except Exception as e:
+                print(f"⚠️ Se perdió la escucha de {CANAL}: {e}")
+                self._detener.wait(REINTENTO_S)
+            finally:
+                self._escuchando = False
+                self._invalidar()
+                if pg is not None:
+                    pg.close()
+
+    def iniciar(self):
+        """Cada servicio que lo comparte llama iniciar() y detener(); escucha uno solo."""
+        with self._lock:
+            self._usuarios += 1
+            if self._usuarios > 1:
+                return
+        self._detener.clear()
+        threading.Thread(target=self._escuchar, name="estado-estacionamientos", daemon=True).start()
+
+    def detener(self):
+        with self._lock:
+            self._usuarios -= 1
+            if self._usuarios > 0:
+                return
+        self._detener.set()
+
+
+_estados: dict[Engine, EstadoEstacionamientos] = {}
+
+
+def estado_de(engine: Engine) -> EstadoEstacionamientos:
+    if engine not in _estados:
+        _estados[engine] = EstadoEstacionamientos(engine)
+    return _estados[engine]
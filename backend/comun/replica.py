@@ -0,0 +1,83 @@
+# backend/comun/replica.py
+"""
+Réplica de lectura opcional (DATABASE_URL_REPLICA) para los endpoints de
+reportes y listados: se lee de ella si responde y su retraso no pasa de
+REPLICA_RETRASO_MAX_S segundos (5 por defecto), si no del primario.
+
+El retraso se mide en la réplica con RETRASO_REPLICA. Sin permiso para leer
+pg_stat_wal_receiver (pg_read_all_stats) una réplica sin escrituras
+recientes del primario se ve atrasada y se lee del primario, que es el lado
+seguro.
+
+El pool de la réplica sale del mismo DB_POOL_SIZE (ver repartir_pool), así
+que activarla no agrega conexiones al presupuesto de comun/servidor.py.
+
+Aquí solo está la decisión, sin driver: comun/db.py la usa con SQLAlchemy y
+mobile (app/db.py) con asyncpg.
+"""
+import os
+import threading
+import time
+
+REPLICA_REVISION_S = 1.0
+REPLICA_REINTENTO_S = 30.0
+
+RETRASO_REPLICA = """
+  SELECT CASE
+           WHEN NOT pg_is_in_recovery() THEN 0
+           WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+                AND EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN 0
+           ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+         END
+"""
+
+
+def repartir_pool(pool_size: int, url_replica: str | None) -> tuple[int, int]:
+    """(primario, réplica) dentro de `pool_size`: con réplica, la mitad es para ella."""
+    if not url_replica:
+        return pool_size, 0
+    replica = max(1, pool_size // 2)
+    return max(1, pool_size - replica), replica
+
+
+class SaludReplica:
+    """
+    Si la réplica está al día. El retraso se revisa a lo más cada
+    REPLICA_REVISION_S; una réplica que falla se vuelve a probar después de
+    REPLICA_REINTENTO_S.
+
+        if salud.toca_revisar():
+            try:
+                salud.medido(<RETRASO_REPLICA en la réplica>)
+            except <error del driver> as e:
+                salud.fallo(e)
+        if salud.disponible: ...
+    """
+
+    def __init__(self):
+        self.retraso_max_s = float(os.getenv("REPLICA_RETRASO_MAX_S", "5"))
+        self.disponible = False
+        self._proxima_revision = 0.0
+        self._lock = threading.Lock()
+
+    def toca_revisar(self) -> bool:
+        """True para una sola llamada por intervalo: esa mide, las demás usan el resultado anterior."""
+        if time.monotonic() < self._proxima_revision:
+            return False
+        with self._lock:
+            ahora = time.monotonic()
+            if ahora < self._proxima_revision:
+                return False
+            self._proxima_revision = ahora + REPLICA_REVISION_S
+            return True
+
+    def medido(self, retraso: float | None):
+        disponible = retraso is not None and retraso <= self.retraso_max_s
+        if disponible != self.disponible:
+            print(f"{'✅ Leyendo de la réplica' if disponible else '⚠️ Réplica atrasada'} (retraso {retraso} s)")
+        self.disponible = disponible
+
+    def fallo(self, error: Exception):
+        print(f"⚠️ Réplica no disponible, se lee del primario: {error}")
+        self.disponible = False
+        self._proxima_revision = time.monotonic() + REPLICA_REINTENTO_S
@@ -0,0 +1,63 @@
+# backend/comun/respuestas.py
+"""
+Respuestas JSON serializadas con orjson, para los listados y las vistas del
+estado canónico de web, parking-availability y mobile.
+
+Lo que devuelve una ruta sin response_model pasa por jsonable_encoder (que
+recorre y copia cada fila) y luego por json.dumps. Una ruta que devuelve una
+RespuestaJSON se salta los dos pasos: orjson escribe las filas tal como
+vienen de la base, con datetime, date y UUID en el mismo ISO 8601 de
+isoformat() y Decimal como lo deja FastAPI (int o float).
+
+Las vistas que solo cambian con la versión del estado canónico guardan los
+bytes ya serializados en un CacheRespuesta.
+"""
+from decimal import Decimal
+from typing import Any, Callable, Iterable, Sequence
+
+import orjson
+from fastapi.responses import Response
+
+
+def _por_defecto(valor):
+    if isinstance(valor, Decimal):
+        return int(valor) if valor.as_tuple().exponent >= 0 else float(valor)
+    raise TypeError(f"{type(valor).__name__} no es serializable a JSON")
+
+
+def a_json(contenido: Any) -> bytes:
+    return orjson.dumps(contenido, default=_por_defecto)
+
+
+class RespuestaJSON(Response):
+    """JSONResponse con orjson; acepta también bytes ya serializados."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return a_json(content)
+
+
+def objetos(columnas: Sequence[str], filas: Iterable[Sequence]) -> list[dict]:
+    """Filas (tuplas) de una consulta como objetos JSON con `columnas` por llave."""
+    return [dict(zip(columnas, fila)) for fila in filas]
+
+
+class CacheRespuesta:
+    """
+    Último cuerpo serializado de una vista, válido mientras no cambie la
+    versión de la que depende.
+    """
+
+    def __init__(self):
+        self._guardado: tuple[Any, bytes] | None = None
+
+    def obtener(self, version: Any, construir: Callable[[], Any]) -> RespuestaJSON:
+        guardado = self._guardado
+        if guardado is None or guardado[0] != version or version is None:
+            # Dos requests simultáneos pueden serializar ambos; el resultado es el mismo
+            guardado = (version, a_json(construir()))
+            self._guardado = guardado
+        return RespuestaJSON(guardado[1])
@@ -0,0 +1,94 @@
+# backend/comun/servidor.py
+"""
+Arranque de producción de los servicios (el Dockerfile de cada uno lo usa
+como CMD), desde el directorio del servicio:
+
+    python -m comun.servidor [--conexiones-propias N]
+
+- SERVIDOR_WORKERS procesos uvicorn. Por defecto uno por núcleo disponible,
+  o menos si DB_CONEXIONES no alcanza para todos.
+- Loop uvloop y parser httptools cuando están instalados (vienen con
+  uvicorn[standard]); SERVIDOR_LOOP / SERVIDOR_HTTP los fuerzan.
+- DB_CONEXIONES es el total de conexiones a la base del servicio, sumando
+  todos sus workers. Cada worker abre `--conexiones-propias` fuera del pool
+  (la escucha del estado canónico en web, parking-availability y mobile) y
+  el resto de su parte va al pool, DB_POOL_SIZE, que no crece: los engines
+  de SQLAlchemy reciben DB_MAX_OVERFLOW=0 y el pool de asyncpg de mobile
+  tiene tamaño fijo. Con DATABASE_URL_REPLICA el pool de cada worker se
+  reparte entre el primario y la réplica (comun/replica.py): la réplica no
+  suma conexiones al presupuesto.
+- Si la parte de cada worker no cubre sus conexiones propias más
+  MIN_POOL conexiones de pool (y una para la réplica, si hay), el servicio
+  no arranca: se deben bajar SERVIDOR_WORKERS o subir DB_CONEXIONES.
+- Cada worker abre y calienta su pool en el startup (app/main.py); uvicorn no
+  le pasa conexiones hasta que el startup termina.
+- Con SIGTERM se dejan de aceptar conexiones y los requests en curso tienen
+  SERVIDOR_GRACIA_S segundos para terminar.
+
+Para desarrollo sigue sirviendo `uvicorn app.main:app --reload`.
+"""
+import argparse
+import os
+
+import uvicorn
+
+# Un request y una tarea de fondo (vencimiento, fotos del historial) a la vez
+MIN_POOL = 2
+
+
+def nucleos() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def repartir(conexiones: int, workers: int | None, propias: int, replica: bool = False) -> tuple[int, int]:
+    """(workers, tamaño del pool de cada uno) dentro de `conexiones`."""
+    pool_minimo = MIN_POOL + 1 if replica else MIN_POOL
+    por_worker = propias + pool_minimo
+    if workers is None:
+        workers = min(nucleos(), conexiones // por_worker)
+        if workers == 0:
+            raise SystemExit(
+                f"❌ DB_CONEXIONES={conexiones} no alcanza para un worker ({por_worker} conexiones)"
+            )
+    elif conexiones // workers < por_worker:
+        raise SystemExit(
+            f"❌ DB_CONEXIONES={conexiones} no alcanza para {workers} workers de {por_worker} conexiones "
+            f"({propias} propias + {pool_minimo} de pool): baja SERVIDOR_WORKERS o sube DB_CONEXIONES"
+        )
+    return workers, conexiones // workers - propias
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor de producción del servicio")
+    parser.add_argument("--conexiones-propias", type=int, default=0,
+                        help="conexiones a la base que cada worker abre fuera del pool")
+    args = parser.parse_args()
+
+    workers, pool = repartir(
+        int(os.getenv("DB_CONEXIONES", "20")),
+        int(os.getenv("SERVIDOR_WORKERS", "0")) or None,
+        args.conexiones_propias,
+        bool(os.getenv("DATABASE_URL_REPLICA")),
+    )
+    # Los workers heredan el entorno
+    os.environ["DB_POOL_SIZE"] = str(pool)
+    os.environ["DB_MAX_OVERFLOW"] = "0"
+    print(f"🚀 {workers} workers, pool de {pool} conexiones (+{args.conexiones_propias} propias) cada uno")
+
+    uvicorn.run(
+        "app.main:app",
+        host=os.getenv("SERVIDOR_HOST", "0.0.0.0"),
+        port=int(os.getenv("SERVIDOR_PUERTO", "8000")),
+        workers=workers,
+        loop=os.getenv("SERVIDOR_LOOP", "auto"),
+        http=os.getenv("SERVIDOR_HTTP", "auto"),
+        timeout_graceful_shutdown=int(os.getenv("SERVIDOR_GRACIA_S", "20")),
+        access_log=os.getenv("SERVIDOR_ACCESS_LOG", "1") == "1",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# backend/comun/tokens.py
+"""
+Cache de JWT ya verificados, para web y mobile: el dashboard y la app
+consultan seguido con el mismo token y así no se vuelve a verificar la
+firma en cada request.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokensVerificados:
+    """
+    LRU acotado: digest del token -> (exp, claims). Solo entran tokens cuya
+    firma ya se verificó, y cada entrada vale hasta el `exp` del token, así
+    que un acierto equivale a volver a decodificarlo. Los tokens sin `exp`
+    no se guardan.
+
+    Con lock: en web las rutas síncronas verifican desde el threadpool; en
+    mobile (async) un lock sin competencia casi no cuesta.
+    """
+
+    def __init__(self, capacidad: int):
+        self.capacidad = capacidad
+        self._tokens: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _clave(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def obtener(self, token: str) -> dict | None:
+        clave = self._clave(token)
+        with self._lock:
+            entrada = self._tokens.get(clave)
+            if entrada is None:
+                return None
+            if time.time() >= entrada[0]:
+                del self._tokens[clave]
+                return None
+            self._tokens.move_to_end(clave)
+            return entrada[1]
+
+    def guardar(self, token: str, claims: dict) -> None:
+        exp = claims.get("exp")
+        if not isinstance(exp, (int, float)) or self.capacidad <= 0:
+            return
+        clave = self._clave(token)
+        with self._lock:
+            self._tokens[clave] = (exp, claims)
+            self._tokens.move_to_end(clave)
+            while len(self._tokens) > self.capacidad:
+                self._tokens.popitem(last=False)
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._tokens.clear()
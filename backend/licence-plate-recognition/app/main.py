@@ -1,4 +1,6 @@
 from fastapi import FastAPI
+from app.db import SessionLocal, calentar
+from app.particiones import asegurar_particiones
 from app.routers import router
 
 app = FastAPI(title="Backend Licence Plate Recognition API")
@@ -6,6 +8,27 @@ app = FastAPI(title="Backend Licence Plate Recognition API")
 # Incluir rutas
 app.include_router(router)
 
+
+@app.on_event("startup")
+def calentar_conexiones():
+    # Antes de recibir tráfico (ver comun/servidor.py): conexiones abiertas y
+    # el catálogo de las tablas que consulta la portería ya cargado
+    calentar(("SELECT 1 FROM vehiculo LIMIT 1", "SELECT 1 FROM reserva LIMIT 1"))
+
+
+@app.on_event("startup")
+def crear_particiones():
+    # Particiones del mes actual y siguientes; sin ellas los eventos caen en
+    # la partición por defecto, así que un error aquí no impide partir.
+    db = SessionLocal()
+    try:
+        asegurar_particiones(db)
+    except Exception as e:
+        print(f"⚠️ No se pudieron crear las particiones de eventos: {e}")
+    finally:
+        db.close()
+
+
 @app.get("/")
 def root():
     return {"message": "API Web funcionando 🚀"}
@@ -0,0 +1,177 @@
+"""
+Mantención de las particiones mensuales de registro_evento_acceso
+(migración 004_particion_registro_acceso.sql).
+
+- asegurar_particiones: crea la partición del mes actual y de los siguientes.
+  La app la ejecuta al partir; si igual falta un mes, sus filas caen en la
+  partición por defecto y se mueven al crearlo.
+- archivar_particiones: exporta a Parquet (zstd) los meses más antiguos que
+  la retención y luego los separa y elimina de la base de datos.
+
+Pensado para correr a diario (cron) dentro del contenedor:
+
+    python -m app.particiones --retencion-meses 24 --destino /archivo/eventos
+
+Archivar requiere `pyarrow`.
+"""
+import argparse
+import os
+import re
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.db import SessionLocal
+
+TABLA = "registro_evento_acceso"
+PATRON_PARTICION = re.compile(rf"^{TABLA}_(\d{{4}})_(\d{{2}})$")
+FILAS_POR_GRUPO = 50_000
+
+# Columnas que se archivan, con su tipo en Parquet
+COLUMNAS = [
+    ("id", "int64"),
+    ("hora", "timestamp"),
+    ("tipo", "int32"),
+    ("metodo", "int32"),
+    ("placa_detectada", "string"),
+    ("placa_patente_vehiculo", "string"),
+    ("id_reserva", "int32"),
+    ("clave_idempotencia", "string"),
+]
+
+
+def sumar_meses(mes: date, n: int) -> date:
+    total = mes.year * 12 + mes.month - 1 + n
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def mes_actual() -> date:
+    hoy = datetime.now(timezone.utc).date()
+    return hoy.replace(day=1)
+
+
+def asegurar_particiones(db: Session, meses_adelante: int = 2) -> list[str]:
+    """
+    Crea (si faltan) las particiones del mes actual y los `meses_adelante`
+    siguientes, y las de los meses que tengan filas en la partición por
+    defecto (p. ej. eventos atrasados de un mes ya sin partición).
+    """
+    inicio = mes_actual()
+    meses = {sumar_meses(inicio, i) for i in range(meses_adelante + 1)}
+    meses.update(db.execute(text(f"""
+        SELECT DISTINCT CAST(date_trunc('month', hora AT TIME ZONE 'UTC') AS date)
+        FROM {TABLA}_default
+    """)).scalars())
+
+    nombres = [
+        db.execute(text("SELECT registro_evento_acceso_asegurar_particion(:mes)"), {"mes": mes}).scalar()
+        for mes in sorted(meses)
+    ]
+    db.commit()
+    return nombres
+
+
+def listar_particiones(db: Session) -> list[tuple[str, date]]:
+    """Particiones mensuales existentes (sin la por defecto), de la más antigua a la más nueva."""
+    rows = db.execute(text("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:tabla AS regclass)
+    """), {"tabla": TABLA}).scalars()
+
+    particiones = []
+    for nombre in rows:
+        m = PATRON_PARTICION.match(nombre)
+        if m:
+            particiones.append((nombre, date(int(m.group(1)), int(m.group(2)), 1)))
+    return sorted(particiones, key=lambda p: p[1])
+
+
+def exportar_parquet(db: Session, particion: str, path: str) -> int:
+    """Escribe la partición completa en `path` y devuelve la cantidad de filas."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Archivar particiones requiere pyarrow (pip install pyarrow)") from e
+
+    tipos = {
+        "int32": pa.int32(),
+        "int64": pa.int64(),
+        "string": pa.string(),
+        "timestamp": pa.timestamp("us", tz="UTC"),
+    }
+    esquema = pa.schema([(nombre, tipos[tipo]) for nombre, tipo in COLUMNAS])
+    columnas = ", ".join(
+        f"CAST({nombre} AS text) AS {nombre}" if nombre == "clave_idempotencia" else nombre
+        for nombre, _ in COLUMNAS
+    )
+
+    # Se escribe a un temporal: un archivo con el nombre final siempre está completo
+    temporal = path + ".tmp"
+    total = 0
+    resultado = db.connection().execution_options(stream_results=True).execute(
+        text(f'SELECT {columnas} FROM "{particion}" ORDER BY hora')
+    )
+    with pq.ParquetWriter(temporal, esquema, compression="zstd") as writer:
+        for filas in resultado.partitions(FILAS_POR_GRUPO):
+            lote = {nombre: [getattr(f, nombre) for f in filas] for nombre, _ in COLUMNAS}
+            writer.write_table(pa.Table.from_pydict(lote, schema=esquema))
+            total += len(filas)
+    with open(temporal, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(temporal, path)
+    return total
+
+
+def archivar_particiones(db: Session, retencion_meses: int, destino: str) -> list[dict]:
+    """
+    Archiva y elimina las particiones de meses anteriores a
+    `mes actual - retencion_meses`. Una partición solo se elimina después de
+    que su archivo Parquet quedó escrito en disco.
+    """
+    os.makedirs(destino, exist_ok=True)
+    limite = sumar_meses(mes_actual(), -retencion_meses)
+    archivadas = []
+    for particion, mes in listar_particiones(db):
+        if mes >= limite:
+            break
+        path = os.path.join(destino, f"{particion}.parquet")
+        filas = exportar_parquet(db, particion, path)
+        db.commit()
+
+        db.execute(text(f'ALTER TABLE {TABLA} DETACH PARTITION "{particion}"'))
+        db.execute(text(f'DROP TABLE "{particion}"'))
+        db.commit()
+        archivadas.append({"particion": particion, "filas": filas, "archivo": path})
+    return archivadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mantención de particiones de registro_evento_acceso")
+    parser.add_argument("--meses-adelante", type=int, default=2, help="Meses futuros a crear por adelantado")
+    parser.add_argument(
+        "--retencion-meses", type=int, default=int(os.getenv("RETENCION_EVENTOS_MESES", "0")),
+        help="Meses que se mantienen en la base de datos (0 = no archivar)",
+    )
+    parser.add_argument(
+        "--destino", default=os.getenv("ARCHIVO_EVENTOS_DIR", "archivo_eventos"),
+        help="Directorio de los archivos Parquet",
+    )
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        for nombre in asegurar_particiones(db, args.meses_adelante):
+            print(f"✅ {nombre}")
+        if args.retencion_meses > 0:
+            for a in archivar_particiones(db, args.retencion_meses, args.destino):
+                print(f"📦 {a['particion']}: {a['filas']} filas -> {a['archivo']}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
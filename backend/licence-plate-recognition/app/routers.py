@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from app.db import SessionLocal
+from app.db import SessionLocal, get_db_lectura
 from app.models import Usuario
 
 from fastapi import APIRouter, Depends, HTTPException
@@ -8,6 +8,9 @@ from sqlalchemy.orm import Session
 from app.db import SessionLocal
 from sqlalchemy import text
 from typing import Dict, Any
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+from pydantic import BaseModel
 
 router = APIRouter()
 
@@ -121,6 +124,114 @@ def verificar_patente(patente: str, tipo_vehiculo: int, db: Session = Depends(ge
 
 
 
+# Si el cliente está atrasado en más de esta cantidad de cambios se le
+# envía la lista completa en vez del delta
+MAX_CAMBIOS_DELTA = 5000
+
+
+@router.get("/autorizados")
+def listar_autorizados(
+    version: int | None = None,
+    hasta: datetime | None = None,
+    horizonte_horas: int = 12,
+    db: Session = Depends(get_db_lectura),
+):
+    """
+    Lista compacta y versionada de patentes autorizadas para que el cliente
+    de cámaras decida localmente: vehículos residentes y reservas de
+    visitantes vigentes o que comienzan dentro de `horizonte_horas`.
+
+    - Sin `version` (o si el cliente quedó demasiado atrás) devuelve la
+      lista completa (`completo = true`).
+    - Con `version` y `hasta` (ambos devueltos por la llamada anterior)
+      devuelve solo las patentes que cambiaron desde esa versión o que tienen
+      reservas que entraron al horizonte desde `hasta`, cada una con todas sus
+      entradas. Una patente con lista vacía ya no está autorizada.
+    """
+    try:
+        # La versión se lee antes que los datos: un cambio concurrente puede
+        # llegar dos veces, pero nunca perderse.
+        version_actual, version_minima = db.execute(text("""
+            SELECT COALESCE(MAX(version), 0), COALESCE(MIN(version), 0)
+            FROM autorizados_cambio
+        """)).fetchone()
+        nuevo_hasta = datetime.now(timezone.utc) + timedelta(hours=horizonte_horas)
+
+        patentes = None
+        if version is not None and hasta and version >= version_minima - 1:
+            patentes = [
+                r.patente
+                for r in db.execute(text("""
+                    SELECT DISTINCT patente
+                    FROM autorizados_cambio
+                    WHERE version > :version
+                    LIMIT :limite
+                """), {"version": version, "limite": MAX_CAMBIOS_DELTA + 1})
+            ]
+            # Patentes con reservas que entraron al horizonte: se envían
+            # completas, porque el cliente reemplaza todas las entradas de
+            # cada patente que recibe (residente y otras reservas incluidas)
+            patentes = list(set(patentes).union(
+                r.placa_patente_visitante
+                for r in db.execute(text("""
+                    SELECT DISTINCT r.placa_patente_visitante
+                    FROM reserva r
+                    WHERE r.estado_reserva = 0
+                    AND r.hora_termino >= NOW()
+                    AND r.hora_inicio > :hasta_anterior
+                    AND r.hora_inicio <= :hasta
+                    AND r.placa_patente_visitante IS NOT NULL
+                """), {"hasta_anterior": hasta, "hasta": nuevo_hasta})
+            ))
+            if len(patentes) > MAX_CAMBIOS_DELTA:
+                patentes = None
+
+        completo = patentes is None
+        filtro_vehiculo = "" if completo else "WHERE v.placa_patente = ANY(:patentes)"
+        filtro_reserva = "" if completo else "AND r.placa_patente_visitante = ANY(:patentes)"
+        params = {"patentes": patentes, "hasta": nuevo_hasta}
+
+        autorizados: Dict[str, list] = {p: [] for p in patentes or []}
+
+        for v in db.execute(text(f"""
+            SELECT v.placa_patente, v.tipo_vehiculo, v.id_departamento
+            FROM vehiculo v
+            {filtro_vehiculo}
+        """), params):
+            autorizados.setdefault(v.placa_patente, []).append({
+                "tipo": "residente",
+                "tipo_vehiculo": v.tipo_vehiculo,
+                "departamento": v.id_departamento,
+            })
+
+        for r in db.execute(text(f"""
+            SELECT r.id, r.placa_patente_visitante, r.id_departamento, r.hora_inicio, r.hora_termino
+            FROM reserva r
+            WHERE r.estado_reserva = 0
+            AND r.hora_termino >= NOW()
+            AND r.hora_inicio <= :hasta
+            AND r.placa_patente_visitante IS NOT NULL
+            {filtro_reserva}
+        """), params):
+            autorizados.setdefault(r.placa_patente_visitante, []).append({
+                "tipo": "visitante",
+                "id_reserva": r.id,
+                "departamento": r.id_departamento,
+                "desde": r.hora_inicio.isoformat(),
+                "hasta": r.hora_termino.isoformat(),
+            })
+
+        return {
+            "version": version_actual,
+            "hasta": nuevo_hasta.isoformat(),
+            "completo": completo,
+            "autorizados": autorizados,
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al listar autorizados: {str(e)}")
+
+
 @router.post("/registrar-ingreso-residente/{patente}")
 def registrar_ingreso_residente(
     patente: str, 
@@ -234,4 +345,227 @@ def registrar_ingreso_visitante(
         raise
     except Exception as e:
         db.rollback()
-        raise HTTPException(status_code=500, detail=f"Error al registrar ingreso visitante: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error al registrar ingreso visitante: {str(e)}")
+
+
+def insertar_salida(db: Session, patente: str, hora: datetime | None = None, clave: str | None = None):
+    """
+    Inserta un evento de SALIDA (tipo 1). La estadía abierta de la patente se
+    busca por el índice parcial de estadías abiertas y la cierra el trigger
+    de registro_evento_acceso. Devuelve (registro, estadía) o (None, estadía)
+    si la clave de idempotencia ya estaba registrada.
+    """
+    estadia = db.execute(text("""
+        SELECT id, hora_ingreso, placa_patente_vehiculo, id_reserva
+        FROM estadia
+        WHERE patente = :patente AND abierta
+    """), {"patente": patente}).fetchone()
+
+    if estadia:
+        placa_vehiculo, id_reserva = estadia.placa_patente_vehiculo, estadia.id_reserva
+    else:
+        # Salida sin ingreso registrado: se asocia al residente si existe
+        placa_vehiculo = db.execute(
+            text("SELECT placa_patente FROM vehiculo WHERE placa_patente = :patente"),
+            {"patente": patente},
+        ).scalar()
+        id_reserva = None
+
+    registro = db.execute(text("""
+        INSERT INTO registro_evento_acceso
+        (hora, tipo, metodo, placa_detectada, id_reserva, placa_patente_vehiculo, clave_idempotencia)
+        VALUES (COALESCE(CAST(:hora AS timestamptz), NOW()), 1, :metodo, :patente, :id_reserva, :placa, CAST(:clave AS uuid))
+        ON CONFLICT (clave_idempotencia, hora) DO NOTHING
+        RETURNING id, hora
+    """), {
+        "hora": hora,
+        "metodo": 0 if placa_vehiculo else 1,
+        "patente": patente,
+        "id_reserva": id_reserva,
+        "placa": placa_vehiculo,
+        "clave": clave,
+    }).fetchone()
+    return registro, estadia
+
+
+@router.post("/registrar-salida/{patente}")
+def registrar_salida(patente: str, db: Session = Depends(get_db)):
+    """
+    Registra la SALIDA de un vehículo en registro_evento_acceso y cierra su
+    estadía abierta (si tenía un ingreso registrado).
+    """
+    try:
+        registro, estadia = insertar_salida(db, patente)
+        db.commit()
+
+        datos_estadia = None
+        if estadia:
+            datos_estadia = {
+                "id_estadia": estadia.id,
+                "hora_ingreso": estadia.hora_ingreso.isoformat(),
+                "hora_salida": registro.hora.isoformat(),
+                "duracion_minutos": round((registro.hora - estadia.hora_ingreso).total_seconds() / 60, 1),
+            }
+
+        return {
+            "success": True,
+            "id_registro": registro.id,
+            "estadia": datos_estadia,
+            "mensaje": f"Vehículo {patente} salió"
+                       + ("" if estadia else " (sin ingreso registrado)"),
+        }
+
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error al registrar salida: {str(e)}")
+
+
+class EventoAcceso(BaseModel):
+    clave: UUID              # clave de idempotencia generada por el cliente
+    evento: str = "ingreso"  # "ingreso" | "salida"
+    patente: str
+    tipo: str | None = None  # "residente" | "visitante" (solo ingresos)
+    hora: datetime           # hora real del evento (no la del envío)
+
+
+class LoteEventos(BaseModel):
+    eventos: list[EventoAcceso]
+
+
+def _insertar_ingresos(db: Session, filas: list, resultados: Dict[str, Dict[str, Any]]):
+    """Inserta en una sola sentencia los ingresos ya validados (evento, método, reserva, placa)."""
+    if not filas:
+        return
+    insertados = db.execute(text("""
+        INSERT INTO registro_evento_acceso
+        (hora, tipo, metodo, placa_detectada, id_reserva, placa_patente_vehiculo, clave_idempotencia)
+        SELECT e.hora, 0, e.metodo, e.patente, e.id_reserva, e.placa_vehiculo, e.clave
+        FROM unnest(
+            CAST(:horas AS timestamptz[]), CAST(:metodos AS int[]), CAST(:patentes AS text[]),
+            CAST(:reservas AS int[]), CAST(:placas AS text[]), CAST(:claves AS uuid[])
+        ) AS e(hora, metodo, patente, id_reserva, placa_vehiculo, clave)
+        ON CONFLICT (clave_idempotencia, hora) DO NOTHING
+        RETURNING id, clave_idempotencia
+    """), {
+        "horas": [e.hora for e, _, _, _ in filas],
+        "metodos": [metodo for _, metodo, _, _ in filas],
+        "patentes": [e.patente for e, _, _, _ in filas],
+        "reservas": [id_reserva for _, _, id_reserva, _ in filas],
+        "placas": [placa for _, _, _, placa in filas],
+        "claves": [str(e.clave) for e, _, _, _ in filas],
+    }).fetchall()
+
+    ids = {str(r.clave_idempotencia): r.id for r in insertados}
+    for e, _, _, _ in filas:
+        clave = str(e.clave)
+        if clave in ids:
+            resultados[clave] = {"estado": "registrado", "id_registro": ids[clave]}
+        else:
+            resultados[clave] = {"estado": "duplicado"}
+
+
+@router.post("/registrar-eventos")
+def registrar_eventos(lote: LoteEventos, db: Session = Depends(get_db)):
+    """
+    Registra en bloque los INGRESOS y SALIDAS encolados por el cliente de cámaras.
+
+    Cada evento trae una clave de idempotencia: si ya fue registrado antes
+    (p. ej. el cliente reintenta un lote cuya respuesta se perdió) se informa
+    como "duplicado" y no se inserta otra fila. Los ingresos que no
+    corresponden a un residente o a una reserva vigente a la hora del
+    ingreso se informan como "rechazado".
+
+    Los eventos se registran en orden de hora, sin importar el orden del lote.
+    Los ingresos se validan con dos consultas para todo el lote y cada tramo
+    de ingresos seguidos se inserta en una sola; las salidas (pocas por lote)
+    se registran una a una entre esos tramos.
+    """
+    resultados: Dict[str, Dict[str, Any]] = {}
+    try:
+        ingresos = [e for e in lote.eventos if e.evento == "ingreso"]
+        residentes = [e for e in ingresos if e.tipo == "residente"]
+        visitantes = [e for e in ingresos if e.tipo == "visitante"]
+        for e in lote.eventos:
+            if e.evento not in ("ingreso", "salida"):
+                resultados[str(e.clave)] = {"estado": "rechazado", "mensaje": "Evento inválido"}
+            elif e.evento == "ingreso" and e.tipo not in ("residente", "visitante"):
+                resultados[str(e.clave)] = {"estado": "rechazado", "mensaje": "Tipo de vehículo inválido"}
+
+        vehiculos = set()
+        if residentes:
+            vehiculos = {
+                r.placa_patente
+                for r in db.execute(text("""
+                    SELECT placa_patente
+                    FROM vehiculo
+                    WHERE placa_patente = ANY(:patentes)
+                """), {"patentes": [e.patente for e in residentes]})
+            }
+
+        reservas = {}
+        if visitantes:
+            # Reserva vigente a la hora del ingreso (no a la del envío). No se
+            # filtra por estado activo porque un evento puede llegar después
+            # de que la reserva venció; solo se descartan las canceladas.
+            reservas = {
+                r.clave: r.id_reserva
+                for r in db.execute(text("""
+                    SELECT e.clave, r.id AS id_reserva
+                    FROM unnest(CAST(:claves AS text[]), CAST(:patentes AS text[]), CAST(:horas AS timestamptz[]))
+                         AS e(clave, patente, hora)
+                    JOIN LATERAL (
+                        SELECT r.id
+                        FROM reserva r
+                        WHERE r.placa_patente_visitante = e.patente
+                        AND r.hora_inicio <= e.hora
+                        AND r.hora_termino >= e.hora
+                        AND r.estado_reserva <> 2
+                        ORDER BY r.hora_inicio DESC
+                        LIMIT 1
+                    ) r ON TRUE
+                """), {
+                    "claves": [str(e.clave) for e in visitantes],
+                    "patentes": [e.patente for e in visitantes],
+                    "horas": [e.hora for e in visitantes],
+                })
+            }
+
+        validos = {}
+        for e in residentes:
+            if e.patente in vehiculos:
+                validos[str(e.clave)] = (e, 0, None, e.patente)
+            else:
+                resultados[str(e.clave)] = {"estado": "rechazado", "mensaje": "La patente no corresponde a un vehículo residente"}
+        for e in visitantes:
+            if str(e.clave) in reservas:
+                validos[str(e.clave)] = (e, 1, reservas[str(e.clave)], None)
+            else:
+                resultados[str(e.clave)] = {"estado": "rechazado", "mensaje": "No se encontró una reserva vigente para esta patente"}
+
+        # En orden de hora (a igual hora, salidas primero): la salida de una
+        # reposición offline debe cerrar la estadía anterior antes de que un
+        # ingreso posterior de la misma patente abra otra. Los ingresos
+        # seguidos se insertan juntos.
+        filas = []
+        for e in sorted(lote.eventos, key=lambda e: (e.hora, e.evento != "salida")):
+            clave = str(e.clave)
+            if clave in validos:
+                filas.append(validos[clave])
+            elif e.evento == "salida":
+                _insertar_ingresos(db, filas, resultados)
+                filas = []
+                registro, _ = insertar_salida(db, e.patente, e.hora, clave)
+                resultados[clave] = (
+                    {"estado": "registrado", "id_registro": registro.id} if registro else {"estado": "duplicado"}
+                )
+        _insertar_ingresos(db, filas, resultados)
+
+        db.commit()
+
+        return {
+            "resultados": [{"clave": str(e.clave), **resultados[str(e.clave)]} for e in lote.eventos]
+        }
+
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error al registrar eventos: {str(e)}")
@@ -1,8 +1,11 @@
 import os
 from datetime import datetime, timedelta
-from jose import JWTError, jwt
+
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from jose import JWTError, jwt
+
+from comun.tokens import TokensVerificados
 
 # ==========================
 # CONFIG
@@ -10,6 +13,8 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 SECRET_KEY = os.getenv("SECRET_KEY", "secret-key-change-me")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
+# Tokens ya verificados que se recuerdan (la app consulta seguido con el mismo)
+TOKENS_EN_CACHE = int(os.getenv("TOKENS_EN_CACHE", "4096"))
 
 # Esto reemplaza a OAuth2PasswordBearer
 security = HTTPBearer()
@@ -24,14 +29,22 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+tokens_verificados = TokensVerificados(TOKENS_EN_CACHE)
+
 # ==========================
 # VERIFICAR TOKEN
 # ==========================
+def decodificar_token(token: str) -> dict:
+    """Claims del token; JWTError si la firma o el exp no son válidos."""
+    claims = tokens_verificados.obtener(token)
+    if claims is None:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        tokens_verificados.guardar(token, claims)
+    return claims
+
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Valida el JWT recibido en el header Authorization: Bearer <token>."""
-    token = credentials.credentials
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
+        return decodificar_token(credentials.credentials)
     except JWTError:
         raise HTTPException(status_code=401, detail="Token inválido")
@@ -0,0 +1,44 @@
+# app/credenciales.py
+"""
+Verificación de contraseñas fuera de Postgres y límite de intentos de login.
+
+El login solo trae el hash de la base (por correo) y bcrypt corre en un pool
+acotado de hilos del servicio, así una ráfaga de logins no consume la CPU de
+la base que comparten la portería y los demás servicios. Si ya hay
+LOGIN_EN_ESPERA verificaciones pendientes, el login responde 503 en vez de
+encolar sin límite.
+
+Antes de verificar, cada intento gasta una ficha de la cubeta de la cuenta y
+de la de la IP (token bucket en memoria, por proceso). El hash, la
+verificación y el limitador están en comun/credenciales.py, compartido con
+web.
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from comun.credenciales import MAX_LARGO_CONTRASENA, LoginSaturado, checkpw, es_bcrypt, limitadores_login
+
+HILOS_LOGIN = int(os.getenv("LOGIN_HILOS", "2"))
+LOGIN_EN_ESPERA = int(os.getenv("LOGIN_EN_ESPERA", "32"))
+
+# bcrypt suelta el GIL mientras calcula, así que un pool de hilos basta
+_pool = ThreadPoolExecutor(max_workers=HILOS_LOGIN, thread_name_prefix="bcrypt")
+_pendientes = 0
+
+
+async def verificar_contrasena(contrasena: str, hash_guardado: str) -> bool:
+    """bcrypt.checkpw en el pool de login. El hash debe ser bcrypt (ver es_bcrypt)."""
+    global _pendientes
+    if _pendientes >= LOGIN_EN_ESPERA:
+        raise LoginSaturado()
+    _pendientes += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(
+            _pool, checkpw, contrasena, hash_guardado
+        )
+    finally:
+        _pendientes -= 1
+
+
+intentos_por_cuenta, intentos_por_ip = limitadores_login()
@@ -1,11 +1,100 @@
 # app/db.py
 import os
+
 import asyncpg
 from dotenv import load_dotenv
 
+from comun.replica import RETRASO_REPLICA, SaludReplica, repartir_pool
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Réplica de lectura opcional para los listados (ver get_connection_lectura y
+# comun/replica.py)
+DATABASE_URL_REPLICA = os.getenv("DATABASE_URL_REPLICA")
+# Conexiones de este proceso; comun/servidor.py reparte DB_CONEXIONES entre los
+# workers. Con réplica, parte del pool queda para ella.
+DB_POOL_SIZE, DB_POOL_SIZE_REPLICA = repartir_pool(int(os.getenv("DB_POOL_SIZE", "10")), DATABASE_URL_REPLICA)
 
-async def get_connection():
+_pool: asyncpg.Pool | None = None
+_pool_replica: asyncpg.Pool | None = None
+_salud_replica = SaludReplica()
+# Conexiones prestadas por la réplica, para devolverlas a su pool
+_de_replica = set()
+
+
+async def conectar():
+    """Conexión propia, fuera del pool (p. ej. para LISTEN)."""
     return await asyncpg.connect(DATABASE_URL)
+
+
+async def abrir_pool(calentar: tuple[str, ...] = ()):
+    """
+    Abre el pool con todas sus conexiones y ejecuta en cada una las consultas
+    de `calentar`, que quedan preparadas en su cache de sentencias.
+    """
+    global _pool, _pool_replica
+    _pool = await asyncpg.create_pool(DATABASE_URL, min_size=DB_POOL_SIZE, max_size=DB_POOL_SIZE)
+    if DATABASE_URL_REPLICA:
+        # Sin conexiones al partir: si la réplica no está, el servicio arranca igual
+        _pool_replica = await asyncpg.create_pool(DATABASE_URL_REPLICA, min_size=0, max_size=DB_POOL_SIZE_REPLICA)
+    conexiones = [await _pool.acquire() for _ in range(DB_POOL_SIZE)]
+    try:
+        for conn in conexiones:
+            for sql in calentar:
+                await conn.fetch(sql)
+    finally:
+        for conn in conexiones:
+            await _pool.release(conn)
+
+
+async def cerrar_pool():
+    """Espera que se devuelvan las conexiones en uso y cierra el pool."""
+    global _pool, _pool_replica
+    if _pool_replica is not None:
+        await _pool_replica.close()
+        _pool_replica = None
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+async def get_connection():
+    """Conexión del pool (o una nueva si el pool no está abierto); devolver con liberar()."""
+    if _pool is None:
+        return await conectar()
+    return await _pool.acquire()
+
+
+async def _replica_al_dia() -> bool:
+    if _pool_replica is None:
+        return False
+    if _salud_replica.toca_revisar():
+        try:
+            _salud_replica.medido(await _pool_replica.fetchval(RETRASO_REPLICA))
+        except (OSError, asyncpg.PostgresError) as e:
+            _salud_replica.fallo(e)
+    return _salud_replica.disponible
+
+
+async def get_connection_lectura():
+    """Como get_connection, para consultas de solo lectura: en la réplica si está al día."""
+    if await _replica_al_dia():
+        try:
+            conn = await _pool_replica.acquire()
+        except (OSError, asyncpg.PostgresError) as e:
+            _salud_replica.fallo(e)
+        else:
+            _de_replica.add(conn)
+            return conn
+    return await get_connection()
+
+
+async def liberar(conn):
+    if conn in _de_replica:
+        _de_replica.discard(conn)
+        await _pool_replica.release(conn)
+    elif _pool is not None and isinstance(conn, asyncpg.pool.PoolConnectionProxy):
+        await _pool.release(conn)
+    else:
+        await conn.close()
@@ -0,0 +1,95 @@
+# app/estado.py
+"""
+Estado canónico de los estacionamientos, el mismo que leen el dashboard web
+y parking-availability (migración 008_estado_estacionamiento.sql).
+
+La última lectura queda en memoria hasta el siguiente NOTIFY
+estado_estacionamiento, que escucha una conexión dedicada. Si esa conexión
+se cae, las lecturas van a la base hasta que se restablezca.
+"""
+import asyncio
+
+from app.db import conectar, get_connection, liberar
+
+CANAL = "estado_estacionamiento"
+CONSULTA = "SELECT * FROM estado_estacionamiento_actual()"
+ETIQUETAS = {0: "libre", 1: "ocupado", 2: "reservado", 3: "desconocido"}
+# Sensor sin latido (migración 010): no cuenta como libre ni como ocupado
+ESTADO_DESCONOCIDO = 3
+REINTENTO_S = 5
+
+
+class EstadoEstacionamientos:
+    def __init__(self):
+        self._actual: dict | None = None
+        # Sube con cada aviso; una lectura solo se guarda si no hubo avisos durante ella
+        self._generacion = 0
+        self._escuchando = False
+        self._tarea: asyncio.Task | None = None
+
+    async def leer(self) -> dict:
+        """
+        {"version", "estados": [{"id", "estado", "estado_label"}],
+         "reservas_sin_asignar"}
+        """
+        if self._actual is not None:
+            return self._actual
+
+        generacion = self._generacion
+        conn = await get_connection()
+        try:
+            rows = await conn.fetch(CONSULTA)
+        finally:
+            await liberar(conn)
+
+        actual = {
+            "version": rows[0]["version"] if rows else None,
+            "estados": [
+                {
+                    "id": r["id_estacionamiento"],
+                    "estado": r["estado"],
+                    "estado_label": ETIQUETAS.get(r["estado"], "desconocido"),
+                }
+                for r in rows
+            ],
+            "reservas_sin_asignar": rows[0]["reservas_sin_asignar"] if rows else 0,
+        }
+        if self._escuchando and generacion == self._generacion:
+            self._actual = actual
+        return actual
+
+    def _invalidar(self, *_):
+        self._generacion += 1
+        self._actual = None
+
+    async def _escuchar(self):
+        while True:
+            try:
+                conn = await conectar()
+                perdida = asyncio.Event()
+                conn.add_termination_listener(lambda _: perdida.set())
+                try:
+                    await conn.add_listener(CANAL, self._invalidar)
+                    # Lo leído antes de escuchar pudo perder avisos
+                    self._invalidar()
+                    self._escuchando = True
+                    await perdida.wait()
+                finally:
+                    self._escuchando = False
+                    self._invalidar()
+                    conn.terminate()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Se perdió la escucha de {CANAL}: {e}")
+            await asyncio.sleep(REINTENTO_S)
+
+    def iniciar(self):
+        self._tarea = asyncio.create_task(self._escuchar())
+
+    def detener(self):
+        if self._tarea is not None:
+            self._tarea.cancel()
+
+
+estado_estacionamientos = EstadoEstacionamientos()
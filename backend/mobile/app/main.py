@@ -1,6 +1,8 @@
 from fastapi import FastAPI
 
-from app.db import get_connection
+from app.db import abrir_pool, cerrar_pool
+from app.estado import CONSULTA, estado_estacionamientos
+from comun.respuestas import CacheRespuesta, RespuestaJSON
 from app.routers import auth, vehiculos, reservas, estacionamientos, historial
 
 app = FastAPI(title="Backend Mobile API")
@@ -17,36 +19,39 @@ def root():
     return {"message": "API Mobile funcionando"}
 
 
-@app.get("/disponibilidad")
-async def disponibilidad_publica():
-    """Devuelve el estado de cada estacionamiento para el dashboard publico."""
-    conn = await get_connection()
-
-    rows = await conn.fetch(
-        "SELECT id, ocupado FROM estacionamiento ORDER BY id"
-    )
-    reservas_activas = await conn.fetchval(
-        """
-        SELECT COUNT(*)
-          FROM reserva
-         WHERE estado_reserva = 0
-           AND hora_termino > NOW()
-        """
-    )
-
-    await conn.close()
-
-    reservas_pendientes = int(reservas_activas or 0)
+@app.on_event("startup")
+async def calentar_conexiones():
+    # Antes de recibir tráfico (ver comun/servidor.py): pool abierto con la
+    # consulta del estado ya preparada en cada conexión
+    await abrir_pool(calentar=(CONSULTA,))
+
+
+@app.on_event("startup")
+async def escuchar_estados():
+    estado_estacionamientos.iniciar()
+
+
+@app.on_event("shutdown")
+async def dejar_de_escuchar_estados():
+    estado_estacionamientos.detener()
+
+
+@app.on_event("shutdown")
+async def cerrar_conexiones():
+    await cerrar_pool()
+
+
+_disponibilidad_publica = CacheRespuesta()
+
+
+def _estados_publicos(actual: dict) -> list[dict]:
+    reservas_pendientes = actual["reservas_sin_asignar"]
     data = []
-    for idx, row in enumerate(rows, start=1):
-        ocupado = bool(row["ocupado"])
-        if ocupado:
-            estado = "ocupado"
-        elif reservas_pendientes > 0:
+    for idx, e in enumerate(actual["estados"], start=1):
+        estado = e["estado_label"]
+        if estado == "libre" and reservas_pendientes > 0:
             estado = "reservado"
             reservas_pendientes -= 1
-        else:
-            estado = "libre"
 
         data.append({
             "numero": idx,
@@ -54,3 +59,14 @@ async def disponibilidad_publica():
         })
 
     return data
+
+
+@app.get("/disponibilidad", response_class=RespuestaJSON)
+async def disponibilidad_publica():
+    """
+    Devuelve el estado de cada estacionamiento para el dashboard publico.
+    Las reservas activas aun sin estacionamiento se muestran sobre los
+    primeros libres, porque igual ocupan cupo.
+    """
+    actual = await estado_estacionamientos.leer()
+    return _disponibilidad_publica.obtener(actual["version"], lambda: _estados_publicos(actual))
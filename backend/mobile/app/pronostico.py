@@ -0,0 +1,211 @@
+# app/pronostico.py
+"""
+Pronóstico de estacionamientos libres para la pantalla de disponibilidad.
+
+Aprende un perfil de ocupación por día de la semana y hora (7 x 24) a partir
+de resumen_ocupacion_hora (máximo de ocupados a la vez en cada hora,
+migración 005). Las horas sin cambios mantienen la ocupación de la última
+hora con cambios. Las horas más recientes pesan más (vida media
+configurable) y cada actualización solo agrega las horas cerradas desde la
+anterior.
+
+Para una ventana [inicio, termino) los libres previstos por hora son:
+
+    total - ocupación del perfil - reservas activas que se traslapan
+
+Las respuestas se guardan por ventana (redondeada a la hora) y versión del
+estado canónico (migración 008), que sube con cada cambio de reserva, la
+haga mobile, web o el vencimiento. Una actualización del perfil las descarta
+todas.
+"""
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from app.db import get_connection, liberar
+from app.estado import estado_estacionamientos
+
+ZONA_HORARIA = ZoneInfo(os.getenv("ZONA_HORARIA", "America/Santiago"))
+SEMANAS_HISTORIA = int(os.getenv("PRONOSTICO_SEMANAS", "26"))
+VIDA_MEDIA_SEMANAS = float(os.getenv("PRONOSTICO_VIDA_MEDIA_SEMANAS", "8"))
+REFRESCO_S = int(os.getenv("PRONOSTICO_REFRESCO_S", "900"))
+MAX_HORAS_VENTANA = 24 * 7
+MAX_VENTANAS_CACHE = 1000
+
+
+def a_hora(valor: datetime) -> datetime:
+    """Trunca a la hora; las horas sin zona se interpretan en la zona del condominio."""
+    if valor.tzinfo is None:
+        valor = valor.replace(tzinfo=ZONA_HORARIA)
+    return valor.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+class PerfilOcupacion:
+    def __init__(self):
+        self.suma = np.zeros(7 * 24)
+        self.peso = np.zeros(7 * 24)
+        self.hasta: datetime | None = None   # primera hora aún no agregada
+        self.nivel: float | None = None      # ocupación al cierre de la última hora agregada
+        self.total = 0
+        self.ocupados_actuales = 0
+        self.actualizado = 0.0
+        self._lock = asyncio.Lock()
+        # (versión del estado, desde, hasta) -> respuesta; solo de la versión actual
+        self._cache: dict[tuple[int | None, datetime, datetime], dict] = {}
+        self._version_cache: int | None = None
+
+    async def asegurar_actualizado(self):
+        if time.monotonic() - self.actualizado < REFRESCO_S:
+            return
+        async with self._lock:
+            if time.monotonic() - self.actualizado < REFRESCO_S:
+                return
+            conn = await get_connection()
+            try:
+                await self._actualizar(conn)
+            finally:
+                await liberar(conn)
+            self.actualizado = time.monotonic()
+            self._cache.clear()
+
+    async def _actualizar(self, conn):
+        ahora = a_hora(datetime.now(timezone.utc))
+        desde = self.hasta or ahora - timedelta(weeks=SEMANAS_HISTORIA)
+
+        self.total = await conn.fetchval("SELECT COUNT(*) FROM estacionamiento")
+        self.ocupados_actuales = await conn.fetchval("SELECT COUNT(*) FROM estacionamiento WHERE ocupado = TRUE")
+        if self.hasta is None:
+            self.nivel = await conn.fetchval(
+                """
+                SELECT ocupados_final
+                  FROM resumen_ocupacion_hora
+                 WHERE hora < $1
+                 ORDER BY hora DESC
+                 LIMIT 1
+                """,
+                desde,
+            )
+        if desde >= ahora:
+            return
+
+        # Una fila por hora cerrada del rango, con su día/hora local
+        rows = await conn.fetch(
+            """
+            SELECT h AS hora,
+                   EXTRACT(ISODOW FROM h AT TIME ZONE $3)::int - 1 AS dia,
+                   EXTRACT(HOUR FROM h AT TIME ZONE $3)::int AS hora_dia,
+                   r.ocupados_max,
+                   r.ocupados_final
+              FROM generate_series($1::timestamptz, $2::timestamptz - interval '1 hour', interval '1 hour') AS h
+              LEFT JOIN resumen_ocupacion_hora r ON r.hora = h
+             ORDER BY h
+            """,
+            desde,
+            ahora,
+            str(ZONA_HORARIA),
+        )
+        self._agregar(rows, ahora)
+        self.hasta = ahora
+
+    def _agregar(self, rows, ahora: datetime):
+        n = len(rows)
+        if not n:
+            return
+        indice = np.array([r["dia"] * 24 + r["hora_dia"] for r in rows])
+        maximo = np.array([np.nan if r["ocupados_max"] is None else r["ocupados_max"] for r in rows], dtype=float)
+        final = np.array([np.nan if r["ocupados_final"] is None else r["ocupados_final"] for r in rows], dtype=float)
+
+        # Ocupación al inicio de cada hora: el cierre de la última hora con cambios
+        posiciones = np.where(np.isnan(final), -1, np.arange(n))
+        ultima = np.maximum.accumulate(posiciones)
+        inicial = np.full(n, np.nan if self.nivel is None else float(self.nivel))
+        anterior = ultima[:-1]
+        inicial[1:] = np.where(anterior >= 0, final[np.maximum(anterior, 0)], inicial[1:])
+        ocupacion = np.fmax(maximo, inicial)
+
+        if ultima[-1] >= 0:
+            self.nivel = float(final[ultima[-1]])
+
+        # Peso exponencial por antigüedad; lo ya agregado se atenúa igual
+        edades = (ahora - rows[0]["hora"]).total_seconds() / 3600 - np.arange(n)
+        vida_media_h = VIDA_MEDIA_SEMANAS * 7 * 24
+        if self.hasta is not None:
+            atenuacion = 0.5 ** ((ahora - self.hasta).total_seconds() / 3600 / vida_media_h)
+            self.suma *= atenuacion
+            self.peso *= atenuacion
+        pesos = 0.5 ** (edades / vida_media_h)
+
+        validas = ~np.isnan(ocupacion)
+        self.suma += np.bincount(indice[validas], weights=ocupacion[validas] * pesos[validas], minlength=7 * 24)
+        self.peso += np.bincount(indice[validas], weights=pesos[validas], minlength=7 * 24)
+
+    def ocupacion_esperada(self, horas: list[datetime]) -> np.ndarray:
+        """Ocupación prevista para cada hora; sin historial se usa la ocupación actual."""
+        indice = np.array([h.astimezone(ZONA_HORARIA).weekday() * 24 + h.astimezone(ZONA_HORARIA).hour for h in horas])
+        peso = self.peso[indice]
+        perfil = np.divide(self.suma[indice], peso, out=np.full(len(horas), np.nan), where=peso > 0)
+        return np.where(np.isnan(perfil), self.ocupados_actuales, perfil)
+
+    async def pronosticar(self, inicio: datetime, termino: datetime) -> dict:
+        await self.asegurar_actualizado()
+        version = (await estado_estacionamientos.leer())["version"]
+        if version != self._version_cache:
+            self._cache.clear()
+            self._version_cache = version
+        desde = a_hora(inicio)
+        hasta = a_hora(termino - timedelta(microseconds=1)) + timedelta(hours=1)
+        # Con la versión en la clave, una respuesta calculada mientras cambiaba
+        # una reserva no se sirve para la versión nueva
+        clave = (version, desde, hasta)
+        if clave in self._cache:
+            return self._cache[clave]
+
+        horas = [desde + timedelta(hours=i) for i in range(int((hasta - desde).total_seconds() // 3600))]
+        conn = await get_connection()
+        try:
+            reservas = await conn.fetch(
+                """
+                SELECT h AS hora, COUNT(r.id) AS reservas
+                  FROM generate_series($1::timestamptz, $2::timestamptz - interval '1 hour', interval '1 hour') AS h
+                  LEFT JOIN reserva r
+                    ON r.estado_reserva = 0
+                   AND r.hora_inicio < h + interval '1 hour'
+                   AND r.hora_termino > h
+                 GROUP BY h
+                 ORDER BY h
+                """,
+                desde,
+                hasta,
+            )
+        finally:
+            await liberar(conn)
+
+        ocupacion = self.ocupacion_esperada(horas)
+        por_hora = []
+        for h, prevista, r in zip(horas, ocupacion, reservas):
+            libres = max(self.total - int(np.ceil(prevista)) - r["reservas"], 0)
+            por_hora.append({
+                "hora": h.isoformat(),
+                "ocupacion_prevista": round(float(prevista), 1),
+                "reservas": r["reservas"],
+                "libres_previstos": libres,
+            })
+
+        resultado = {
+            "desde": desde.isoformat(),
+            "hasta": hasta.isoformat(),
+            "total": self.total,
+            "libres_previstos": min(h["libres_previstos"] for h in por_hora),
+            "horas": por_hora,
+        }
+        if len(self._cache) >= MAX_VENTANAS_CACHE:
+            self._cache.clear()
+        self._cache[clave] = resultado
+        return resultado
+
+
+perfil_ocupacion = PerfilOcupacion()
@@ -1,44 +1,70 @@
+import math
 from datetime import timedelta
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import BaseModel, Field
 
 from app.auth_utils import create_access_token
-from app.db import get_connection
+from app.credenciales import (
+    MAX_LARGO_CONTRASENA,
+    LoginSaturado,
+    es_bcrypt,
+    intentos_por_cuenta,
+    intentos_por_ip,
+    verificar_contrasena,
+)
+from app.db import get_connection, liberar
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
 class LoginRequest(BaseModel):
     correo: str
-    contrasena: str
+    contrasena: str = Field(max_length=MAX_LARGO_CONTRASENA)
 
 
 @router.post("/login")
-async def login(req: LoginRequest):
+async def login(req: LoginRequest, request: Request):
     """
     Valida credenciales de un departamento a partir del correo.
-    - Busca el correo en la tabla departamento (columna citext).
-    - Compara la contrasena ingresada con el hash almacenado (crypt/bcrypt).
+    - Limita los intentos por correo y por IP (ver app/credenciales.py).
+    - Busca el correo en la tabla departamento (columna citext) y trae su hash.
+    - Compara la contrasena ingresada con el hash (bcrypt, fuera de la base).
     - Si es valido, genera y devuelve un JWT.
     """
+    correo = req.correo.strip()
+    espera = max(
+        intentos_por_ip.intentar(request.client.host if request.client else ""),
+        intentos_por_cuenta.intentar(correo.lower()),
+    )
+    if espera:
+        raise HTTPException(
+            status_code=429,
+            detail="Demasiados intentos, espera antes de volver a intentar",
+            headers={"Retry-After": str(math.ceil(espera))},
+        )
 
     conn = await get_connection()
+    try:
+        row = await conn.fetchrow(
+            "SELECT id, contrasena FROM departamento WHERE correo = $1",
+            correo,
+        )
+        hash_guardado = row["contrasena"] if row else None
+        valida = False
+        # Hashes que no son bcrypt (p. ej. md5 de pgcrypto) son baratos: los verifica la base
+        if hash_guardado and not es_bcrypt(hash_guardado):
+            valida = await conn.fetchval("SELECT crypt($1, $2) = $2", req.contrasena, hash_guardado)
+    finally:
+        await liberar(conn)
 
-    row = await conn.fetchrow(
-        """
-        SELECT id
-        FROM departamento
-        WHERE correo = $1
-          AND contrasena = crypt($2, contrasena)
-        """,
-        req.correo.strip(),
-        req.contrasena,
-    )
-
-    await conn.close()
+    if hash_guardado and es_bcrypt(hash_guardado):
+        try:
+            valida = await verificar_contrasena(req.contrasena, hash_guardado)
+        except LoginSaturado:
+            raise HTTPException(status_code=503, detail="Servicio ocupado, intenta nuevamente")
 
-    if not row:
+    if not valida:
         raise HTTPException(status_code=401, detail="Credenciales invalidas")
 
     token = create_access_token(
@@ -1,35 +1,59 @@
 # app/routers/estacionamientos.py
-from fastapi import APIRouter, Depends
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException
 
 from app.auth_utils import verify_token
-from app.db import get_connection
+from app.estado import ESTADO_DESCONOCIDO, estado_estacionamientos
+from app.pronostico import MAX_HORAS_VENTANA, perfil_ocupacion
+from comun.respuestas import CacheRespuesta, RespuestaJSON
 
 router = APIRouter(prefix="/estacionamientos", tags=["Estacionamientos"])
 
 
-@router.get("/disponibilidad")
-async def disponibilidad_estacionamientos(token: dict = Depends(verify_token)):
-    """Consulta la disponibilidad global de estacionamientos de visita."""
-    conn = await get_connection()
+_disponibilidad = CacheRespuesta()
 
-    total = await conn.fetchval("SELECT COUNT(*) FROM estacionamiento")
-    ocupados = await conn.fetchval("SELECT COUNT(*) FROM estacionamiento WHERE ocupado = TRUE")
-    reservados = await conn.fetchval(
-        """
-        SELECT COUNT(*)
-          FROM reserva
-         WHERE estado_reserva = 0
-           AND hora_termino > NOW()
-        """
-    )
 
-    await conn.close()
+def _contar_disponibilidad(actual: dict) -> dict:
+    estados = [e["estado"] for e in actual["estados"]]
 
-    disponibles = max(total - ocupados - reservados, 0)
+    total = len(estados)
+    ocupados = estados.count(1)
+    # Sensor sin reportar: no se sabe si está libre, no se ofrece
+    desconocidos = estados.count(ESTADO_DESCONOCIDO)
+    # Reservas con estacionamiento asignado y libre, más las aún sin asignar
+    reservados = estados.count(2) + actual["reservas_sin_asignar"]
+    disponibles = max(total - ocupados - reservados - desconocidos, 0)
 
     return {
         "total": total,
         "ocupados": ocupados,
         "reservados": reservados,
+        "desconocidos": desconocidos,
         "disponibles": disponibles,
     }
+
+
+@router.get("/disponibilidad", response_class=RespuestaJSON)
+async def disponibilidad_estacionamientos(token: dict = Depends(verify_token)):
+    """Consulta la disponibilidad global de estacionamientos de visita."""
+    actual = await estado_estacionamientos.leer()
+    return _disponibilidad.obtener(actual["version"], lambda: _contar_disponibilidad(actual))
+
+
+@router.get("/pronostico")
+async def pronostico_disponibilidad(
+    hora_inicio: datetime,
+    hora_termino: datetime,
+    token: dict = Depends(verify_token),
+):
+    """
+    Estacionamientos libres previstos para una ventana de reserva, por hora y
+    en el peor momento de la ventana (ver app/pronostico.py).
+    """
+    if hora_termino <= hora_inicio:
+        raise HTTPException(status_code=400, detail="La hora de termino debe ser posterior a la de inicio")
+    if (hora_termino - hora_inicio).total_seconds() > MAX_HORAS_VENTANA * 3600:
+        raise HTTPException(status_code=400, detail=f"La ventana no puede superar {MAX_HORAS_VENTANA} horas")
+
+    return await perfil_ocupacion.pronosticar(hora_inicio, hora_termino)
@@ -4,7 +4,9 @@ from pydantic import BaseModel
 from datetime import datetime
 
 from app.auth_utils import verify_token
-from app.db import get_connection
+from app.db import get_connection, get_connection_lectura, liberar
+from app.estado import ESTADO_DESCONOCIDO, estado_estacionamientos
+from comun.respuestas import RespuestaJSON, objetos
 
 router = APIRouter(prefix="/reservas", tags=["Reservas"])
 
@@ -35,56 +37,55 @@ async def crear_reserva(req: ReservaRequest, token: dict = Depends(verify_token)
     if hora_termino <= hora_inicio:
         raise HTTPException(status_code=400, detail="La hora de termino debe ser posterior a la de inicio")
 
-    conn = await get_connection()
-
-    estacionamientos_totales = await conn.fetchval("SELECT COUNT(*) FROM estacionamiento")
-
-    reservas_activas = await conn.fetchval(
-        """
-        SELECT COUNT(*)
-          FROM reserva
-         WHERE estado_reserva = 0
-           AND hora_termino > NOW()
-        """
-    )
+    # Los estacionamientos con el sensor caído no cuentan como capacidad
+    estados = [e["estado"] for e in (await estado_estacionamientos.leer())["estados"]]
+    estacionamientos_totales = len(estados) - estados.count(ESTADO_DESCONOCIDO)
+    ocupados = estados.count(1)
 
-    ocupados = await conn.fetchval("SELECT COUNT(*) FROM estacionamiento WHERE ocupado = TRUE")
-
-    if reservas_activas >= estacionamientos_totales:
-        await conn.close()
-        raise HTTPException(
-            status_code=400,
-            detail="No se pueden crear mas reservas: todos los estacionamientos ya estan reservados",
+    conn = await get_connection()
+    try:
+        reservas_activas = await conn.fetchval(
+            """
+            SELECT COUNT(*)
+              FROM reserva
+             WHERE estado_reserva = 0
+               AND hora_termino > NOW()
+            """
         )
 
-    if ocupados >= estacionamientos_totales:
-        await conn.close()
-        raise HTTPException(
-            status_code=400,
-            detail="No se pueden crear reservas: todos los estacionamientos estan ocupados",
-        )
+        if reservas_activas >= estacionamientos_totales:
+            raise HTTPException(
+                status_code=400,
+                detail="No se pueden crear mas reservas: todos los estacionamientos ya estan reservados",
+            )
 
-    row = await conn.fetchrow(
-        """
-        INSERT INTO reserva (
+        if ocupados >= estacionamientos_totales:
+            raise HTTPException(
+                status_code=400,
+                detail="No se pueden crear reservas: todos los estacionamientos estan ocupados",
+            )
+
+        row = await conn.fetchrow(
+            """
+            INSERT INTO reserva (
+                hora_inicio,
+                hora_termino,
+                estado_reserva,
+                rut_visitante,
+                placa_patente_visitante,
+                id_departamento
+            )
+            VALUES ($1, $2, 0, $3, $4, $5)
+            RETURNING id;
+            """,
             hora_inicio,
             hora_termino,
-            estado_reserva,
-            rut_visitante,
-            placa_patente_visitante,
-            id_departamento
+            req.rut_visitante,
+            req.placa_patente_visitante,
+            id_departamento,
         )
-        VALUES ($1, $2, 0, $3, $4, $5)
-        RETURNING id;
-        """,
-        hora_inicio,
-        hora_termino,
-        req.rut_visitante,
-        req.placa_patente_visitante,
-        id_departamento,
-    )
-
-    await conn.close()
+    finally:
+        await liberar(conn)
 
     return {
         "message": "Reserva creada exitosamente",
@@ -93,34 +94,36 @@ async def crear_reserva(req: ReservaRequest, token: dict = Depends(verify_token)
     }
 
 
-@router.get("/")
+@router.get("/", response_class=RespuestaJSON)
 async def listar_reservas(token: dict = Depends(verify_token)):
     """Listar todas las reservas de un residente autenticado."""
     id_departamento = token["sub"]
-    conn = await get_connection()
+    conn = await get_connection_lectura()
+    try:
+        rows = await conn.fetch(
+            """
+            SELECT r.id,
+                   r.hora_inicio,
+                   r.hora_termino,
+                   CASE
+                       WHEN r.hora_termino < NOW() AND r.estado_reserva = 0 THEN 'Vencida'
+                       ELSE e.nombre
+                   END AS estado_reserva,
+                   r.rut_visitante,
+                   r.placa_patente_visitante
+              FROM reserva r
+              JOIN estado_reserva e ON e.id = r.estado_reserva
+             WHERE r.id_departamento = $1
+             ORDER BY r.hora_inicio DESC
+            """,
+            id_departamento,
+        )
+    finally:
+        await liberar(conn)
 
-    rows = await conn.fetch(
-        """
-        SELECT r.id,
-               r.hora_inicio,
-               r.hora_termino,
-               CASE
-                   WHEN r.hora_termino < NOW() AND r.estado_reserva = 0 THEN 'Vencida'
-                   ELSE e.nombre
-               END AS estado_reserva,
-               r.rut_visitante,
-               r.placa_patente_visitante
-          FROM reserva r
-          JOIN estado_reserva e ON e.id = r.estado_reserva
-         WHERE r.id_departamento = $1
-         ORDER BY r.hora_inicio DESC
-        """,
-        id_departamento,
-    )
-
-    await conn.close()
-
-    return {"reservas": [dict(r) for r in rows]}
+    # Los Record son tuplas; los nombres de columna salen del primero
+    columnas = list(rows[0].keys()) if rows else []
+    return RespuestaJSON({"reservas": objetos(columnas, rows)})
 
 
 @router.put("/{id_reserva}")
@@ -146,7 +149,12 @@ async def editar_reserva(
                SET hora_inicio = $1,
                    hora_termino = $2,
                    rut_visitante = $3,
-                   placa_patente_visitante = $4
+                   placa_patente_visitante = $4,
+                   -- una reserva vencida que se extiende vuelve a estar activa
+                   estado_reserva = CASE
+                       WHEN estado_reserva = 3 AND $2 > NOW() THEN 0
+                       ELSE estado_reserva
+                   END
              WHERE id = $5
                AND id_departamento = $6
             """,
@@ -158,7 +166,7 @@ async def editar_reserva(
             id_departamento,
         )
     finally:
-        await conn.close()
+        await liberar(conn)
 
     if result == "UPDATE 0":
         raise HTTPException(
@@ -174,19 +182,19 @@ async def cancelar_reserva(id_reserva: int, token: dict = Depends(verify_token))
     """Cancelar una reserva cambiando su estado a cancelada."""
     id_departamento = token["sub"]
     conn = await get_connection()
-
-    result = await conn.execute(
-        """
-        UPDATE reserva
-           SET estado_reserva = 2
-         WHERE id = $1
-           AND id_departamento = $2
-        """,
-        id_reserva,
-        id_departamento,
-    )
-
-    await conn.close()
+    try:
+        result = await conn.execute(
+            """
+            UPDATE reserva
+               SET estado_reserva = 2
+             WHERE id = $1
+               AND id_departamento = $2
+            """,
+            id_reserva,
+            id_departamento,
+        )
+    finally:
+        await liberar(conn)
 
     if result == "UPDATE 0":
         raise HTTPException(
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from app.db import get_connection
+from app.db import get_connection, liberar
 from app.auth_utils import verify_token
+from comun.respuestas import RespuestaJSON, objetos
 
 router = APIRouter(prefix="/vehiculos", tags=["Vehículos"])
 
@@ -41,14 +42,14 @@ async def agregar_vehiculo(req: VehiculoRequest, token: dict = Depends(verify_to
                 id_departamento = EXCLUDED.id_departamento
         """, req.placa_patente, req.tipo_vehiculo, id_departamento)
     finally:
-        await conn.close()
+        await liberar(conn)
 
     return {"mensaje": "Vehículo agregado/actualizado", "placa": req.placa_patente}
 
 # ------------------------
 # Listar vehículos del residente
 # ------------------------
-@router.get("/")
+@router.get("/", response_class=RespuestaJSON)
 async def listar_vehiculos(token: dict = Depends(verify_token)):
     """
     Devuelve todos los vehículos asociados al residente autenticado.
@@ -68,9 +69,11 @@ async def listar_vehiculos(token: dict = Depends(verify_token)):
             ORDER BY placa_patente
         """, id_departamento)
     finally:
-        await conn.close()
+        await liberar(conn)
 
-    return {"vehiculos": [dict(row) for row in rows]}
+    # Los Record son tuplas; los nombres de columna salen del primero
+    columnas = list(rows[0].keys()) if rows else []
+    return RespuestaJSON({"vehiculos": objetos(columnas, rows)})
 
 # ------------------------
 # Editar vehículo
@@ -95,7 +98,7 @@ async def actualizar_vehiculo(placa: str, req: UpdateVehiculoRequest, token: dic
             WHERE placa_patente = $2 AND id_departamento = $3
         """, req.tipo_vehiculo, placa, id_departamento)
     finally:
-        await conn.close()
+        await liberar(conn)
 
     if result.endswith("0"):  # Ninguna fila afectada
         raise HTTPException(status_code=404, detail="Vehículo no encontrado")
@@ -122,7 +125,7 @@ async def eliminar_vehiculo(placa: str, token: dict = Depends(verify_token)):
             WHERE placa_patente = $1 AND id_departamento = $2
         """, placa, id_departamento)
     finally:
-        await conn.close()
+        await liberar(conn)
 
     if result.endswith("0"):  # Ninguna fila afectada
         raise HTTPException(status_code=404, detail="Vehículo no encontrado")
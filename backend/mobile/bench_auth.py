@@ -0,0 +1,49 @@
+"""
+Micro-benchmark de la verificación del token por request: decodificar con
+python-jose (el camino original), con PyJWT si está instalado, y con el
+cache de tokens verificados (comun/tokens.py).
+
+    PYTHONPATH=.. python bench_auth.py --requests 20000 --tokens 50
+"""
+import argparse
+import random
+import time
+
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
+
+from app.auth_utils import ALGORITHM, SECRET_KEY, create_access_token, tokens_verificados, verify_token
+
+
+def medir(nombre: str, funcion, tokens: list[str], requests: int):
+    secuencia = [random.choice(tokens) for _ in range(requests)]
+    inicio = time.perf_counter()
+    for token in secuencia:
+        funcion(token)
+    us = (time.perf_counter() - inicio) / requests * 1e6
+    print(f"{nombre:28s} {us:8.2f} µs/request")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Costo de verificar el token por request")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--tokens", type=int, default=50, help="departamentos distintos consultando")
+    args = parser.parse_args()
+
+    tokens = [create_access_token({"sub": f"{100 + i}A"}) for i in range(args.tokens)]
+
+    medir("python-jose", lambda t: jwt.decode(t, SECRET_KEY, algorithms=[ALGORITHM]), tokens, args.requests)
+    try:
+        import jwt as pyjwt
+        medir("PyJWT", lambda t: pyjwt.decode(t, SECRET_KEY, algorithms=[ALGORITHM]), tokens, args.requests)
+    except ImportError:
+        print(f"{'PyJWT':28s} (no instalado)")
+
+    tokens_verificados.limpiar()
+    medir("verify_token (con cache)",
+          lambda t: verify_token(HTTPAuthorizationCredentials(scheme="Bearer", credentials=t)),
+          tokens, args.requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 import os
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
 
+from comun import db as comun_db
+from comun.replica import repartir_pool
+
 # Cargar variables de entorno
 load_dotenv()
 
@@ -10,6 +12,23 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("❌ DATABASE_URL no está definido en .env")
 
-engine = create_engine(DATABASE_URL)
+# Conexiones de este proceso; comun/servidor.py reparte DB_CONEXIONES entre los workers.
+# Con DATABASE_URL_REPLICA parte del pool queda para la réplica (comun/replica.py).
+DATABASE_URL_REPLICA = os.getenv("DATABASE_URL_REPLICA")
+DB_POOL_SIZE, DB_POOL_SIZE_REPLICA = repartir_pool(int(os.getenv("DB_POOL_SIZE", "5")), DATABASE_URL_REPLICA)
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+engine = comun_db.engine_de(DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW)
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 Base = declarative_base()
+
+replica = comun_db.replica_de(DATABASE_URL_REPLICA, DB_POOL_SIZE_REPLICA, DB_MAX_OVERFLOW)
+
+
+def get_db_lectura():
+    """Dependencia de los endpoints de solo lectura: réplica si está al día, si no primario."""
+    yield from comun_db.sesion_lectura(SessionLocal, replica)
+
+
+def calentar(consultas: tuple[str, ...] = ()):
+    comun_db.calentar(engine, DB_POOL_SIZE, consultas)
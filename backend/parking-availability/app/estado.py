@@ -0,0 +1,10 @@
+"""
+Estado canónico de los estacionamientos, el mismo que muestran el dashboard
+web y la app móvil. La implementación está en comun/estado.py, compartida
+con web.
+"""
+from comun.estado import CONSULTA, ESTADO_DESCONOCIDO, ETIQUETAS, estado_de
+
+from .db import engine
+
+estado_estacionamientos = estado_de(engine)
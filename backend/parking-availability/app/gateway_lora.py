@@ -0,0 +1,280 @@
+"""
+Gateway de los sensores LoRa (migración 009_sensor_lora.sql).
+
+Un receptor LoRa (arduino/RX.ino con MODO_GATEWAY) conectado por serial
+reenvía cada paquete como una línea:
+
+    PKT <numero>:<secuencia>:<estado> <rssi> <snr>
+
+donde `numero` es el estacionamiento del sensor, `secuencia` un contador de
+16 bits que el sensor incrementa en cada envío y `estado` 0/1. Los sensores
+repiten su estado cada cierto tiempo como latido.
+
+Por sensor se descartan los paquetes repetidos (misma secuencia, p. ej.
+retransmisiones o dos receptores oyendo el mismo paquete) y los atrasados,
+y se cuentan los perdidos. Los cambios se acumulan y cada LOTE_MS se
+escriben en una sola transacción: estacionamiento_estado y
+estacionamiento.ocupado solo para los estados que cambiaron, y sensor_lora
+para todos los sensores escuchados. Un sensor sin paquetes durante
+INACTIVO_S queda marcado como inactivo (rueda de latidos, ver latidos.py) y
+su estacionamiento pasa a 'desconocido' en el estado canónico (migración
+010); vuelve a activo con su siguiente paquete.
+
+    python -m app.gateway_lora --puerto /dev/ttyUSB0
+
+`--puerto` acepta cualquier URL de pyserial (p. ej. el otro extremo de un
+pseudo-terminal para pruebas).
+"""
+import argparse
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import serial
+from sqlalchemy import text
+
+from .db import engine
+from .latidos import RuedaLatidos
+
+LOTE_MS = int(os.getenv("LORA_LOTE_MS", "500"))
+INACTIVO_S = int(os.getenv("LORA_INACTIVO_S", "180"))
+MODULO_SECUENCIA = 1 << 16
+# Un sensor que se reinicia vuelve a contar desde 0: una secuencia baja
+# "atrasada" que llega tras un silencio es un reinicio. Las copias y
+# desórdenes entre receptores llegan con milisegundos de diferencia.
+SECUENCIA_REINICIO = 16
+SILENCIO_REINICIO_S = 0.5
+
+
+@dataclass
+class Sensor:
+    numero: int
+    secuencia: int
+    estado: int
+    ultimo_visto: datetime
+    visto_monotonic: float
+    rssi: int | None = None
+    snr: float | None = None
+    paquetes: int = 0
+    perdidos: int = 0
+    duplicados: int = 0
+    inactivo: bool = False
+
+
+@dataclass
+class Paquete:
+    numero: int
+    secuencia: int
+    estado: int
+    rssi: int | None
+    snr: float | None
+
+
+def parsear_linea(linea: str) -> Paquete | None:
+    """Paquete de una línea `PKT ...`; None para cualquier otra salida del receptor."""
+    partes = linea.split()
+    if len(partes) < 2 or partes[0] != "PKT":
+        return None
+    try:
+        numero, secuencia, estado = (int(v) for v in partes[1].split(":"))
+        rssi = int(partes[2]) if len(partes) > 2 else None
+        snr = float(partes[3]) if len(partes) > 3 else None
+    except ValueError:
+        return None
+    if estado not in (0, 1) or not 0 <= secuencia < MODULO_SECUENCIA:
+        return None
+    return Paquete(numero, secuencia, estado, rssi, snr)
+
+
+class Gateway:
+    def __init__(self, inactivo_s: float = INACTIVO_S):
+        self.inactivo_s = inactivo_s
+        self.sensores: dict[int, Sensor] = {}
+        self.latidos = RuedaLatidos(inactivo_s)
+        # Pendientes de escribir: estado por estacionamiento, sensores tocados
+        # y cambios de actividad (sensor -> inactivo)
+        self.estados: dict[int, int] = {}
+        self.tocados: set[int] = set()
+        self.actividad: dict[int, bool] = {}
+
+    def cargar(self):
+        """Retoma secuencias y contadores guardados (p. ej. al reiniciar el gateway)."""
+        with engine.connect() as conn:
+            rows = conn.execute(text("""
+              SELECT s.*, COALESCE(ee.estado, 0) AS estado, NOW() - s.ultimo_visto AS silencio
+                FROM sensor_lora s
+                LEFT JOIN estacionamiento_estado ee ON ee.estacionamiento_numero = s.estacionamiento_numero
+            """)).mappings().all()
+        for r in rows:
+            self.sensores[r["estacionamiento_numero"]] = Sensor(
+                numero=r["estacionamiento_numero"],
+                secuencia=r["secuencia"],
+                estado=r["estado"],
+                ultimo_visto=r["ultimo_visto"],
+                visto_monotonic=time.monotonic() - r["silencio"].total_seconds(),
+                rssi=r["rssi"],
+                snr=r["snr"],
+                paquetes=r["paquetes"],
+                perdidos=r["perdidos"],
+                duplicados=r["duplicados"],
+                inactivo=r["inactivo"],
+            )
+            if not r["inactivo"]:
+                self.latidos.latido(r["estacionamiento_numero"], hace_s=r["silencio"].total_seconds())
+
+    def recibir(self, p: Paquete) -> bool:
+        """Registra un paquete. False si es repetido o atrasado."""
+        ahora = datetime.now(timezone.utc)
+        sensor = self.sensores.get(p.numero)
+        if sensor is None:
+            sensor = Sensor(p.numero, p.secuencia, p.estado, ahora, time.monotonic())
+            self.sensores[p.numero] = sensor
+            self.estados[p.numero] = p.estado
+        else:
+            avance = (p.secuencia - sensor.secuencia) % MODULO_SECUENCIA
+            reinicio = (
+                p.secuencia < SECUENCIA_REINICIO
+                and time.monotonic() - sensor.visto_monotonic > SILENCIO_REINICIO_S
+            )
+            if avance == 0 or (avance >= MODULO_SECUENCIA // 2 and not reinicio):
+                sensor.duplicados += 1
+                self.tocados.add(p.numero)
+                return False
+            if avance < MODULO_SECUENCIA // 2:
+                sensor.perdidos += avance - 1
+            sensor.secuencia = p.secuencia
+            if p.estado != sensor.estado:
+                sensor.estado = p.estado
+                self.estados[p.numero] = p.estado
+
+        sensor.ultimo_visto = ahora
+        sensor.visto_monotonic = time.monotonic()
+        sensor.rssi, sensor.snr = p.rssi, p.snr
+        sensor.paquetes += 1
+        self.latidos.latido(p.numero)
+        if sensor.inactivo:
+            sensor.inactivo = False
+            self.actividad[p.numero] = False
+            print(f"✅ Sensor {p.numero} volvió a reportar")
+        self.tocados.add(p.numero)
+        return True
+
+    def revisar_inactivos(self):
+        for numero in self.latidos.avanzar():
+            sensor = self.sensores[numero]
+            if not sensor.inactivo:
+                sensor.inactivo = True
+                self.actividad[numero] = True
+                print(f"⚠️ Sensor {numero} sin reportar hace más de {self.inactivo_s:.0f} s")
+
+    def escribir(self):
+        """Escribe lo pendiente en una transacción; si falla queda para el siguiente lote."""
+        if not self.estados and not self.tocados and not self.actividad:
+            return
+        sensores = [self.sensores[n] for n in sorted(self.tocados)]
+        with engine.begin() as conn:
+            if self.estados:
+                params = {"numeros": list(self.estados), "estados": list(self.estados.values())}
+                conn.execute(text("""
+                  INSERT INTO estacionamiento_estado (estacionamiento_numero, estado, updated_at)
+                  SELECT numero, estado, NOW()
+                    FROM unnest(CAST(:numeros AS int[]), CAST(:estados AS int[])) AS c(numero, estado)
+                  ON CONFLICT (estacionamiento_numero) DO UPDATE
+                     SET estado = EXCLUDED.estado, updated_at = EXCLUDED.updated_at
+                """), params)
+                conn.execute(text("""
+                  UPDATE estacionamiento e
+                     SET ocupado = c.estado = 1
+                    FROM unnest(CAST(:numeros AS int[]), CAST(:estados AS int[])) AS c(numero, estado)
+                   WHERE e.id = c.numero
+                     AND e.ocupado IS DISTINCT FROM (c.estado = 1)
+                """), params)
+            if sensores:
+                conn.execute(text("""
+                  INSERT INTO sensor_lora AS s (estacionamiento_numero, ultimo_visto, secuencia, rssi, snr,
+                                                paquetes, perdidos, duplicados)
+                  SELECT * FROM unnest(CAST(:numeros AS int[]), CAST(:vistos AS timestamptz[]),
+                                       CAST(:secuencias AS int[]), CAST(:rssis AS smallint[]),
+                                       CAST(:snrs AS real[]), CAST(:paquetes AS bigint[]),
+                                       CAST(:perdidos AS bigint[]), CAST(:duplicados AS bigint[]))
+                  ON CONFLICT (estacionamiento_numero) DO UPDATE
+                     SET ultimo_visto = EXCLUDED.ultimo_visto, secuencia = EXCLUDED.secuencia,
+                         rssi = EXCLUDED.rssi, snr = EXCLUDED.snr, paquetes = EXCLUDED.paquetes,
+                         perdidos = EXCLUDED.perdidos, duplicados = EXCLUDED.duplicados
+                """), {
+                    "numeros": [s.numero for s in sensores],
+                    "vistos": [s.ultimo_visto for s in sensores],
+                    "secuencias": [s.secuencia for s in sensores],
+                    "rssis": [s.rssi for s in sensores],
+                    "snrs": [s.snr for s in sensores],
+                    "paquetes": [s.paquetes for s in sensores],
+                    "perdidos": [s.perdidos for s in sensores],
+                    "duplicados": [s.duplicados for s in sensores],
+                })
+            if self.actividad:
+                # Aparte y solo si cambia: dispara el recálculo del estado canónico
+                conn.execute(text("""
+                  UPDATE sensor_lora s
+                     SET inactivo = c.inactivo
+                    FROM unnest(CAST(:numeros AS int[]), CAST(:inactivos AS boolean[])) AS c(numero, inactivo)
+                   WHERE s.estacionamiento_numero = c.numero
+                     AND s.inactivo IS DISTINCT FROM c.inactivo
+                """), {"numeros": list(self.actividad), "inactivos": list(self.actividad.values())})
+        self.estados.clear()
+        self.tocados.clear()
+        self.actividad.clear()
+
+
+def ejecutar(puerto: str, baudios: int, gateway: Gateway, lote_ms: int = LOTE_MS, detener=None):
+    siguiente_lote = time.monotonic() + lote_ms / 1000
+    conexion = None
+    # readline() devuelve lo leído hasta el timeout, que puede ser media línea
+    pendiente = b""
+    while detener is None or not detener.is_set():
+        try:
+            if conexion is None:
+                conexion = serial.serial_for_url(puerto, baudrate=baudios, timeout=0.1)
+                pendiente = b""
+                print(f"📡 Escuchando {puerto}")
+            pendiente += conexion.readline()
+            if pendiente.endswith(b"\n"):
+                paquete = parsear_linea(pendiente.decode("ascii", errors="replace"))
+                pendiente = b""
+                if paquete is not None:
+                    gateway.recibir(paquete)
+        except serial.SerialException as e:
+            print(f"⚠️ Error en {puerto}: {e}; reintentando...")
+            if conexion is not None:
+                conexion.close()
+                conexion = None
+            time.sleep(2)
+
+        if time.monotonic() >= siguiente_lote:
+            siguiente_lote = time.monotonic() + lote_ms / 1000
+            gateway.revisar_inactivos()
+            try:
+                gateway.escribir()
+            except Exception as e:
+                print(f"⚠️ No se pudo escribir el lote: {e}")
+    if conexion is not None:
+        conexion.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gateway serial de los sensores LoRa")
+    parser.add_argument("--puerto", default=os.getenv("LORA_PUERTO", "/dev/ttyUSB0"))
+    parser.add_argument("--baudios", type=int, default=int(os.getenv("LORA_BAUDIOS", "115200")))
+    parser.add_argument("--lote-ms", type=int, default=LOTE_MS)
+    parser.add_argument("--inactivo-s", type=float, default=INACTIVO_S)
+    args = parser.parse_args()
+    gateway = Gateway(args.inactivo_s)
+    gateway.cargar()
+    try:
+        ejecutar(args.puerto, args.baudios, gateway, args.lote_ms)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
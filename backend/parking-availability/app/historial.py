@@ -0,0 +1,146 @@
+"""
+Historial de estados de los estacionamientos
+(migración 006_estacionamiento_estado_cambio.sql).
+
+Un trigger agrega cada cambio de estado a estacionamiento_estado_cambio.
+Para consultar el estado a una hora T se parte de la última foto
+(estacionamiento_estado_snapshot) anterior a T y se aplican solo los cambios
+entre la foto y T, así el costo depende del intervalo entre fotos y no del
+largo del historial. Un hilo del servicio toma una foto nueva cada
+INTERVALO_SNAPSHOT_S segundos si hubo cambios.
+"""
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .db import SessionLocal
+from .models import EstacionamientoEstadoCambio as Cambio
+from .models import EstacionamientoEstadoSnapshot as Snapshot
+
+INTERVALO_SNAPSHOT_S = int(os.getenv("INTERVALO_SNAPSHOT_S", "3600"))
+# Un cambio con hora anterior a la foto puede confirmarse después de
+# tomarla; la foto se toma con este margen hacia atrás.
+MARGEN_SNAPSHOT = timedelta(seconds=60)
+
+ETIQUETAS = {0: "libre", 1: "ocupado", 2: "pendiente"}
+
+
+def con_zona(hora: datetime) -> datetime:
+    """Las horas sin zona se interpretan en la hora local del servidor."""
+    return hora if hora.tzinfo else hora.astimezone()
+
+
+def ultimo_snapshot(db: Session, hora: datetime) -> Snapshot | None:
+    return (
+        db.query(Snapshot)
+        .filter(Snapshot.hora <= hora)
+        .order_by(Snapshot.hora.desc())
+        .first()
+    )
+
+
+def estados_en(db: Session, hora: datetime, numero: int | None = None) -> dict[int, dict] | None:
+    """
+    Estado de cada estacionamiento (o solo de `numero`) a la hora `hora`:
+    {numero: {"estado": int, "desde": datetime}}. None si `hora` es anterior
+    al inicio del historial.
+    """
+    snapshot = ultimo_snapshot(db, hora)
+    if snapshot is None:
+        return None
+
+    estados = {
+        int(n): {"estado": e["estado"], "desde": datetime.fromisoformat(e["desde"])}
+        for n, e in snapshot.estados.items()
+        if numero is None or int(n) == numero
+    }
+    cambios = db.query(Cambio).filter(Cambio.hora > snapshot.hora, Cambio.hora <= hora)
+    if numero is not None:
+        cambios = cambios.filter(Cambio.estacionamiento_numero == numero)
+    for c in cambios.order_by(Cambio.hora, Cambio.id):
+        estados[c.estacionamiento_numero] = {"estado": c.estado, "desde": c.hora}
+    return estados
+
+
+def linea_de_tiempo(db: Session, numero: int, desde: datetime, hasta: datetime) -> list[dict] | None:
+    """
+    Tramos [{"estado", "desde", "hasta"}] del estacionamiento `numero` entre
+    `desde` y `hasta` (recortados al rango). None si no hay historial.
+    """
+    inicial = estados_en(db, desde, numero)
+    if inicial is None:
+        return None
+
+    tramos = []
+    actual = inicial.get(numero)
+    inicio = desde
+    cambios = (
+        db.query(Cambio)
+        .filter(Cambio.estacionamiento_numero == numero, Cambio.hora > desde, Cambio.hora <= hasta)
+        .order_by(Cambio.hora, Cambio.id)
+    )
+    for c in cambios:
+        if actual is not None:
+            tramos.append({"estado": actual["estado"], "desde": inicio, "hasta": c.hora})
+        actual = {"estado": c.estado, "desde": c.hora}
+        inicio = c.hora
+    if actual is not None:
+        tramos.append({"estado": actual["estado"], "desde": inicio, "hasta": hasta})
+    return tramos
+
+
+def crear_snapshot(db: Session) -> Snapshot | None:
+    """
+    Guarda una foto del estado completo si la última tiene más de
+    INTERVALO_SNAPSHOT_S segundos y hubo cambios desde entonces.
+    """
+    # Con varios workers solo uno toma la foto
+    if not db.execute(text("SELECT pg_try_advisory_xact_lock(hashtext('estacionamiento_estado_snapshot'))")).scalar():
+        return None
+
+    hora = datetime.now(timezone.utc) - MARGEN_SNAPSHOT
+    ultimo = ultimo_snapshot(db, hora)
+    if ultimo is not None:
+        if hora - ultimo.hora < timedelta(seconds=INTERVALO_SNAPSHOT_S):
+            return None
+        hubo_cambios = db.query(
+            db.query(Cambio).filter(Cambio.hora > ultimo.hora, Cambio.hora <= hora).exists()
+        ).scalar()
+        if not hubo_cambios:
+            return None
+
+    estados = estados_en(db, hora) or {}
+    snapshot = Snapshot(
+        hora=hora,
+        estados={str(n): {"estado": e["estado"], "desde": e["desde"].isoformat()} for n, e in estados.items()},
+    )
+    db.add(snapshot)
+    db.commit()
+    return snapshot
+
+
+_detener = threading.Event()
+
+
+def _bucle_snapshots():
+    while not _detener.wait(min(INTERVALO_SNAPSHOT_S, 300)):
+        db = SessionLocal()
+        try:
+            crear_snapshot(db)
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ No se pudo guardar la foto de estados: {e}")
+        finally:
+            db.close()
+
+
+def iniciar_snapshots():
+    _detener.clear()
+    threading.Thread(target=_bucle_snapshots, name="snapshots-estados", daemon=True).start()
+
+
+def detener_snapshots():
+    _detener.set()
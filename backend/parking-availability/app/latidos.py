@@ -0,0 +1,63 @@
+"""
+Latidos de los sensores con una rueda de temporizadores.
+
+Cada sensor tiene un plazo (último latido + silencio permitido). Los plazos
+se guardan en una rueda de ranuras de `resolucion_s` segundos que cubre todo
+el silencio permitido: un latido mueve el sensor a su nueva ranura y cada
+avance de la rueda solo mira las ranuras que vencieron desde el anterior.
+Registrar un latido y detectar un vencimiento cuesta O(1), sin recorrer
+todos los sensores.
+"""
+import math
+import time
+
+
+class RuedaLatidos:
+    def __init__(self, silencio_s: float, resolucion_s: float = 1.0, reloj=time.monotonic):
+        self.resolucion_s = resolucion_s
+        self.reloj = reloj
+        self.ticks_silencio = max(1, math.ceil(silencio_s / resolucion_s))
+        self.ranuras: list[set[int]] = [set() for _ in range(self.ticks_silencio + 1)]
+        self.plazos: dict[int, int] = {}     # sensor -> tick en que vence
+        self.tick = self._tick_actual()
+        # Sensores que ya llegaron vencidos (p. ej. al cargar los guardados)
+        self.atrasados: set[int] = set()
+
+    def _tick_actual(self) -> int:
+        return math.floor(self.reloj() / self.resolucion_s)
+
+    def _quitar(self, sensor: int):
+        plazo = self.plazos.pop(sensor, None)
+        if plazo is not None:
+            self.ranuras[plazo % len(self.ranuras)].discard(sensor)
+        self.atrasados.discard(sensor)
+
+    def latido(self, sensor: int, hace_s: float = 0.0):
+        """Registra un latido (de hace `hace_s` segundos)."""
+        self._quitar(sensor)
+        plazo = self._tick_actual() - math.floor(hace_s / self.resolucion_s) + self.ticks_silencio
+        if plazo <= self.tick:
+            self.atrasados.add(sensor)
+            return
+        self.plazos[sensor] = plazo
+        self.ranuras[plazo % len(self.ranuras)].add(sensor)
+
+    def olvidar(self, sensor: int):
+        self._quitar(sensor)
+
+    def avanzar(self) -> set[int]:
+        """Sensores cuyo plazo venció desde el último avance (salen de la rueda)."""
+        ahora = self._tick_actual()
+        vencidos, self.atrasados = self.atrasados, set()
+        # Tras una pausa larga basta con recorrer la rueda una vez
+        for tick in range(max(self.tick + 1, ahora - len(self.ranuras) + 1), ahora + 1):
+            ranura = self.ranuras[tick % len(self.ranuras)]
+            for sensor in [s for s in ranura if self.plazos[s] <= ahora]:
+                ranura.discard(sensor)
+                del self.plazos[sensor]
+                vencidos.add(sensor)
+        self.tick = max(self.tick, ahora)
+        return vencidos
+
+    def __len__(self) -> int:
+        return len(self.plazos)
@@ -1,5 +1,8 @@
 from fastapi import FastAPI
 from app.routers import router
+from app.historial import detener_snapshots, iniciar_snapshots
+from app.estado import CONSULTA, estado_estacionamientos
+from app.db import calentar
 from fastapi.middleware.cors import CORSMiddleware
 
 app = FastAPI(title="Backend Parking Availability API")
@@ -18,6 +21,27 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+@app.on_event("startup")
+def calentar_conexiones():
+    # Antes de recibir tráfico (ver comun/servidor.py)
+    calentar((CONSULTA,))
+
+@app.on_event("startup")
+def arrancar_snapshots():
+    iniciar_snapshots()
+
+@app.on_event("startup")
+def escuchar_estados():
+    estado_estacionamientos.iniciar()
+
+@app.on_event("shutdown")
+def parar_snapshots():
+    detener_snapshots()
+
+@app.on_event("shutdown")
+def dejar_de_escuchar_estados():
+    estado_estacionamientos.detener()
+
 @app.get("/")
 def root():
     return {"message": "API Web funcionando 🚀"}
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, TIMESTAMP
+from sqlalchemy import BigInteger, Boolean, Column, Float, Integer, SmallInteger, TIMESTAMP
+from sqlalchemy.dialects.postgresql import JSONB
 from .db import Base
 
 class EstacionamientoEstado(Base):
@@ -7,3 +8,31 @@ class EstacionamientoEstado(Base):
     estacionamiento_numero = Column(Integer, primary_key=True, index=True)
     estado = Column(Integer, nullable=False)  
     updated_at = Column(TIMESTAMP, nullable=False)
+
+class EstacionamientoEstadoCambio(Base):
+    __tablename__ = "estacionamiento_estado_cambio"
+
+    id = Column(BigInteger, primary_key=True)
+    estacionamiento_numero = Column(Integer, nullable=False)
+    estado = Column(SmallInteger, nullable=False)
+    hora = Column(TIMESTAMP(timezone=True), nullable=False)
+
+class EstacionamientoEstadoSnapshot(Base):
+    __tablename__ = "estacionamiento_estado_snapshot"
+
+    id = Column(BigInteger, primary_key=True)
+    hora = Column(TIMESTAMP(timezone=True), nullable=False, unique=True)
+    estados = Column(JSONB, nullable=False)
+
+class SensorLora(Base):
+    __tablename__ = "sensor_lora"
+
+    estacionamiento_numero = Column(Integer, primary_key=True)
+    ultimo_visto = Column(TIMESTAMP(timezone=True), nullable=False)
+    secuencia = Column(Integer, nullable=False)
+    rssi = Column(SmallInteger)
+    snr = Column(Float)
+    paquetes = Column(BigInteger, nullable=False)
+    perdidos = Column(BigInteger, nullable=False)
+    duplicados = Column(BigInteger, nullable=False)
+    inactivo = Column(Boolean, nullable=False)
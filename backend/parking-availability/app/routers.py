@@ -1,7 +1,12 @@
+from datetime import datetime, timedelta, timezone
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from .db import SessionLocal
-from .models import EstacionamientoEstado
+from .db import SessionLocal, get_db_lectura
+from .estado import ETIQUETAS as ETIQUETAS_ESTADO, estado_estacionamientos
+from .gateway_lora import INACTIVO_S
+from .models import SensorLora
+from .historial import ETIQUETAS, con_zona, estados_en, linea_de_tiempo
+from comun.respuestas import CacheRespuesta, RespuestaJSON
 
 router = APIRouter()
 
@@ -17,29 +22,119 @@ def get_db():
 async def health():
     return {"ok": True}
 
-@router.get("/estados")
-def list_estados(db: Session = Depends(get_db)):
-    rows = db.query(EstacionamientoEstado).all()
-    return [
-        {
-            "estacionamiento_numero": r.estacionamiento_numero,
-            "estado": r.estado,
-            "estado_label": {0: "libre", 1: "ocupado", 2: "pendiente"}.get(r.estado, "desconocido"),
-            "updated_at": r.updated_at,
-        }
-        for r in rows
-    ]
+def _estado(e: dict) -> dict:
+    return {
+        "estacionamiento_numero": e["id"],
+        "estado": e["estado"],
+        "estado_label": e["estado_label"],
+        "updated_at": e["desde"],
+    }
+
+# Cuerpos ya serializados de las vistas del estado canónico, por versión
+_estados = CacheRespuesta()
+_resumen = CacheRespuesta()
+
+@router.get("/estados", response_class=RespuestaJSON)
+def list_estados():
+    actual = estado_estacionamientos.leer()
+    return _estados.obtener(actual["version"], lambda: [_estado(e) for e in actual["estados"]])
+
+def _resumen_estados(estados: list[dict]) -> dict:
+    cantidades = {etiqueta: 0 for etiqueta in ETIQUETAS_ESTADO.values()}
+    for e in estados:
+        cantidades[e["estado_label"]] += 1
+    return cantidades
+
+@router.get("/estados/resumen", response_class=RespuestaJSON)
+def resumen_estados():
+    """
+    Cantidad de estacionamientos por estado canónico. 'desconocido' son los
+    de sensor LoRa inactivo: no se cuentan como libres ni como ocupados.
+    """
+    actual = estado_estacionamientos.leer()
+    return _resumen.obtener(actual["version"], lambda: _resumen_estados(actual["estados"]))
 
 @router.get("/estados/{numero}")
-def get_estado(numero: int, db: Session = Depends(get_db)):
-    row = db.query(EstacionamientoEstado).filter(
-        EstacionamientoEstado.estacionamiento_numero == numero
-    ).first()
-    if not row:
-        raise HTTPException(status_code=404, detail="Estacionamiento no encontrado")
+def get_estado(numero: int):
+    for e in estado_estacionamientos.leer()["estados"]:
+        if e["id"] == numero:
+            return _estado(e)
+    raise HTTPException(status_code=404, detail="Estacionamiento no encontrado")
+
+@router.get("/sensores")
+def list_sensores(db: Session = Depends(get_db_lectura)):
+    """
+    Sensores LoRa con su última señal (app/gateway_lora.py). Un sensor está
+    inactivo si el gateway lo marcó o si no se escucha hace más de
+    LORA_INACTIVO_S segundos (p. ej. porque el gateway mismo se detuvo).
+    """
+    ahora = datetime.now(timezone.utc)
+    sensores = []
+    for s in db.query(SensorLora).order_by(SensorLora.estacionamiento_numero):
+        silencio = (ahora - s.ultimo_visto).total_seconds()
+        sensores.append({
+            "estacionamiento_numero": s.estacionamiento_numero,
+            "ultimo_visto": s.ultimo_visto,
+            "segundos_sin_reportar": round(silencio),
+            "rssi": s.rssi,
+            "snr": s.snr,
+            "paquetes": s.paquetes,
+            "perdidos": s.perdidos,
+            "duplicados": s.duplicados,
+            "inactivo": s.inactivo or silencio > INACTIVO_S,
+        })
+    return {"inactivos": sum(s["inactivo"] for s in sensores), "sensores": sensores}
+
+@router.get("/historial")
+def estados_historicos(hora: datetime, db: Session = Depends(get_db_lectura)):
+    """Estado de todos los estacionamientos a la hora indicada."""
+    hora = con_zona(hora)
+    estados = estados_en(db, hora)
+    if estados is None:
+        raise HTTPException(status_code=404, detail="No hay historial para esa hora")
+    return {
+        "hora": hora,
+        "estados": [
+            {
+                "estacionamiento_numero": numero,
+                "estado": e["estado"],
+                "estado_label": ETIQUETAS.get(e["estado"], "desconocido"),
+                "desde": e["desde"],
+            }
+            for numero, e in sorted(estados.items())
+        ],
+    }
+
+@router.get("/estados/{numero}/historial")
+def historial_estacionamiento(
+    numero: int,
+    desde: datetime | None = None,
+    hasta: datetime | None = None,
+    db: Session = Depends(get_db_lectura),
+):
+    """
+    Línea de tiempo de un estacionamiento (por defecto las últimas 24 horas):
+    tramos con su estado y duración, y minutos totales por estado.
+    """
+    hasta = con_zona(hasta) if hasta else datetime.now().astimezone()
+    desde = con_zona(desde) if desde else hasta - timedelta(hours=24)
+    if desde >= hasta:
+        raise HTTPException(status_code=400, detail="desde debe ser anterior a hasta")
+
+    tramos = linea_de_tiempo(db, numero, desde, hasta)
+    if tramos is None:
+        raise HTTPException(status_code=404, detail="No hay historial para ese rango")
+
+    minutos_por_estado = {}
+    for t in tramos:
+        t["estado_label"] = ETIQUETAS.get(t["estado"], "desconocido")
+        t["minutos"] = round((t["hasta"] - t["desde"]).total_seconds() / 60, 1)
+        minutos_por_estado[t["estado_label"]] = round(minutos_por_estado.get(t["estado_label"], 0) + t["minutos"], 1)
+
     return {
-        "estacionamiento_numero": row.estacionamiento_numero,
-        "estado": row.estado,
-        "estado_label": {0: "libre", 1: "ocupado", 3: "pendiente"}.get(row.estado, "desconocido"),
-        "updated_at": row.updated_at,
+        "estacionamiento_numero": numero,
+        "desde": desde,
+        "hasta": hasta,
+        "tramos": tramos,
+        "minutos_por_estado": minutos_por_estado,
     }
@@ -0,0 +1,121 @@
+"""
+Benchmark y verificación del estado a una hora T (app/historial.py).
+
+Carga un mes sintético de `--cambios` cambios de estado sobre
+`--estacionamientos` estacionamientos (en enero de 2000, antes de cualquier
+historial real) y, en `--consultas` horas al azar, mide estados_en:
+
+- solo con la foto inicial del mes: recorre todos los cambios hasta T;
+- con fotos diarias: solo los cambios desde la medianoche anterior.
+
+Cada resultado se compara con un DISTINCT ON por estacionamiento sobre todo
+el historial, que también se mide. Todo corre en una transacción que se
+deshace al final: la base queda como estaba.
+
+    python bench_historial.py --cambios 50000 --estacionamientos 50 --consultas 20
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from app.db import SessionLocal
+from app.historial import estados_en
+from app.models import EstacionamientoEstadoSnapshot as Snapshot
+
+INICIO = datetime(2000, 1, 1, tzinfo=timezone.utc)
+DIAS = 30
+
+FUERZA_BRUTA = """
+    SELECT DISTINCT ON (estacionamiento_numero) estacionamiento_numero, estado, hora
+    FROM estacionamiento_estado_cambio
+    WHERE hora <= :hora
+    ORDER BY estacionamiento_numero, hora DESC, id DESC
+"""
+
+
+def cargar(db, cambios: int, estacionamientos: int):
+    db.execute(text("SELECT setseed(0.5)"))
+    # Como la migración 006: el estado inicial es el primer cambio y la primera foto
+    db.execute(text("""
+        INSERT INTO estacionamiento_estado_cambio (estacionamiento_numero, estado, hora)
+        SELECT n, 0, :inicio FROM generate_series(1, :estacionamientos) AS n
+    """), {"inicio": INICIO, "estacionamientos": estacionamientos})
+    db.execute(text("""
+        INSERT INTO estacionamiento_estado_cambio (estacionamiento_numero, estado, hora)
+        SELECT 1 + floor(random() * :estacionamientos)::int,
+               floor(random() * 3)::int,
+               :inicio + random() * make_interval(days => :dias)
+        FROM generate_series(1, :cambios)
+    """), {"inicio": INICIO, "estacionamientos": estacionamientos, "cambios": cambios, "dias": DIAS})
+    db.add(Snapshot(
+        hora=INICIO,
+        estados={str(n): {"estado": 0, "desde": INICIO.isoformat()} for n in range(1, estacionamientos + 1)},
+    ))
+    db.flush()
+    db.execute(text("ANALYZE estacionamiento_estado_cambio"))
+
+
+def fotos_diarias(db):
+    """Una foto por medianoche, armada como crear_snapshot."""
+    for dia in range(1, DIAS + 1):
+        hora = INICIO + timedelta(days=dia)
+        estados = estados_en(db, hora)
+        db.add(Snapshot(
+            hora=hora,
+            estados={str(n): {"estado": e["estado"], "desde": e["desde"].isoformat()} for n, e in estados.items()},
+        ))
+        db.flush()
+
+
+def fuerza_bruta(db, hora: datetime) -> dict[int, dict]:
+    return {
+        r.estacionamiento_numero: {"estado": r.estado, "desde": r.hora}
+        for r in db.execute(text(FUERZA_BRUTA), {"hora": hora})
+    }
+
+
+def medir(nombre: str, funcion, horas: list[datetime]) -> list[dict]:
+    resultados = []
+    inicio = time.perf_counter()
+    for hora in horas:
+        resultados.append(funcion(hora))
+    ms = (time.perf_counter() - inicio) / len(horas) * 1e3
+    print(f"{nombre:34s} {ms:9.2f} ms/consulta")
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estado a una hora T: fotos + cambios vs todo el historial")
+    parser.add_argument("--cambios", type=int, default=50000)
+    parser.add_argument("--estacionamientos", type=int, default=50)
+    parser.add_argument("--consultas", type=int, default=20)
+    args = parser.parse_args()
+
+    random.seed(1)
+    horas = [INICIO + timedelta(seconds=random.uniform(3600, DIAS * 86400)) for _ in range(args.consultas)]
+
+    db = SessionLocal()
+    try:
+        cargar(db, args.cambios, args.estacionamientos)
+        print(f"{args.cambios} cambios en {DIAS} días, {args.estacionamientos} estacionamientos, "
+              f"{args.consultas} horas al azar")
+
+        esperados = medir("DISTINCT ON sobre el historial", lambda h: fuerza_bruta(db, h), horas)
+        sin_fotos = medir("estados_en, solo la foto inicial", lambda h: estados_en(db, h), horas)
+        fotos_diarias(db)
+        con_fotos = medir("estados_en, fotos diarias", lambda h: estados_en(db, h), horas)
+
+        distintos = sum(a != e or b != e for a, b, e in zip(sin_fotos, con_fotos, esperados))
+        if distintos:
+            raise SystemExit(f"⚠️ {distintos} de {len(horas)} horas no coinciden con el DISTINCT ON")
+        print(f"✅ Las {len(horas)} horas coinciden con el DISTINCT ON")
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Clasificación libre/ocupado de los estacionamientos vistos por una cámara.
+
+Los polígonos de los estacionamientos se rasterizan una sola vez en una
+imagen de etiquetas (cada píxel guarda el índice de su estacionamiento, -1
+fuera de todos) a la resolución de trabajo. Por frame se calculan dos
+estadísticas por píxel y se suman por estacionamiento con un solo
+`np.bincount`, así el costo depende de los píxeles cubiertos y no de la
+cantidad de estacionamientos:
+
+- `cambio`: fracción de píxeles que difieren de la referencia (foto del
+  estacionamiento vacío) en algún canal de color; en gris un auto rojo
+  puede quedar casi igual al pavimento. La referencia se adapta lentamente en los
+  estacionamientos libres para seguir los cambios de luz.
+- `bordes`: densidad de bordes (Canny); un auto tiene muchos más bordes que
+  el pavimento. Se usa sola cuando no hay referencia.
+
+Si el monitor recibe además cajas de un detector de vehículos, la fracción
+de cada estacionamiento que cubren (ver `geometria.py`) es una tercera
+señal para marcarlo ocupado.
+
+Con histéresis (umbral para ocupar mayor que para liberar) y un mínimo de
+frames consecutivos antes de aceptar un cambio, un auto que pasa por
+delante no cambia el estado.
+"""
+from dataclasses import dataclass, field
+
+import cv2
+import numpy as np
+
+from .geometria import GrillaEspacios
+
+ESTADO_LIBRE = 0
+ESTADO_OCUPADO = 1
+
+
+@dataclass
+class ConfigEspacio:
+    numero: int
+    # Vértices como fracciones [x, y] del ancho/alto del frame
+    poligono: list[list[float]]
+
+    def __post_init__(self):
+        if len(self.poligono) < 3:
+            raise ValueError(f"Polígono inválido para el estacionamiento {self.numero}")
+
+
+@dataclass
+class ParametrosClasificacion:
+    lado_max: int = 640
+    umbral_diferencia: int = 30     # diferencia (0-255) en algún canal para contar un píxel como cambiado
+    umbral_ocupar: float = 0.35     # fracción de píxeles cambiados para pasar a ocupado
+    umbral_liberar: float = 0.20    # ... y para volver a libre
+    umbral_bordes_ocupar: float = 0.12
+    umbral_bordes_liberar: float = 0.06
+    frames_confirmacion: int = 3
+    umbral_cajas_ocupar: float = 0.4    # fracción cubierta por cajas de vehículos
+    umbral_cajas_liberar: float = 0.15
+    adaptacion_referencia: float = 0.02
+    canny: list[int] = field(default_factory=lambda: [80, 160])
+
+
+class ClasificadorEspacios:
+    def __init__(
+        self,
+        espacios: list[ConfigEspacio],
+        tamano_frame: tuple[int, int],
+        parametros: ParametrosClasificacion | None = None,
+        referencia: np.ndarray | None = None,
+    ):
+        """`tamano_frame` es (ancho, alto) del stream; `referencia` un frame BGR del estacionamiento vacío."""
+        self.p = parametros or ParametrosClasificacion()
+        self.numeros = np.array([e.numero for e in espacios])
+        if len(set(self.numeros.tolist())) != len(self.numeros):
+            raise ValueError("Hay estacionamientos repetidos en la cámara")
+
+        ancho, alto = tamano_frame
+        escala = min(1.0, self.p.lado_max / max(ancho, alto))
+        self.tamano = (max(1, round(ancho * escala)), max(1, round(alto * escala)))
+
+        # Imagen de etiquetas; si dos polígonos se tocan, el píxel queda en el último
+        etiquetas = np.full((self.tamano[1], self.tamano[0]), -1, dtype=np.int32)
+        for i, e in enumerate(espacios):
+            puntos = np.round(np.array(e.poligono, dtype=np.float64) * self.tamano).astype(np.int32)
+            cv2.fillPoly(etiquetas, [puntos], i)
+        self.pixeles = np.flatnonzero(etiquetas.ravel() >= 0)
+        self.etiqueta_pixel = etiquetas.ravel()[self.pixeles]
+        self.area = np.bincount(self.etiqueta_pixel, minlength=len(espacios)).astype(np.float64)
+        if not self.area.all():
+            vacios = self.numeros[self.area == 0].tolist()
+            raise ValueError(f"Estacionamientos sin píxeles a esta resolución: {vacios}")
+
+        self.tamano_frame = tamano_frame
+        self.grilla = GrillaEspacios(self.numeros.tolist(), [e.poligono for e in espacios])
+
+        self.referencia = None
+        self._color_actual: np.ndarray | None = None
+        if referencia is not None:
+            self.referencia = self._pixeles_color(self._escalar(referencia)).astype(np.float32)
+
+        self.estados = np.full(len(espacios), ESTADO_LIBRE, dtype=np.int8)
+        self.candidatos = self.estados.copy()
+        self.confirmaciones = np.zeros(len(espacios), dtype=np.int32)
+        self.inicializado = False
+
+    def _escalar(self, frame: np.ndarray) -> np.ndarray:
+        if (frame.shape[1], frame.shape[0]) != self.tamano:
+            frame = cv2.resize(frame, self.tamano, interpolation=cv2.INTER_AREA)
+        return frame if frame.ndim == 3 else cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+
+    def _pixeles_color(self, frame: np.ndarray) -> np.ndarray:
+        return frame.reshape(-1, 3)[self.pixeles]
+
+    def _por_espacio(self, valores: np.ndarray) -> np.ndarray:
+        return np.bincount(self.etiqueta_pixel, weights=valores, minlength=len(self.area)) / self.area
+
+    def medir(self, frame: np.ndarray) -> tuple[np.ndarray | None, np.ndarray]:
+        """(fracción de píxeles cambiados o None sin referencia, densidad de bordes) por estacionamiento."""
+        frame = self._escalar(frame)
+        gris = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        bordes = cv2.Canny(gris, *self.p.canny).ravel()[self.pixeles] > 0
+        densidad = self._por_espacio(bordes)
+        self._color_actual = None
+        if self.referencia is None:
+            return None, densidad
+
+        valores = self._pixeles_color(frame).astype(np.float32)
+        cambiados = (np.abs(valores - self.referencia) > self.p.umbral_diferencia).any(axis=1)
+        self._color_actual = valores
+        return self._por_espacio(cambiados), densidad
+
+    def clasificar(self, frame: np.ndarray, cajas=None) -> dict[int, int]:
+        """
+        Actualiza los estados con un frame y devuelve {numero: estado} de los
+        que cambiaron. `cajas` (opcional) son detecciones [x1, y1, x2, y2] en
+        píxeles del frame original.
+        """
+        cambio, densidad = self.medir(frame)
+        ocupar = densidad >= self.p.umbral_bordes_ocupar
+        liberar = densidad < self.p.umbral_bordes_liberar
+        if cambio is not None:
+            ocupar |= cambio >= self.p.umbral_ocupar
+            liberar &= cambio < self.p.umbral_liberar
+        if cajas is not None:
+            ancho, alto = self.tamano_frame
+            cobertura = self.grilla.cobertura(
+                (x1 / ancho, y1 / alto, x2 / ancho, y2 / alto) for x1, y1, x2, y2 in cajas
+            )
+            ocupar |= cobertura >= self.p.umbral_cajas_ocupar
+            liberar &= cobertura < self.p.umbral_cajas_liberar
+        propuesto = np.where(
+            ocupar, ESTADO_OCUPADO, np.where(liberar, ESTADO_LIBRE, self.estados)
+        ).astype(np.int8)
+
+        if not self.inicializado:
+            # El primer frame define el estado sin esperar confirmación
+            self.estados = propuesto
+            self.inicializado = True
+            self._adaptar_referencia()
+            return dict(zip(self.numeros.tolist(), self.estados.tolist()))
+
+        distinto = propuesto != self.estados
+        seguido = distinto & (propuesto == self.candidatos)
+        self.confirmaciones = np.where(seguido, self.confirmaciones + 1, np.where(distinto, 1, 0))
+        self.candidatos = np.where(distinto, propuesto, self.estados).astype(np.int8)
+
+        cambian = self.confirmaciones >= self.p.frames_confirmacion
+        self.estados = np.where(cambian, self.candidatos, self.estados).astype(np.int8)
+        self.confirmaciones[cambian] = 0
+        self._adaptar_referencia()
+        return dict(zip(self.numeros[cambian].tolist(), self.estados[cambian].tolist()))
+
+    def _adaptar_referencia(self):
+        if self.referencia is None or self._color_actual is None:
+            return
+        libres = (self.estados == ESTADO_LIBRE)[self.etiqueta_pixel]
+        a = self.p.adaptacion_referencia
+        self.referencia[libres] += a * (self._color_actual[libres] - self.referencia[libres])
@@ -0,0 +1,158 @@
+"""
+Geometría de los estacionamientos para asociar detecciones (cajas de
+vehículos) a estacionamientos.
+
+Al iniciar se arma una grilla uniforme sobre los polígonos: cada celda
+guarda los estacionamientos cuya caja envolvente la toca. El lado de la
+celda es el tamaño típico (mediana) de un estacionamiento, así cada caja de
+vehículo toca pocas celdas y trae pocos candidatos, sin importar cuántos
+estacionamientos cubra la cámara. Solo a los candidatos se les calcula el
+área exacta de intersección (recorte del polígono contra la caja).
+
+Polígonos y cajas usan las mismas coordenadas (fracciones del frame en la
+configuración del monitor).
+"""
+import math
+from collections import defaultdict
+
+import numpy as np
+
+
+def area_poligono(puntos: list[tuple[float, float]]) -> float:
+    """Área (fórmula del zapatero) de un polígono simple."""
+    n = len(puntos)
+    if n < 3:
+        return 0.0
+    return abs(sum(
+        puntos[i][0] * puntos[(i + 1) % n][1] - puntos[(i + 1) % n][0] * puntos[i][1]
+        for i in range(n)
+    )) / 2
+
+
+def _recortar(puntos, dentro, cortar):
+    """Un paso de Sutherland-Hodgman contra un semiplano."""
+    resultado = []
+    for i, actual in enumerate(puntos):
+        anterior = puntos[i - 1]
+        if dentro(actual):
+            if not dentro(anterior):
+                resultado.append(cortar(anterior, actual))
+            resultado.append(actual)
+        elif dentro(anterior):
+            resultado.append(cortar(anterior, actual))
+    return resultado
+
+
+def area_interseccion(
+    puntos: list[tuple[float, float]],
+    caja: tuple[float, float, float, float],
+    envolvente: tuple[float, float, float, float] | None = None,
+) -> float:
+    """
+    Área del polígono (convexo o no) que queda dentro de la caja [x1, y1, x2, y2].
+    Con la caja envolvente del polígono se omiten los bordes que no lo cortan.
+    """
+    x1, y1, x2, y2 = caja
+    ex1, ey1, ex2, ey2 = envolvente or (-math.inf, -math.inf, math.inf, math.inf)
+
+    def en_x(a, b, x):
+        return (x, a[1] + (b[1] - a[1]) * (x - a[0]) / (b[0] - a[0]))
+
+    def en_y(a, b, y):
+        return (a[0] + (b[0] - a[0]) * (y - a[1]) / (b[1] - a[1]), y)
+
+    for corta, dentro, cortar in (
+        (ex1 < x1, lambda p: p[0] >= x1, lambda a, b: en_x(a, b, x1)),
+        (ex2 > x2, lambda p: p[0] <= x2, lambda a, b: en_x(a, b, x2)),
+        (ey1 < y1, lambda p: p[1] >= y1, lambda a, b: en_y(a, b, y1)),
+        (ey2 > y2, lambda p: p[1] <= y2, lambda a, b: en_y(a, b, y2)),
+    ):
+        if not corta:
+            continue
+        puntos = _recortar(puntos, dentro, cortar)
+        if not puntos:
+            return 0.0
+    return area_poligono(puntos)
+
+
+class GrillaEspacios:
+    def __init__(self, numeros: list[int], poligonos: list[list[list[float]]], celda: float | None = None):
+        self.numeros = list(numeros)
+        self.poligonos = [[tuple(p) for p in poligono] for poligono in poligonos]
+        self.areas = np.array([area_poligono(p) for p in self.poligonos])
+        self._areas = self.areas.tolist()
+        self.envolventes = np.array([
+            [min(x for x, _ in p), min(y for _, y in p), max(x for x, _ in p), max(y for _, y in p)]
+            for p in self.poligonos
+        ])
+        if celda is None:
+            lados = np.maximum(self.envolventes[:, 2] - self.envolventes[:, 0],
+                               self.envolventes[:, 3] - self.envolventes[:, 1])
+            celda = float(np.median(lados)) if len(lados) else 1.0
+        self.celda = celda or 1.0
+        # Tuplas para las comparaciones por candidato (más rápidas que escalares de NumPy)
+        self._envolventes = [tuple(e) for e in self.envolventes.tolist()]
+
+        self.celdas: dict[tuple[int, int], list[int]] = defaultdict(list)
+        for i, (ex1, ey1, ex2, ey2) in enumerate(self._envolventes):
+            for cx in range(self._indice(ex1), self._indice(ex2) + 1):
+                for cy in range(self._indice(ey1), self._indice(ey2) + 1):
+                    self.celdas[(cx, cy)].append(i)
+        self.celdas = dict(self.celdas)
+        # Una caja enorme solo recorre las celdas que existen
+        if self.celdas:
+            xs, ys = zip(*self.celdas)
+            self.rango = (min(xs), min(ys), max(xs), max(ys))
+        else:
+            self.rango = (0, 0, -1, -1)
+
+    def _indice(self, v: float) -> int:
+        return math.floor(v / self.celda)
+
+    def candidatos(self, caja: tuple[float, float, float, float]) -> set[int]:
+        """Índices de los estacionamientos cuya caja envolvente puede tocar `caja`."""
+        x1, y1, x2, y2 = caja
+        rx1, ry1, rx2, ry2 = self.rango
+        encontrados = set()
+        for cx in range(max(self._indice(x1), rx1), min(self._indice(x2), rx2) + 1):
+            for cy in range(max(self._indice(y1), ry1), min(self._indice(y2), ry2) + 1):
+                encontrados.update(self.celdas.get((cx, cy), ()))
+        return encontrados
+
+    def intersecciones(self, caja: tuple[float, float, float, float]) -> dict[int, float]:
+        """{índice: fracción del estacionamiento cubierta por la caja} de los que toca."""
+        x1, y1, x2, y2 = caja
+        resultado = {}
+        for i in self.candidatos(caja):
+            ex1, ey1, ex2, ey2 = self._envolventes[i]
+            if ex1 >= x2 or ex2 <= x1 or ey1 >= y2 or ey2 <= y1:
+                continue
+            if x1 <= ex1 and y1 <= ey1 and x2 >= ex2 and y2 >= ey2:
+                resultado[i] = 1.0
+                continue
+            area = area_interseccion(self.poligonos[i], caja, self._envolventes[i])
+            if area > 0:
+                resultado[i] = area / self._areas[i]
+        return resultado
+
+    def asignar(self, cajas, minimo: float = 0.3) -> list[int | None]:
+        """
+        Estacionamiento de cada caja: el que más cubre, si cubre al menos
+        `minimo` de su área; None si la caja no está sobre ninguno.
+        """
+        asignados = []
+        for caja in cajas:
+            fracciones = self.intersecciones(caja)
+            mejor = max(fracciones, key=fracciones.get, default=None)
+            asignados.append(
+                self.numeros[mejor] if mejor is not None and fracciones[mejor] >= minimo else None
+            )
+        return asignados
+
+    def cobertura(self, cajas) -> np.ndarray:
+        """Fracción de cada estacionamiento cubierta por las cajas (suma, tope 1)."""
+        total = np.zeros(len(self.numeros))
+        for caja in cajas:
+            for i, fraccion in self.intersecciones(caja).items():
+                total[i] += fraccion
+        return np.minimum(total, 1.0)
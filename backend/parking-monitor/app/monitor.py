@@ -0,0 +1,247 @@
+"""
+Monitor de ocupación por cámara.
+
+Cada cámara del archivo de configuración tiene un hilo que lee el stream de
+forma continua (para no acumular retraso) y cada `intervalo_s` segundos
+clasifica todos sus estacionamientos con `ClasificadorEspacios`. Solo los
+estacionamientos que cambiaron se escriben en estacionamiento.ocupado (del
+que se deriva el estado canónico, migración 008) y en estacionamiento_estado
+(la tabla que también actualizan los sensores).
+
+Formato del archivo (ver `espacios.example.json`):
+
+    {
+      "intervalo_stats_s": 60,
+      "detector": {"modelo": "modelos/vehiculos.onnx", "conf": 0.5},
+      "camaras": [
+        {"id": "patio-norte", "url": "rtsp://...", "intervalo_s": 2,
+         "referencia": "referencias/patio-norte.jpg",
+         "parametros": {"umbral_ocupar": 0.35},
+         "espacios": [{"numero": 1, "poligono": [[0.05, 0.6], ...]}]}
+      ]
+    }
+
+Los polígonos se expresan como fracciones del ancho/alto del frame y
+`referencia` (opcional, relativa al archivo) es una foto del estacionamiento
+vacío tomada con la misma cámara.
+
+`detector` (opcional) activa un YOLO de vehículos en ONNX, el
+`DetectorVehiculos` de ai/deteccion_local.py (la imagen lo copia; fuera de
+Docker, PYTHONPATH=../../ai), con `modelo` relativo al archivo y además
+`conf`, `clases_vehiculo` e `hilos`. Las cajas de cada frame se suman a la
+clasificación (ver `espacios.py`). Una cámara lo omite con
+`"usar_detector": false`.
+
+    python -m app.monitor --config espacios.json
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+import cv2
+from sqlalchemy import text
+
+from .db import engine
+from .espacios import ESTADO_OCUPADO, ClasificadorEspacios, ConfigEspacio, ParametrosClasificacion
+
+
+@dataclass
+class ConfigCamara:
+    id: str
+    url: str
+    espacios: list[ConfigEspacio]
+    intervalo_s: float = 2.0
+    referencia: str | None = None
+    parametros: dict = field(default_factory=dict)
+    usar_detector: bool = True
+
+    def __post_init__(self):
+        self.espacios = [e if isinstance(e, ConfigEspacio) else ConfigEspacio(**e) for e in self.espacios]
+        if not self.espacios:
+            raise ValueError(f"La cámara {self.id} no define estacionamientos")
+
+
+def cargar_config(path: str) -> tuple[dict, list[ConfigCamara]]:
+    """Lee el archivo de cámaras y devuelve (opciones generales, cámaras)."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    configs = [ConfigCamara(**c) for c in data.pop("camaras", [])]
+    if not configs:
+        raise ValueError(f"{path} no define cámaras")
+    numeros = [e.numero for c in configs for e in c.espacios]
+    if len(set(numeros)) != len(numeros):
+        raise ValueError(f"{path} asigna un estacionamiento a más de una cámara")
+    base = os.path.dirname(os.path.abspath(path))
+    for c in configs:
+        if c.referencia and not os.path.isabs(c.referencia):
+            c.referencia = os.path.join(base, c.referencia)
+    detector = data.get("detector")
+    if detector and not os.path.isabs(detector["modelo"]):
+        detector["modelo"] = os.path.join(base, detector["modelo"])
+    return data, configs
+
+
+def crear_detector(opciones: dict | None):
+    """DetectorVehiculos de la sección `detector`, o None si no hay (requiere onnxruntime)."""
+    if not opciones:
+        return None
+    from deteccion_local import DetectorVehiculos
+
+    return DetectorVehiculos(**opciones)
+
+
+def es_stream(url: str) -> bool:
+    return url.startswith(("rtsp://", "rtmp://", "http://", "https://"))
+
+
+def guardar_cambios(cambios: dict[int, int]):
+    """Escribe en una transacción los estados que cambiaron ({numero: 0|1})."""
+    params = {"numeros": list(cambios), "estados": list(cambios.values())}
+    with engine.begin() as conn:
+        conn.execute(text("""
+          UPDATE estacionamiento e
+             SET ocupado = c.estado = :ocupado
+            FROM unnest(CAST(:numeros AS int[]), CAST(:estados AS int[])) AS c(numero, estado)
+           WHERE e.id = c.numero
+             AND e.ocupado IS DISTINCT FROM (c.estado = :ocupado)
+        """), {**params, "ocupado": ESTADO_OCUPADO})
+        conn.execute(text("""
+          INSERT INTO estacionamiento_estado (estacionamiento_numero, estado, updated_at)
+          SELECT numero, estado, NOW()
+            FROM unnest(CAST(:numeros AS int[]), CAST(:estados AS int[])) AS c(numero, estado)
+          ON CONFLICT (estacionamiento_numero) DO UPDATE
+             SET estado = EXCLUDED.estado, updated_at = EXCLUDED.updated_at
+           WHERE estacionamiento_estado.estado IS DISTINCT FROM EXCLUDED.estado
+        """), params)
+
+
+@dataclass
+class StatsCamara:
+    procesados: int = 0
+    tiempo_total: float = 0.0
+    cambios: int = 0
+    reconexiones: int = 0
+
+    def texto(self) -> str:
+        ms = self.tiempo_total / self.procesados * 1000 if self.procesados else 0.0
+        return (
+            f"procesados {self.procesados} | {ms:.1f} ms/frame | "
+            f"cambios {self.cambios} | reconexiones {self.reconexiones}"
+        )
+
+
+class MonitorCamara:
+    def __init__(self, config: ConfigCamara, detener: threading.Event, detector=None):
+        self.config = config
+        self.detener = detener
+        # Compartido por las cámaras; ONNX Runtime admite llamadas concurrentes
+        self.detector = detector if config.usar_detector else None
+        self.stats = StatsCamara()
+        self.clasificador: ClasificadorEspacios | None = None
+        # Cambios que no se pudieron escribir; se reintentan con los siguientes
+        self.pendientes: dict[int, int] = {}
+        self.hilo = threading.Thread(target=self.ejecutar, name=f"monitor-{config.id}", daemon=True)
+
+    def crear_clasificador(self, frame) -> ClasificadorEspacios:
+        cfg = self.config
+        referencia = None
+        if cfg.referencia:
+            referencia = cv2.imread(cfg.referencia)
+            if referencia is None:
+                raise ValueError(f"No se pudo leer la referencia {cfg.referencia}")
+        return ClasificadorEspacios(
+            cfg.espacios,
+            (frame.shape[1], frame.shape[0]),
+            ParametrosClasificacion(**cfg.parametros),
+            referencia,
+        )
+
+    def procesar(self, frame):
+        inicio = time.perf_counter()
+        if self.clasificador is None:
+            self.clasificador = self.crear_clasificador(frame)
+        cajas = None
+        if self.detector is not None:
+            try:
+                cajas = self.detector.cajas(frame)
+            except Exception as e:
+                print(f"[{self.config.id}] ⚠️ Falló el detector, se clasifica sin cajas: {e}")
+        cambios = self.clasificador.clasificar(frame, cajas)
+        self.stats.procesados += 1
+        self.stats.tiempo_total += time.perf_counter() - inicio
+        if not cambios and not self.pendientes:
+            return
+
+        self.pendientes.update(cambios)
+        try:
+            guardar_cambios(self.pendientes)
+        except Exception as e:
+            print(f"[{self.config.id}] ⚠️ No se pudieron guardar {len(self.pendientes)} cambios: {e}")
+            return
+        self.stats.cambios += len(self.pendientes)
+        self.pendientes = {}
+
+    def ejecutar(self):
+        cfg = self.config
+        stream = es_stream(cfg.url)
+        cap = cv2.VideoCapture(cfg.url)
+        ultimo = None
+
+        try:
+            while not self.detener.is_set():
+                # grab() sin decodificar los frames que no se clasifican
+                if not cap.isOpened() or not cap.grab():
+                    if not stream:
+                        print(f"[{cfg.id}] Fin del video")
+                        break
+                    print(f"[{cfg.id}] Cámara desconectada, reintentando...")
+                    cap.release()
+                    self.detener.wait(2)
+                    cap = cv2.VideoCapture(cfg.url)
+                    self.stats.reconexiones += 1
+                    continue
+
+                # En archivos se usa la hora del video para respetar el intervalo
+                ahora = time.monotonic() if stream else cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+                if ultimo is not None and ahora - ultimo < cfg.intervalo_s:
+                    continue
+                ret, frame = cap.retrieve()
+                if not ret:
+                    continue
+                ultimo = ahora
+                self.procesar(frame)
+        finally:
+            cap.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monitor de ocupación de estacionamientos por cámara")
+    parser.add_argument("--config", default=os.getenv("ESPACIOS_CONFIG", "espacios.json"))
+    args = parser.parse_args()
+
+    opciones, configs = cargar_config(args.config)
+    detector = crear_detector(opciones.get("detector"))
+    detener = threading.Event()
+    monitores = [MonitorCamara(c, detener, detector) for c in configs]
+    for m in monitores:
+        m.hilo.start()
+    print(f"Monitoreando {sum(len(c.espacios) for c in configs)} estacionamientos en {len(configs)} cámaras")
+
+    intervalo_stats = opciones.get("intervalo_stats_s", 60)
+    try:
+        while any(m.hilo.is_alive() for m in monitores):
+            for m in monitores:
+                m.hilo.join(intervalo_stats / len(monitores))
+            for m in monitores:
+                print(f"[{m.config.id}] {m.stats.texto()}")
+    except KeyboardInterrupt:
+        detener.set()
+        for m in monitores:
+            m.hilo.join(5)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark de la asociación detecciones -> estacionamientos: grilla uniforme
+(`app/geometria.py`) contra recorrer todos los estacionamientos por caja.
+
+    python bench_geometria.py --espacios 500 --detecciones 100 --frames 50
+
+Genera un estacionamiento sintético (filas de estacionamientos levemente
+inclinados, como los ve una cámara gran angular) y cajas de vehículos sobre
+estacionamientos al azar más algunas en la calle. Verifica que ambos
+métodos den el mismo resultado.
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+
+from app.geometria import GrillaEspacios, area_interseccion
+
+
+def estacionamiento_sintetico(n: int, rng: np.random.Generator):
+    columnas = math.ceil(math.sqrt(n * 2))
+    filas = math.ceil(n / columnas)
+    ancho, alto = 1 / columnas, 1 / filas
+    poligonos = []
+    for k in range(n):
+        f, c = divmod(k, columnas)
+        x, y = c * ancho, f * alto
+        inclinacion = ancho * 0.15 * rng.uniform(-1, 1)
+        poligonos.append([
+            [x + 0.05 * ancho + inclinacion, y + 0.05 * alto],
+            [x + 0.95 * ancho + inclinacion, y + 0.05 * alto],
+            [x + 0.95 * ancho, y + 0.95 * alto],
+            [x + 0.05 * ancho, y + 0.95 * alto],
+        ])
+    return poligonos
+
+
+def cajas_sinteticas(poligonos, n: int, rng: np.random.Generator):
+    cajas = []
+    for _ in range(n):
+        if rng.random() < 0.8:
+            p = np.array(poligonos[rng.integers(len(poligonos))])
+            (x1, y1), (x2, y2) = p.min(0), p.max(0)
+            dx, dy = (x2 - x1) * rng.uniform(-0.3, 0.3), (y2 - y1) * rng.uniform(-0.3, 0.3)
+            cajas.append((x1 + dx, y1 + dy, x2 + dx, y2 + dy))
+        else:
+            x, y = rng.random(2)
+            cajas.append((x, y, x + rng.uniform(0.02, 0.1), y + rng.uniform(0.02, 0.1)))
+    return cajas
+
+
+def fuerza_bruta(grilla: GrillaEspacios, cajas) -> np.ndarray:
+    """Cada caja contra todos los estacionamientos (con descarte por caja envolvente)."""
+    total = np.zeros(len(grilla.numeros))
+    envolventes = grilla.envolventes.tolist()
+    for x1, y1, x2, y2 in cajas:
+        for i, poligono in enumerate(grilla.poligonos):
+            ex1, ey1, ex2, ey2 = envolventes[i]
+            if ex1 >= x2 or ex2 <= x1 or ey1 >= y2 or ey2 <= y1:
+                continue
+            area = area_interseccion(poligono, (x1, y1, x2, y2), envolventes[i])
+            if area > 0:
+                total[i] += area / grilla.areas[i]
+    return np.minimum(total, 1.0)
+
+
+def medir(fn, frames) -> tuple[float, list]:
+    inicio = time.perf_counter()
+    resultados = [fn(cajas) for cajas in frames]
+    return (time.perf_counter() - inicio) / len(frames), resultados
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--espacios", type=int, default=500)
+    parser.add_argument("--detecciones", type=int, default=100)
+    parser.add_argument("--frames", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    poligonos = estacionamiento_sintetico(args.espacios, rng)
+    frames = [cajas_sinteticas(poligonos, args.detecciones, rng) for _ in range(args.frames)]
+
+    inicio = time.perf_counter()
+    grilla = GrillaEspacios(list(range(1, args.espacios + 1)), poligonos)
+    construccion = time.perf_counter() - inicio
+    candidatos = np.mean([len(grilla.candidatos(c)) for cajas in frames for c in cajas])
+
+    t_grilla, r_grilla = medir(grilla.cobertura, frames)
+    t_bruta, r_bruta = medir(lambda cajas: fuerza_bruta(grilla, cajas), frames)
+    iguales = all(np.allclose(a, b) for a, b in zip(r_grilla, r_bruta))
+
+    print(f"{args.espacios} estacionamientos x {args.detecciones} detecciones por frame")
+    print(f"  grilla: {len(grilla.celdas)} celdas, construida en {construccion * 1000:.1f} ms, "
+          f"{candidatos:.1f} candidatos por caja")
+    print(f"  {'método':<14}{'ms/frame':>10}")
+    print(f"  {'grilla':<14}{t_grilla * 1000:>10.2f}")
+    print(f"  {'fuerza bruta':<14}{t_bruta * 1000:>10.2f}")
+    print(f"  aceleración {t_bruta / t_grilla:.0f}x, resultados {'iguales' if iguales else 'DISTINTOS'}")
+
+
+if __name__ == "__main__":
+    main()
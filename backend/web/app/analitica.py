@@ -0,0 +1,188 @@
+# backend/web/app/analitica.py
+"""
+Reportes históricos de accesos y ocupación.
+
+Se leen de los resúmenes por hora que mantienen los triggers de la migración
+005_resumenes_analitica.sql (nunca de registro_evento_acceso), por lo que un
+rango de un año son a lo más ~8.760 filas sin importar cuántos eventos hubo.
+Los períodos de día/semana/mes se agrupan en la zona horaria del condominio.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.db import get_db_lectura
+
+ZONA_HORARIA = os.getenv("ZONA_HORARIA", "America/Santiago")
+MAX_PERIODOS = 10_000
+
+# granularidad -> (campo de date_trunc, paso)
+GRANULARIDADES = {
+    "hora": ("hour", "1 hour"),
+    "dia": ("day", "1 day"),
+    "semana": ("week", "1 week"),
+    "mes": ("month", "1 month"),
+}
+
+analitica = APIRouter(prefix="/analitica", tags=["Analítica"])
+
+
+def rango_consulta(desde: datetime | None, hasta: datetime | None, granularidad: str):
+    """Valida el rango (por defecto los últimos 30 días) y la granularidad."""
+    if granularidad not in GRANULARIDADES:
+        raise HTTPException(400, f"granularidad debe ser una de: {', '.join(GRANULARIDADES)}")
+    hasta = hasta or datetime.now(timezone.utc)
+    desde = desde or hasta - timedelta(days=30)
+    if desde >= hasta:
+        raise HTTPException(400, "desde debe ser anterior a hasta")
+    if granularidad == "hora" and (hasta - desde) > timedelta(hours=MAX_PERIODOS):
+        raise HTTPException(400, f"Rango demasiado largo para granularidad por hora (máx. {MAX_PERIODOS} horas)")
+    campo, paso = GRANULARIDADES[granularidad]
+    return desde, hasta, {"campo": campo, "paso": paso, "zona": ZONA_HORARIA, "desde": desde, "hasta": hasta}
+
+
+# Períodos del rango en hora local, devueltos como timestamptz
+SQL_PERIODOS = """
+  periodos AS (
+    SELECT p AS inicio_local, p AT TIME ZONE :zona AS periodo
+    FROM generate_series(
+      date_trunc(:campo, CAST(:desde AS timestamptz) AT TIME ZONE :zona),
+      CAST(:hasta AS timestamptz) AT TIME ZONE :zona - interval '1 microsecond',
+      CAST(:paso AS interval)
+    ) AS p
+  )
+"""
+
+
+@analitica.get("/accesos")
+def serie_accesos(
+    desde: datetime | None = None,
+    hasta: datetime | None = None,
+    granularidad: str = "dia",
+    db: Session = Depends(get_db_lectura),
+):
+    """
+    Ingresos y salidas por período (hora, dia, semana o mes), separando los
+    ingresos de residentes y de visitas. Los períodos sin eventos van en 0.
+    """
+    desde, hasta, params = rango_consulta(desde, hasta, granularidad)
+    rows = db.execute(text(f"""
+    WITH {SQL_PERIODOS},
+    resumen AS (
+      SELECT date_trunc(:campo, hora AT TIME ZONE :zona) AS inicio_local,
+             SUM(ingresos) AS ingresos,
+             SUM(salidas) AS salidas,
+             SUM(ingresos_residentes) AS ingresos_residentes,
+             SUM(ingresos_visitantes) AS ingresos_visitantes
+      FROM resumen_acceso_hora
+      WHERE hora >= date_trunc('hour', CAST(:desde AS timestamptz)) AND hora < :hasta
+      GROUP BY 1
+    )
+    SELECT p.periodo,
+           COALESCE(r.ingresos, 0) AS ingresos,
+           COALESCE(r.salidas, 0) AS salidas,
+           COALESCE(r.ingresos_residentes, 0) AS ingresos_residentes,
+           COALESCE(r.ingresos_visitantes, 0) AS ingresos_visitantes
+    FROM periodos p
+    LEFT JOIN resumen r USING (inicio_local)
+    ORDER BY p.periodo
+    """), params).mappings().all()
+
+    serie = [{**r, "periodo": r["periodo"].isoformat()} for r in rows]
+    return {
+        "desde": desde.isoformat(),
+        "hasta": hasta.isoformat(),
+        "granularidad": granularidad,
+        "totales": {
+            k: sum(r[k] for r in serie)
+            for k in ("ingresos", "salidas", "ingresos_residentes", "ingresos_visitantes")
+        },
+        "serie": serie,
+    }
+
+
+@analitica.get("/ocupacion")
+def serie_ocupacion(
+    desde: datetime | None = None,
+    hasta: datetime | None = None,
+    granularidad: str = "dia",
+    db: Session = Depends(get_db_lectura),
+):
+    """
+    Máximo de estacionamientos ocupados a la vez por período y, por
+    estacionamiento, minutos ocupados y porcentaje de uso en el rango
+    (incluye las ocupaciones que siguen en curso).
+    """
+    desde, hasta, params = rango_consulta(desde, hasta, granularidad)
+
+    rows = db.execute(text(f"""
+    WITH {SQL_PERIODOS},
+    resumen AS (
+      SELECT date_trunc(:campo, hora AT TIME ZONE :zona) AS inicio_local,
+             MAX(ocupados_max) AS ocupados_max,
+             (array_agg(ocupados_final ORDER BY hora DESC))[1] AS ocupados_final
+      FROM resumen_ocupacion_hora
+      WHERE hora >= date_trunc('hour', CAST(:desde AS timestamptz)) AND hora < :hasta
+      GROUP BY 1
+    )
+    SELECT p.periodo, r.ocupados_max, r.ocupados_final
+    FROM periodos p
+    LEFT JOIN resumen r USING (inicio_local)
+    ORDER BY p.periodo
+    """), params).mappings().all()
+
+    # Ocupación al inicio del rango: la del último cambio anterior
+    nivel = db.execute(text("""
+      SELECT ocupados_final FROM resumen_ocupacion_hora
+      WHERE hora < date_trunc('hour', CAST(:desde AS timestamptz))
+      ORDER BY hora DESC LIMIT 1
+    """), params).scalar()
+
+    serie = []
+    for r in rows:
+        # Un período sin cambios mantiene la ocupación del anterior
+        if r["ocupados_max"] is None:
+            ocupados_max = nivel
+        else:
+            ocupados_max = max(r["ocupados_max"], nivel or 0)
+            nivel = r["ocupados_final"]
+        serie.append({"periodo": r["periodo"].isoformat(), "ocupados_max": ocupados_max})
+
+    fin = min(hasta, datetime.now(timezone.utc))
+    segundos_rango = max((fin - desde).total_seconds(), 1)
+    por_estacionamiento = db.execute(text("""
+      WITH cerrados AS (
+        SELECT id_estacionamiento, SUM(segundos_ocupado) AS segundos
+        FROM resumen_estacionamiento_hora
+        WHERE hora >= date_trunc('hour', CAST(:desde AS timestamptz)) AND hora < :hasta
+        GROUP BY id_estacionamiento
+      )
+      SELECT e.id,
+             COALESCE(c.segundos, 0)
+             + CASE WHEN o.desde IS NULL THEN 0
+                    ELSE GREATEST(EXTRACT(EPOCH FROM CAST(:fin AS timestamptz) - GREATEST(o.desde, :desde)), 0)
+               END AS segundos
+      FROM estacionamiento e
+      LEFT JOIN cerrados c ON c.id_estacionamiento = e.id
+      LEFT JOIN estacionamiento_ocupado_desde o ON o.id_estacionamiento = e.id
+      ORDER BY e.id
+    """), {**params, "fin": fin}).mappings().all()
+
+    return {
+        "desde": desde.isoformat(),
+        "hasta": hasta.isoformat(),
+        "granularidad": granularidad,
+        "ocupados_max": max((p["ocupados_max"] or 0 for p in serie), default=0),
+        "serie": serie,
+        "estacionamientos": [
+            {
+                "id": r["id"],
+                "minutos_ocupado": round(r["segundos"] / 60, 1),
+                "porcentaje_uso": round(100 * min(r["segundos"] / segundos_rango, 1), 1),
+            }
+            for r in por_estacionamiento
+        ],
+    }
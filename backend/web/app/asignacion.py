@@ -0,0 +1,57 @@
+# backend/web/app/asignacion.py
+"""
+Asignación automática de estacionamientos a reservas pendientes.
+
+Dos reservas pueden compartir un estacionamiento si sus horarios no se
+traslapan. Se procesan las reservas pendientes por hora de término
+(scheduling de intervalos en varias máquinas) y cada una va al
+estacionamiento libre en su horario cuyo último uso terminó más cerca de
+su inicio, lo que deja los estacionamientos más despejados para las
+siguientes. Los estacionamientos ocupados ahora no se asignan.
+"""
+from datetime import datetime
+
+
+def traslapa(ocupaciones: list[tuple[datetime, datetime]], inicio: datetime, termino: datetime) -> bool:
+    return any(i < termino and t > inicio for i, t in ocupaciones)
+
+
+def planificar(
+    pendientes: list[dict],
+    estacionamientos: list[int],
+    asignadas: list[dict],
+) -> tuple[list[dict], list[int]]:
+    """
+    pendientes: [{"id", "hora_inicio", "hora_termino"}] sin estacionamiento.
+    estacionamientos: ids disponibles (no ocupados).
+    asignadas: [{"id_estacionamiento", "hora_inicio", "hora_termino"}] ya asignadas.
+
+    Devuelve (asignaciones [{"id_reserva", "id_estacionamiento", ...}], ids sin asignar).
+    """
+    ocupaciones: dict[int, list[tuple[datetime, datetime]]] = {e: [] for e in estacionamientos}
+    for a in asignadas:
+        if a["id_estacionamiento"] in ocupaciones:
+            ocupaciones[a["id_estacionamiento"]].append((a["hora_inicio"], a["hora_termino"]))
+
+    asignaciones, sin_asignar = [], []
+    for r in sorted(pendientes, key=lambda r: (r["hora_termino"], r["hora_inicio"], r["id"])):
+        inicio, termino = r["hora_inicio"], r["hora_termino"]
+        mejor, mejor_fin = None, None
+        for est, usos in ocupaciones.items():
+            if traslapa(usos, inicio, termino):
+                continue
+            # Último uso que termina antes del inicio (None si nunca se usó)
+            fin = max((t for _, t in usos if t <= inicio), default=None)
+            if mejor is None or (fin is not None and (mejor_fin is None or fin > mejor_fin)):
+                mejor, mejor_fin = est, fin
+        if mejor is None:
+            sin_asignar.append(r["id"])
+            continue
+        ocupaciones[mejor].append((inicio, termino))
+        asignaciones.append({
+            "id_reserva": r["id"],
+            "id_estacionamiento": mejor,
+            "hora_inicio": inicio,
+            "hora_termino": termino,
+        })
+    return asignaciones, sin_asignar
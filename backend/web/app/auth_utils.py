@@ -5,12 +5,16 @@ from fastapi import Depends, HTTPException
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 
+from comun.tokens import TokensVerificados
+
 # ==========================
 # Configuración de JWT
 # ==========================
 SECRET_KEY = os.getenv("SECRET_KEY", "secret-key-change-me")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
+# Tokens ya verificados que se recuerdan (el dashboard consulta seguido con el mismo)
+TOKENS_EN_CACHE = int(os.getenv("TOKENS_EN_CACHE", "4096"))
 
 # Mecanismo de extracción del token desde el header Authorization
 security = HTTPBearer()
@@ -24,10 +28,21 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
+tokens_verificados = TokensVerificados(TOKENS_EN_CACHE)
+
+
+def decodificar_token(token: str) -> dict:
+    """Claims del token; JWTError si la firma o el exp no son válidos."""
+    claims = tokens_verificados.obtener(token)
+    if claims is None:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        tokens_verificados.guardar(token, claims)
+    return claims
+
+
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     """Valida el token Bearer recibido en Authorization."""
-    token = credentials.credentials
     try:
-        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        return decodificar_token(credentials.credentials)
     except JWTError as exc:
         raise HTTPException(status_code=401, detail="Token inválido") from exc
@@ -0,0 +1,40 @@
+# backend/web/app/credenciales.py
+"""
+Verificación de contraseñas fuera de Postgres y límite de intentos de login.
+
+El login solo trae el hash de la base (por RUT) y bcrypt corre en un pool
+acotado de hilos del servicio, así una ráfaga de logins no consume la CPU de
+la base que comparte la portería. Con LOGIN_EN_ESPERA verificaciones ya
+pendientes el login responde 503 en vez de encolar sin límite.
+
+Antes de verificar, cada intento gasta una ficha de la cubeta de la cuenta y
+de la de la IP (token bucket en memoria, por proceso). El hash, la
+verificación y el limitador están en comun/credenciales.py, compartido con
+mobile.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from comun.credenciales import MAX_LARGO_CONTRASENA, LoginSaturado, checkpw, es_bcrypt, limitadores_login
+
+HILOS_LOGIN = int(os.getenv("LOGIN_HILOS", "2"))
+LOGIN_EN_ESPERA = int(os.getenv("LOGIN_EN_ESPERA", "32"))
+
+# bcrypt suelta el GIL mientras calcula, así que un pool de hilos basta
+_pool = ThreadPoolExecutor(max_workers=HILOS_LOGIN, thread_name_prefix="bcrypt")
+# Las rutas síncronas llegan desde el threadpool de FastAPI
+_cupos = threading.BoundedSemaphore(LOGIN_EN_ESPERA)
+
+
+def verificar_contrasena(contrasena: str, hash_guardado: str) -> bool:
+    """bcrypt.checkpw en el pool de login. El hash debe ser bcrypt (ver es_bcrypt)."""
+    if not _cupos.acquire(blocking=False):
+        raise LoginSaturado()
+    try:
+        return _pool.submit(checkpw, contrasena, hash_guardado).result()
+    finally:
+        _cupos.release()
+
+
+intentos_por_cuenta, intentos_por_ip = limitadores_login()
@@ -0,0 +1,10 @@
+# backend/web/app/estado.py
+"""
+Estado canónico de los estacionamientos, sobre el engine del servicio. La
+implementación está en comun/estado.py, compartida con parking-availability.
+"""
+from comun.estado import CONSULTA, ESTADO_DESCONOCIDO, ETIQUETAS, estado_de
+
+from app.db import engine
+
+estado_estacionamientos = estado_de(engine)
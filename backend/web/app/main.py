@@ -1,7 +1,12 @@
 # backend/web/app/main.py
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import router
+from app.analitica import analitica
+from app.vencimiento import bucle_vencimiento
+from app.estado import CONSULTA, estado_estacionamientos
+from app.db import calentar
 
 app = FastAPI(title="Backend Web API")
 
@@ -17,6 +22,28 @@ app.add_middleware(
 )
 
 app.include_router(router)
+app.include_router(analitica)
+
+@app.on_event("startup")
+def calentar_conexiones():
+    # Antes de recibir tráfico (ver comun/servidor.py)
+    calentar((CONSULTA,))
+
+@app.on_event("startup")
+async def iniciar_vencimiento():
+    app.state.vencimiento = asyncio.create_task(bucle_vencimiento())
+
+@app.on_event("shutdown")
+async def detener_vencimiento():
+    app.state.vencimiento.cancel()
+
+@app.on_event("startup")
+def escuchar_estados():
+    estado_estacionamientos.iniciar()
+
+@app.on_event("shutdown")
+def dejar_de_escuchar_estados():
+    estado_estacionamientos.detener()
 
 @app.get("/")
 def root():
@@ -1,12 +1,24 @@
 # backend/web/app/routers.py
+import math
 from datetime import datetime, timedelta, timezone
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from app.db import SessionLocal
+from app.db import SessionLocal, get_db_lectura
 from app.models import Conserje
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from app.auth_utils import create_access_token
+from app.credenciales import (
+    MAX_LARGO_CONTRASENA,
+    LoginSaturado,
+    es_bcrypt,
+    intentos_por_cuenta,
+    intentos_por_ip,
+    verificar_contrasena,
+)
+from app.asignacion import planificar
+from app.estado import ESTADO_DESCONOCIDO, estado_estacionamientos
+from comun.respuestas import CacheRespuesta, RespuestaJSON, objetos
 
 # Router agregador
 router = APIRouter()
@@ -27,34 +39,54 @@ auth = APIRouter(prefix="/auth", tags=["Auth"])
 
 class LoginRequest(BaseModel):
     rut: str
-    contrasena: str
+    contrasena: str = Field(max_length=MAX_LARGO_CONTRASENA)
 
 
 @auth.post("/login")
-def login(req: LoginRequest, db: Session = Depends(get_db)):
+def login(req: LoginRequest, request: Request, db: Session = Depends(get_db)):
     """
     Autentica a un conserje verificando el RUT (sin separadores) y la contraseña.
-    Devuelve un JWT valido por 60 minutos.
+    Los intentos se limitan por RUT y por IP, y bcrypt corre fuera de la base
+    (ver app/credenciales.py). Devuelve un JWT valido por 60 minutos.
     """
     rut_limpio = req.rut.replace(".", "").replace("-", "").strip().upper()
 
+    espera = max(
+        intentos_por_ip.intentar(request.client.host if request.client else ""),
+        intentos_por_cuenta.intentar(rut_limpio),
+    )
+    if espera:
+        raise HTTPException(
+            status_code=429,
+            detail="Demasiados intentos, espera antes de volver a intentar",
+            headers={"Retry-After": str(math.ceil(espera))},
+        )
+
     row = (
         db.execute(
-            text(
-                """
-                SELECT rut, nombre
-                  FROM conserje
-                 WHERE rut = :rut
-                   AND contrasena = crypt(:password, contrasena)
-                """
-            ),
-            {"rut": rut_limpio, "password": req.contrasena},
+            text("SELECT rut, nombre, contrasena FROM conserje WHERE rut = :rut"),
+            {"rut": rut_limpio},
         )
         .mappings()
         .first()
     )
-
-    if not row:
+    hash_guardado = row["contrasena"] if row else None
+    valida = False
+    if hash_guardado and es_bcrypt(hash_guardado):
+        # La sesión no necesita quedar abierta mientras corre bcrypt
+        db.close()
+        try:
+            valida = verificar_contrasena(req.contrasena, hash_guardado)
+        except LoginSaturado:
+            raise HTTPException(status_code=503, detail="Servicio ocupado, intenta nuevamente")
+    elif hash_guardado:
+        # Hashes que no son bcrypt (p. ej. md5 de pgcrypto) son baratos: los verifica la base
+        valida = db.execute(
+            text("SELECT crypt(:password, :hash) = :hash"),
+            {"password": req.contrasena, "hash": hash_guardado},
+        ).scalar()
+
+    if not valida:
         raise HTTPException(status_code=401, detail="Credenciales inválidas")
 
     token = create_access_token(data={"sub": row["rut"]}, expires_delta=timedelta(minutes=60))
@@ -97,8 +129,8 @@ def listar_departamentos(db: Session = Depends(get_db)):
 # ================================
 placas = APIRouter(prefix="/placas", tags=["Placas"])
 
-@placas.get("/")
-def listar_placas(q: str | None = None, db: Session = Depends(get_db)):
+@placas.get("/", response_class=RespuestaJSON)
+def listar_placas(q: str | None = None, db: Session = Depends(get_db_lectura)):
     sql = """
       SELECT
         v.placa_patente AS id,
@@ -112,8 +144,8 @@ def listar_placas(q: str | None = None, db: Session = Depends(get_db)):
         sql += " WHERE v.placa_patente ILIKE :q OR v.id_departamento ILIKE :q"
         params["q"] = f"%{q}%"
     sql += " ORDER BY v.id_departamento, v.placa_patente"
-    rows = db.execute(text(sql), params).mappings().all()
-    return [dict(r) for r in rows]
+    res = db.execute(text(sql), params)
+    return RespuestaJSON(objetos(res.keys(), res))
 
 @placas.put("/{patente_actual}")
 def actualizar_vehiculo(
@@ -209,26 +241,38 @@ def actualizar_vehiculo(
 # ================================
 historial = APIRouter(prefix="/historial", tags=["Historial"])
 
-@historial.get("/")
+@historial.get("/", response_class=RespuestaJSON)
 def listar_historial(
     q: str | None = None,
     limit: int = 200,
-    db: Session = Depends(get_db),
+    desde: datetime | None = None,
+    hasta: datetime | None = None,
+    db: Session = Depends(get_db_lectura),
 ):
     """
     Devuelve eventos de acceso con joins a tipo_evento/metodo_evento y,
     si corresponde, al vehiculo (residente) o a la reserva (visitante).
+
+    `desde`/`hasta` acotan por hora: registro_evento_acceso está particionada
+    por mes, así que solo se leen los meses del rango.
+
+    Cada fila sale de la consulta con las columnas de la respuesta, en orden.
     """
     sql = """
     SELECT
       a.id,
-      a.hora,
-      te.nombre AS tipo_evento,
-      me.nombre AS metodo_evento,
       a.placa_detectada AS patente,
-      v.id_departamento AS depto_residente,
-      r.id_departamento AS depto_visitante,
-      COALESCE(v.id_departamento, r.id_departamento) AS depto
+      CASE
+        WHEN v.id_departamento <> '' THEN 'Residente'
+        WHEN r.id_departamento <> '' THEN 'Visita'
+        ELSE 'Desconocido'
+      END AS "tipoUsuario",
+      CASE WHEN te.nombre ILIKE '%ingres%' THEN a.hora END AS entrada,
+      CASE WHEN te.nombre ILIKE '%salid%' THEN a.hora END AS salida,
+      COALESCE(v.id_departamento, r.id_departamento) AS depto,
+      me.nombre AS metodo,
+      te.nombre AS evento,
+      a.hora
     FROM registro_evento_acceso a
     JOIN tipo_evento_acceso te ON te.id = a.tipo
     JOIN metodo_evento_acceso me ON me.id = a.metodo
@@ -240,73 +284,99 @@ def listar_historial(
     if q:
         where.append("(a.placa_detectada ILIKE :q OR COALESCE(v.id_departamento, r.id_departamento) ILIKE :q)")
         params["q"] = f"%{q}%"
+    if desde:
+        where.append("a.hora >= :desde")
+        params["desde"] = desde
+    if hasta:
+        where.append("a.hora < :hasta")
+        params["hasta"] = hasta
     if where:
         sql += " WHERE " + " AND ".join(where)
     sql += " ORDER BY a.hora DESC LIMIT :limit"
     params["limit"] = limit
 
-    rows = db.execute(text(sql), params).mappings().all()
+    res = db.execute(text(sql), params)
+    return RespuestaJSON(objetos(res.keys(), res))
 
-    data = []
-    for r in rows:
-        tipo_evento = (r["tipo_evento"] or "").lower()
-        entrada = r["hora"].isoformat() if "ingres" in tipo_evento else None
-        salida  = r["hora"].isoformat() if "salid" in tipo_evento else None
+# ================================
+# Subrouter: Presencia
+# ================================
+presencia = APIRouter(prefix="/presencia", tags=["Presencia"])
 
-        tipo_usuario = "Residente" if r["depto_residente"] else ("Visita" if r["depto_visitante"] else "Desconocido")
+@presencia.get("/")
+def vehiculos_dentro(db: Session = Depends(get_db_lectura)):
+    """
+    Vehículos que están dentro del condominio en este momento, con conteos
+    por departamento y por tipo de usuario.
+
+    Se lee de las estadías abiertas (tabla `estadia`, mantenida por trigger en
+    cada ingreso/salida), por lo que no recorre registro_evento_acceso.
+    """
+    rows = db.execute(text("""
+      SELECT
+        e.patente,
+        e.hora_ingreso,
+        v.id_departamento AS depto_residente,
+        r.id_departamento AS depto_visitante,
+        COALESCE(v.id_departamento, r.id_departamento) AS depto
+      FROM estadia e
+      LEFT JOIN vehiculo v ON v.placa_patente = e.placa_patente_vehiculo
+      LEFT JOIN reserva r ON r.id = e.id_reserva
+      WHERE e.abierta
+      ORDER BY e.hora_ingreso DESC
+    """)).mappings().all()
 
-        data.append({
-            "id": r["id"],
+    vehiculos = []
+    por_departamento: dict[str, int] = {}
+    por_tipo = {"Residente": 0, "Visita": 0, "Desconocido": 0}
+    for r in rows:
+        tipo_usuario = "Residente" if r["depto_residente"] else ("Visita" if r["depto_visitante"] else "Desconocido")
+        por_tipo[tipo_usuario] += 1
+        if r["depto"]:
+            por_departamento[r["depto"]] = por_departamento.get(r["depto"], 0) + 1
+        vehiculos.append({
             "patente": r["patente"],
             "tipoUsuario": tipo_usuario,
-            "entrada": entrada,
-            "salida": salida,
             "depto": r["depto"],
-            "metodo": r["metodo_evento"],
-            "evento": r["tipo_evento"],
-            "hora": r["hora"].isoformat(),
+            "entrada": r["hora_ingreso"].isoformat(),
         })
-    return data
+
+    return {
+        "total": len(vehiculos),
+        "por_departamento": por_departamento,
+        "por_tipo": por_tipo,
+        "vehiculos": vehiculos,
+    }
 
 # ===============================
 # Subrouter: Home / Reservas
 # ===============================
 home = APIRouter(prefix="", tags=["Home / Reservas"])
 
+# Serializa las asignaciones manuales y automáticas
+LOCK_ASIGNACION = "reserva_asignacion"
+
 def now_tz():
     return datetime.now(timezone.utc)
 
-@home.get("/dashboard/estados")
-def dashboard_estados(db: Session = Depends(get_db)):
+_dashboard_estados = CacheRespuesta()
+
+@home.get("/dashboard/estados", response_class=RespuestaJSON)
+def dashboard_estados():
     """
-    Estado por estacionamiento:
+    Estado por estacionamiento (estado canónico, ver app/estado.py):
     - 1 ocupado (rojo) si estacionamiento.ocupado = TRUE
     - 2 reservado (amarillo) si existe reserva activa con id_estacionamiento
+    - 3 desconocido (gris) si su sensor LoRa dejó de reportar (va primero)
     - 0 libre (verde) en otro caso
+
+    El JSON se serializa una vez por versión del estado.
     """
-    sql = """
-    WITH reservas_asignadas AS (
-      SELECT id_estacionamiento
-      FROM reserva
-      WHERE estado_reserva = 0
-        AND hora_termino > NOW()
-        AND id_estacionamiento IS NOT NULL
-      GROUP BY id_estacionamiento
-    )
-    SELECT
-      e.id,
-      CASE
-        WHEN e.ocupado = TRUE THEN 1
-        WHEN ra.id_estacionamiento IS NOT NULL THEN 2
-        ELSE 0
-      END AS estado
-    FROM estacionamiento e
-    LEFT JOIN reservas_asignadas ra ON ra.id_estacionamiento = e.id
-    ORDER BY e.id;
-    """
-    rows = db.execute(text(sql)).mappings().all()
-    def label(n): return {0: "libre", 1: "ocupado", 2: "reservado"}.get(n, "desconocido")
-    return [{"id": r["id"], "estado": r["estado"], "estado_label": label(r["estado"])} for r in rows]
+    actual = estado_estacionamientos.leer()
+    return _dashboard_estados.obtener(actual["version"], lambda: [
+        {"id": e["id"], "estado": e["estado"], "estado_label": e["estado_label"]}
+        for e in actual["estados"]
+    ])
 
 @home.post("/reservas", status_code=201)
 def crear_reserva(payload: dict, db: Session = Depends(get_db)):
@@ -325,14 +395,16 @@ def crear_reserva(payload: dict, db: Session = Depends(get_db)):
         if f not in payload:
             raise HTTPException(400, f"Falta campo: {f}")
 
-    totales = db.execute(text("SELECT COUNT(*) FROM estacionamiento")).scalar() or 0
+    # Los estacionamientos con el sensor caído no cuentan como capacidad
+    estados = [e["estado"] for e in estado_estacionamientos.leer()["estados"]]
+    totales = len(estados) - estados.count(ESTADO_DESCONOCIDO)
+    ocupados = estados.count(1)
     reservas_activas = db.execute(text("""
       SELECT COUNT(*)
       FROM reserva
       WHERE estado_reserva = 0
         AND hora_termino > NOW()
     """)).scalar() or 0
-    ocupados = db.execute(text("SELECT COUNT(*) FROM estacionamiento WHERE ocupado = TRUE")).scalar() or 0
 
     if reservas_activas >= totales:
         raise HTTPException(400, "No se pueden crear más reservas: todas ya están reservadas")
@@ -404,21 +476,93 @@ def asignar_estacionamiento(id_reserva: int, payload: dict, db: Session = Depend
     if not row_est:
         raise HTTPException(404, "Estacionamiento no existe")
 
+    # Misma regla que la asignación automática: sin traslape de horarios
+    db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:lock))"), {"lock": LOCK_ASIGNACION})
     ya = db.execute(text("""
-      SELECT 1 FROM reserva
-      WHERE estado_reserva = 0
-        AND hora_termino > NOW()
-        AND id_estacionamiento = :est
+      SELECT 1 FROM reserva o
+      JOIN reserva r ON r.id = :id
+      WHERE o.estado_reserva = 0
+        AND o.hora_termino > NOW()
+        AND o.id_estacionamiento = :est
+        AND o.id <> r.id
+        AND o.hora_inicio < r.hora_termino
+        AND o.hora_termino > r.hora_inicio
       LIMIT 1
-    """), {"est": est}).fetchone()
+    """), {"est": est, "id": id_reserva}).fetchone()
     if ya:
-        raise HTTPException(400, "Estacionamiento ya está reservado por otra reserva activa")
+        raise HTTPException(400, "Estacionamiento ya está reservado por otra reserva activa en ese horario")
 
     db.execute(text("UPDATE reserva SET id_estacionamiento = :est WHERE id = :id"),
                {"est": est, "id": id_reserva})
     db.commit()
     return {"ok": True, "mensaje": f"Reserva {id_reserva} asignada a {est}"}
 
+@home.post("/reservas/asignacion-automatica")
+def asignacion_automatica(
+    horizonte_horas: int = 24,
+    confirmar: bool = False,
+    db: Session = Depends(get_db),
+):
+    """
+    Asigna de una vez los estacionamientos de las reservas pendientes que
+    comienzan dentro de `horizonte_horas`, sin traslapar horarios en un mismo
+    estacionamiento (ver app/asignacion.py). Con confirmar=false solo
+    devuelve el plan; con confirmar=true lo aplica en una transacción.
+    """
+    if horizonte_horas <= 0:
+        raise HTTPException(400, "horizonte_horas debe ser mayor que 0")
+    if confirmar:
+        # Excluye asignaciones manuales concurrentes mientras se planifica
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:lock))"), {"lock": LOCK_ASIGNACION})
+
+    pendientes = db.execute(text(f"""
+      SELECT id, hora_inicio, hora_termino
+      FROM reserva
+      WHERE estado_reserva = 0
+        AND hora_termino > NOW()
+        AND hora_inicio < NOW() + make_interval(hours => :horizonte)
+        AND id_estacionamiento IS NULL
+      {"FOR UPDATE" if confirmar else ""}
+    """), {"horizonte": horizonte_horas}).mappings().all()
+    # Sin los de sensor inactivo: su último estado ya no es confiable
+    libres = db.execute(text("""
+      SELECT e.id FROM estacionamiento e
+      WHERE e.ocupado = FALSE
+        AND NOT EXISTS (SELECT 1 FROM sensor_lora sl
+                        WHERE sl.estacionamiento_numero = e.id AND sl.inactivo)
+      ORDER BY e.id
+    """)).scalars().all()
+    asignadas = db.execute(text("""
+      SELECT id_estacionamiento, hora_inicio, hora_termino
+      FROM reserva
+      WHERE estado_reserva = 0
+        AND hora_termino > NOW()
+        AND id_estacionamiento IS NOT NULL
+    """)).mappings().all()
+
+    asignaciones, sin_asignar = planificar(list(pendientes), list(libres), list(asignadas))
+
+    if confirmar and asignaciones:
+        db.execute(text("""
+          UPDATE reserva r
+             SET id_estacionamiento = a.est
+            FROM unnest(CAST(:ids AS int[]), CAST(:ests AS int[])) AS a(id, est)
+           WHERE r.id = a.id
+        """), {
+            "ids": [a["id_reserva"] for a in asignaciones],
+            "ests": [a["id_estacionamiento"] for a in asignaciones],
+        })
+    db.commit()
+
+    return {
+        "confirmado": confirmar,
+        "asignaciones": [
+            {**a, "hora_inicio": a["hora_inicio"].isoformat(), "hora_termino": a["hora_termino"].isoformat()}
+            for a in asignaciones
+        ],
+        "sin_asignar": sin_asignar,
+    }
+
 @home.post("/reservas/{id_reserva}/desasignar")
 def desasignar_estacionamiento(id_reserva: int, db: Session = Depends(get_db)):
     res = db.execute(text("""
@@ -452,4 +596,5 @@ router.include_router(conserjes)
 router.include_router(departamentos)
 router.include_router(placas)
 router.include_router(historial)
+router.include_router(presencia)
 router.include_router(home)
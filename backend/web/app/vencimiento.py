@@ -0,0 +1,61 @@
+# backend/web/app/vencimiento.py
+"""
+Vencimiento periódico de reservas (migración 007_reserva_vencida.sql).
+
+Cada VENCIMIENTO_INTERVALO_S segundos pasa a estado 3 (Vencida) las reservas
+activas ya terminadas y libera su estacionamiento, en lotes para no tomar
+bloqueos largos sobre reserva. SKIP LOCKED permite que varios workers lo
+ejecuten a la vez sin esperarse.
+"""
+import asyncio
+import os
+
+from sqlalchemy import text
+
+from app.db import SessionLocal
+
+INTERVALO_S = int(os.getenv("VENCIMIENTO_INTERVALO_S", "60"))
+LOTE = 500
+ESTADO_VENCIDA = 3
+
+
+def vencer_reservas(lote: int = LOTE) -> int:
+    """Vence todas las reservas terminadas, de a `lote` por transacción. Devuelve cuántas."""
+    total = 0
+    db = SessionLocal()
+    try:
+        while True:
+            ids = db.execute(text("""
+              WITH vencidas AS (
+                SELECT id
+                FROM reserva
+                WHERE estado_reserva = 0
+                  AND hora_termino <= NOW()
+                ORDER BY hora_termino
+                LIMIT :lote
+                FOR UPDATE SKIP LOCKED
+              )
+              UPDATE reserva r
+                 SET estado_reserva = :vencida,
+                     id_estacionamiento = NULL
+                FROM vencidas v
+               WHERE r.id = v.id
+              RETURNING r.id
+            """), {"lote": lote, "vencida": ESTADO_VENCIDA}).scalars().all()
+            db.commit()
+            total += len(ids)
+            if len(ids) < lote:
+                return total
+    finally:
+        db.close()
+
+
+async def bucle_vencimiento():
+    while True:
+        try:
+            vencidas = await asyncio.to_thread(vencer_reservas)
+            if vencidas:
+                print(f"⏰ {vencidas} reservas vencidas")
+        except Exception as e:
+            print(f"⚠️ No se pudieron vencer reservas: {e}")
+        await asyncio.sleep(INTERVALO_S)
@@ -0,0 +1,114 @@
+"""
+Micro-benchmark de la serialización de un listado grande: el historial con
+`--filas` eventos armado como antes (dict por fila, etiquetas e isoformat()
+en Python, jsonable_encoder y JSONResponse), desde las tuplas de la consulta
+con RespuestaJSON (comun/respuestas.py), y el cuerpo ya guardado en un
+CacheRespuesta como en las vistas del estado canónico.
+
+No usa la base: las filas se generan con la forma de las de listar_historial.
+
+    PYTHONPATH=.. python bench_json.py --filas 10000 --repeticiones 20
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from comun.respuestas import CacheRespuesta, RespuestaJSON, objetos
+
+COLUMNAS = ("id", "patente", "tipoUsuario", "entrada", "salida", "depto", "metodo", "evento", "hora")
+
+
+def generar(n: int) -> list[dict]:
+    """Filas de la consulta original de listar_historial."""
+    hora = datetime(2025, 9, 1, tzinfo=timezone.utc)
+    filas = []
+    for i in range(n):
+        hora += timedelta(seconds=random.randint(1, 600))
+        residente = f"{random.randint(1, 20)}0{random.randint(1, 8)}A" if random.random() < 0.7 else None
+        visitante = None if residente or random.random() < 0.5 else "1108A"
+        filas.append({
+            "id": i + 1,
+            "hora": hora,
+            "tipo_evento": random.choice(("Ingreso", "Salida")),
+            "metodo_evento": random.choice(("LPR", "Manual")),
+            "patente": f"AB{random.randint(1000, 9999)}",
+            "depto_residente": residente,
+            "depto_visitante": visitante,
+            "depto": residente or visitante,
+        })
+    return filas
+
+
+def como_antes(rows: list[dict]) -> bytes:
+    data = []
+    for r in rows:
+        tipo_evento = (r["tipo_evento"] or "").lower()
+        entrada = r["hora"].isoformat() if "ingres" in tipo_evento else None
+        salida = r["hora"].isoformat() if "salid" in tipo_evento else None
+        tipo_usuario = "Residente" if r["depto_residente"] else ("Visita" if r["depto_visitante"] else "Desconocido")
+        data.append({
+            "id": r["id"],
+            "patente": r["patente"],
+            "tipoUsuario": tipo_usuario,
+            "entrada": entrada,
+            "salida": salida,
+            "depto": r["depto"],
+            "metodo": r["metodo_evento"],
+            "evento": r["tipo_evento"],
+            "hora": r["hora"].isoformat(),
+        })
+    return JSONResponse(jsonable_encoder(data)).body
+
+
+def tuplas(rows: list[dict]) -> list[tuple]:
+    """Las mismas filas como las entrega ahora la consulta: ya con las columnas de la respuesta."""
+    resultado = []
+    for r in rows:
+        evento = r["tipo_evento"]
+        tipo_usuario = "Residente" if r["depto_residente"] else ("Visita" if r["depto_visitante"] else "Desconocido")
+        resultado.append((
+            r["id"], r["patente"], tipo_usuario,
+            r["hora"] if evento == "Ingreso" else None,
+            r["hora"] if evento == "Salida" else None,
+            r["depto"], r["metodo_evento"], evento, r["hora"],
+        ))
+    return resultado
+
+
+def medir(nombre: str, funcion, repeticiones: int) -> bytes:
+    cuerpo = funcion()
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    ms = (time.perf_counter() - inicio) / repeticiones * 1e3
+    print(f"{nombre:34s} {ms:9.3f} ms/respuesta  {len(cuerpo) / 1024:7.0f} KiB")
+    return cuerpo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Costo de serializar un listado grande")
+    parser.add_argument("--filas", type=int, default=10000)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = generar(args.filas)
+    filas = tuplas(rows)
+    cache = CacheRespuesta()
+
+    antes = medir("dicts + jsonable_encoder + json", lambda: como_antes(rows), args.repeticiones)
+    ahora = medir("tuplas + RespuestaJSON (orjson)",
+                  lambda: RespuestaJSON(objetos(COLUMNAS, filas)).body, args.repeticiones)
+    medir("CacheRespuesta (misma versión)",
+          lambda: cache.obtener(1, lambda: objetos(COLUMNAS, filas)).body, args.repeticiones)
+
+    if json.loads(antes) != json.loads(ahora):
+        raise SystemExit("⚠️ Los cuerpos no coinciden")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark de arranque y throughput de los perfiles de servidor: el de
+desarrollo (`uvicorn --reload`), comun/servidor.py con un worker y el loop
+y parser de la biblioteca estándar, y comun/servidor.py por defecto.
+
+Para cada perfil mide el tiempo hasta el primer 200 en `--ruta`, los
+requests por segundo con `--clientes` procesos cliente (keep-alive) durante
+`--segundos`, y cuánto tarda en detenerse con SIGTERM. Sirve para cualquier
+servicio: se ejecuta desde su directorio, con su .env y las conexiones
+propias que indica su Dockerfile.
+
+    python bench_servidor.py --ruta /dashboard/estados --clientes 8 --segundos 10 --conexiones-propias 1
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import time
+
+PUERTO = 8765
+
+PERFILES = {
+    "dev (--reload)": (
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(PUERTO), "--reload"],
+        {},
+    ),
+    "servidor 1 worker asyncio/h11": (
+        [sys.executable, "-m", "comun.servidor"],
+        {"SERVIDOR_WORKERS": "1", "SERVIDOR_LOOP": "asyncio", "SERVIDOR_HTTP": "h11"},
+    ),
+    "servidor (por defecto)": ([sys.executable, "-m", "comun.servidor"], {}),
+}
+
+
+def esperar_listo(ruta: str, limite_s: float = 60) -> float:
+    inicio = time.perf_counter()
+    while time.perf_counter() - inicio < limite_s:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", PUERTO, timeout=1)
+            conn.request("GET", ruta)
+            if conn.getresponse().status == 200:
+                return time.perf_counter() - inicio
+        except OSError:
+            pass
+        time.sleep(0.02)
+    raise TimeoutError("el servidor no respondió")
+
+
+def cliente(args) -> int:
+    ruta, hasta = args
+    conn = http.client.HTTPConnection("127.0.0.1", PUERTO, timeout=5)
+    n = 0
+    while time.time() < hasta:
+        conn.request("GET", ruta)
+        respuesta = conn.getresponse()
+        respuesta.read()
+        if respuesta.status == 200:
+            n += 1
+    return n
+
+
+def medir(nombre: str, comando: list[str], entorno: dict, ruta: str, clientes: int, segundos: float):
+    # comun/ está en backend/, un nivel arriba del servicio
+    pythonpath = os.pathsep.join(filter(None, [os.path.abspath(".."), os.getenv("PYTHONPATH")]))
+    env = {**os.environ, "PYTHONPATH": pythonpath, "SERVIDOR_PUERTO": str(PUERTO), "SERVIDOR_ACCESS_LOG": "0",
+           **entorno}
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen(comando, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               start_new_session=True)
+    try:
+        esperar_listo(ruta)
+        arranque = time.perf_counter() - inicio
+        hasta = time.time() + segundos
+        with multiprocessing.Pool(clientes) as pool:
+            total = sum(pool.map(cliente, [(ruta, hasta)] * clientes))
+    finally:
+        inicio_parada = time.perf_counter()
+        os.killpg(proceso.pid, signal.SIGTERM)
+        proceso.wait(timeout=60)
+        parada = time.perf_counter() - inicio_parada
+    print(f"{nombre:32s} arranque {arranque:6.2f} s  {total / segundos:8.0f} req/s  parada {parada:5.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Arranque y throughput por perfil de servidor")
+    parser.add_argument("--ruta", default="/")
+    parser.add_argument("--clientes", type=int, default=8)
+    parser.add_argument("--segundos", type=float, default=10)
+    parser.add_argument("--conexiones-propias", default="0", help="como en el CMD del Dockerfile del servicio")
+    args = parser.parse_args()
+    print(f"{os.cpu_count()} núcleos, {args.clientes} clientes, GET {args.ruta}")
+    for nombre, (comando, entorno) in PERFILES.items():
+        if "comun.servidor" in comando:
+            comando = [*comando, "--conexiones-propias", args.conexiones_propias]
+        medir(nombre, comando, entorno, args.ruta, args.clientes, args.segundos)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+-- Clave de idempotencia para los ingresos enviados en bloque por el cliente
+-- de cámaras (POST /registrar-eventos). Reenviar un lote no duplica filas.
+-- Los registros antiguos quedan con NULL (el índice único admite varios NULL).
+
+ALTER TABLE registro_evento_acceso
+    ADD COLUMN IF NOT EXISTS clave_idempotencia uuid;
+
+CREATE UNIQUE INDEX IF NOT EXISTS registro_evento_acceso_clave_idempotencia_key
+    ON registro_evento_acceso (clave_idempotencia);
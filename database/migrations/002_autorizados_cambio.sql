@@ -0,0 +1,45 @@
+-- Registro de cambios de la lista de patentes autorizadas que el cliente de
+-- cámaras mantiene en memoria (GET /autorizados). Cada INSERT/UPDATE/DELETE
+-- sobre vehiculo o reserva anota las patentes afectadas con una versión
+-- creciente; el cliente pide solo los cambios posteriores a su versión.
+
+CREATE TABLE IF NOT EXISTS autorizados_cambio (
+    version bigserial PRIMARY KEY,
+    patente text NOT NULL,
+    hora    timestamptz NOT NULL DEFAULT NOW()
+);
+
+CREATE OR REPLACE FUNCTION autorizados_cambio_vehiculo() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        INSERT INTO autorizados_cambio (patente) VALUES (OLD.placa_patente);
+    END IF;
+    IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.placa_patente IS DISTINCT FROM OLD.placa_patente) THEN
+        INSERT INTO autorizados_cambio (patente) VALUES (NEW.placa_patente);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION autorizados_cambio_reserva() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' AND OLD.placa_patente_visitante IS NOT NULL THEN
+        INSERT INTO autorizados_cambio (patente) VALUES (OLD.placa_patente_visitante);
+    END IF;
+    IF (TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.placa_patente_visitante IS DISTINCT FROM OLD.placa_patente_visitante))
+       AND NEW.placa_patente_visitante IS NOT NULL THEN
+        INSERT INTO autorizados_cambio (patente) VALUES (NEW.placa_patente_visitante);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS vehiculo_autorizados_cambio ON vehiculo;
+CREATE TRIGGER vehiculo_autorizados_cambio
+    AFTER INSERT OR UPDATE OR DELETE ON vehiculo
+    FOR EACH ROW EXECUTE FUNCTION autorizados_cambio_vehiculo();
+
+DROP TRIGGER IF EXISTS reserva_autorizados_cambio ON reserva;
+CREATE TRIGGER reserva_autorizados_cambio
+    AFTER INSERT OR UPDATE OR DELETE ON reserva
+    FOR EACH ROW EXECUTE FUNCTION autorizados_cambio_reserva();
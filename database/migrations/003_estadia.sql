@@ -0,0 +1,54 @@
+-- Estadías: cada ingreso abre una estadía y la salida de la misma patente la
+-- cierra. El índice único parcial sobre las estadías abiertas hace que
+-- encontrar la estadía de una patente sea una búsqueda directa, sin recorrer
+-- registro_evento_acceso.
+--
+-- No se rellena desde el registro histórico: antes de esta migración no se
+-- registraban salidas, por lo que cualquier estadía reconstruida quedaría
+-- abierta para siempre.
+
+INSERT INTO tipo_evento_acceso (id, nombre) VALUES (1, 'Salida')
+ON CONFLICT (id) DO NOTHING;
+
+CREATE TABLE IF NOT EXISTS estadia (
+    id                     bigserial PRIMARY KEY,
+    patente                text NOT NULL,
+    abierta                boolean NOT NULL DEFAULT TRUE,
+    id_ingreso             integer NOT NULL REFERENCES registro_evento_acceso (id),
+    hora_ingreso           timestamptz NOT NULL,
+    id_salida              integer REFERENCES registro_evento_acceso (id),
+    hora_salida            timestamptz,
+    placa_patente_vehiculo text,
+    id_reserva             integer
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS estadia_abierta_patente_key
+    ON estadia (patente) WHERE abierta;
+
+CREATE OR REPLACE FUNCTION estadia_registrar_evento() RETURNS trigger AS $$
+BEGIN
+    IF NEW.tipo = 0 THEN
+        -- Un evento atrasado (enviado desde la cola del cliente) no debe
+        -- cerrar una estadía más reciente.
+        IF EXISTS (SELECT 1 FROM estadia
+                    WHERE patente = NEW.placa_detectada AND abierta AND hora_ingreso > NEW.hora) THEN
+            RETURN NULL;
+        END IF;
+        -- Ingreso sin salida registrada: la estadía anterior queda cerrada sin salida
+        UPDATE estadia SET abierta = FALSE
+         WHERE patente = NEW.placa_detectada AND abierta;
+        INSERT INTO estadia (patente, id_ingreso, hora_ingreso, placa_patente_vehiculo, id_reserva)
+        VALUES (NEW.placa_detectada, NEW.id, NEW.hora, NEW.placa_patente_vehiculo, NEW.id_reserva);
+    ELSIF NEW.tipo = 1 THEN
+        UPDATE estadia
+           SET abierta = FALSE, id_salida = NEW.id, hora_salida = NEW.hora
+         WHERE patente = NEW.placa_detectada AND abierta AND hora_ingreso <= NEW.hora;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS registro_evento_acceso_estadia ON registro_evento_acceso;
+CREATE TRIGGER registro_evento_acceso_estadia
+    AFTER INSERT ON registro_evento_acceso
+    FOR EACH ROW EXECUTE FUNCTION estadia_registrar_evento();
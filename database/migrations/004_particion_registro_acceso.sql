@@ -0,0 +1,99 @@
+-- Particionado mensual de registro_evento_acceso por `hora`.
+--
+-- Cada mes (en UTC) vive en su propia partición `registro_evento_acceso_AAAA_MM`;
+-- las consultas acotadas por hora solo leen los meses que tocan y los meses
+-- antiguos se archivan y eliminan completos (ver app/particiones.py del
+-- backend de patentes). Las filas de un mes sin partición caen en
+-- `registro_evento_acceso_default` y se mueven a su mes cuando este se crea,
+-- por lo que un insert nunca falla por falta de partición.
+--
+-- En una tabla particionada toda clave única debe incluir la columna de
+-- partición:
+-- - la PK pasa a ser (id, hora); `id` sigue saliendo de la misma secuencia.
+-- - la clave de idempotencia pasa a ser (clave_idempotencia, hora); el
+--   cliente reenvía cada evento con su hora original, así que un reintento
+--   sigue chocando con la fila ya registrada.
+-- - estadia deja de tener FK hacia los eventos (id_ingreso / id_salida
+--   quedan como referencias sin restricción).
+
+BEGIN;
+
+ALTER TABLE estadia
+    DROP CONSTRAINT IF EXISTS estadia_id_ingreso_fkey,
+    DROP CONSTRAINT IF EXISTS estadia_id_salida_fkey;
+
+ALTER TABLE registro_evento_acceso RENAME TO registro_evento_acceso_sin_particion;
+
+CREATE TABLE registro_evento_acceso (
+    LIKE registro_evento_acceso_sin_particion INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+    CONSTRAINT registro_evento_acceso_id_hora_pkey PRIMARY KEY (id, hora)
+) PARTITION BY RANGE (hora);
+
+ALTER TABLE registro_evento_acceso
+    ADD FOREIGN KEY (tipo) REFERENCES tipo_evento_acceso (id),
+    ADD FOREIGN KEY (metodo) REFERENCES metodo_evento_acceso (id),
+    ADD FOREIGN KEY (placa_patente_vehiculo) REFERENCES vehiculo (placa_patente),
+    ADD FOREIGN KEY (id_reserva) REFERENCES reserva (id);
+
+CREATE UNIQUE INDEX registro_evento_acceso_clave_hora_key
+    ON registro_evento_acceso (clave_idempotencia, hora);
+CREATE INDEX registro_evento_acceso_hora_idx
+    ON registro_evento_acceso (hora);
+CREATE INDEX registro_evento_acceso_placa_vehiculo_idx
+    ON registro_evento_acceso (placa_patente_vehiculo);
+
+CREATE TABLE registro_evento_acceso_default
+    PARTITION OF registro_evento_acceso DEFAULT;
+
+-- Crea (si no existe) la partición del mes que contiene `p_mes` y le mueve
+-- las filas de ese mes que hubieran caído en la partición por defecto.
+CREATE OR REPLACE FUNCTION registro_evento_acceso_asegurar_particion(p_mes date) RETURNS text AS $$
+DECLARE
+    desde  timestamptz := date_trunc('month', p_mes::timestamp) AT TIME ZONE 'UTC';
+    hasta  timestamptz := (date_trunc('month', p_mes::timestamp) + interval '1 month') AT TIME ZONE 'UTC';
+    nombre text := 'registro_evento_acceso_' || to_char(p_mes, 'YYYY_MM');
+BEGIN
+    -- Varios procesos pueden asegurar el mismo mes a la vez (p. ej. al partir)
+    PERFORM pg_advisory_xact_lock(hashtext('registro_evento_acceso_particiones'));
+    IF to_regclass(nombre) IS NOT NULL THEN
+        RETURN nombre;
+    END IF;
+
+    EXECUTE format('CREATE TABLE %I (LIKE registro_evento_acceso INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', nombre);
+    EXECUTE format(
+        'WITH movidas AS (DELETE FROM registro_evento_acceso_default WHERE hora >= %L AND hora < %L RETURNING *)
+         INSERT INTO %I SELECT * FROM movidas',
+        desde, hasta, nombre);
+    EXECUTE format('ALTER TABLE registro_evento_acceso ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        nombre, desde, hasta);
+    RETURN nombre;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Meses con datos más los dos siguientes
+SELECT registro_evento_acceso_asegurar_particion(mes::date)
+  FROM generate_series(
+         date_trunc('month', COALESCE((SELECT MIN(hora) FROM registro_evento_acceso_sin_particion), NOW()) AT TIME ZONE 'UTC'),
+         date_trunc('month', NOW() AT TIME ZONE 'UTC') + interval '2 month',
+         interval '1 month') AS mes;
+
+-- Copia antes de crear el trigger de estadías: las estadías ya existen
+INSERT INTO registro_evento_acceso SELECT * FROM registro_evento_acceso_sin_particion;
+
+DO $$
+DECLARE
+    secuencia text := pg_get_serial_sequence('registro_evento_acceso_sin_particion', 'id');
+BEGIN
+    IF secuencia IS NOT NULL THEN
+        EXECUTE format('ALTER SEQUENCE %s OWNED BY registro_evento_acceso.id', secuencia);
+    END IF;
+END;
+$$;
+
+DROP TABLE registro_evento_acceso_sin_particion;
+
+CREATE TRIGGER registro_evento_acceso_estadia
+    AFTER INSERT ON registro_evento_acceso
+    FOR EACH ROW EXECUTE FUNCTION estadia_registrar_evento();
+
+COMMIT;
@@ -0,0 +1,133 @@
+-- Resúmenes por hora para la analítica del backend web (app/analitica.py).
+-- Se mantienen incrementalmente con triggers, así las consultas por rango
+-- leen a lo más una fila por hora en vez del registro completo de eventos.
+-- Los resúmenes no se archivan junto con las particiones de eventos.
+--
+-- - resumen_acceso_hora: ingresos/salidas por hora (y residentes/visitas).
+-- - resumen_ocupacion_hora: máximo de estacionamientos ocupados a la vez en
+--   la hora y cuántos quedaron ocupados al último cambio de la hora. Una
+--   hora sin fila no tuvo cambios: su ocupación es la de la última fila.
+-- - resumen_estacionamiento_hora: segundos ocupados por estacionamiento y
+--   hora. Se suma cuando el estacionamiento se libera; la ocupación en curso
+--   está en estacionamiento_ocupado_desde.
+--
+-- La ocupación se toma de estacionamiento.ocupado (la que usan el dashboard
+-- y la app móvil); no existe historial previo, así que parte desde ahora.
+
+CREATE TABLE IF NOT EXISTS resumen_acceso_hora (
+    hora                timestamptz PRIMARY KEY,
+    ingresos            integer NOT NULL DEFAULT 0,
+    salidas             integer NOT NULL DEFAULT 0,
+    ingresos_residentes integer NOT NULL DEFAULT 0,
+    ingresos_visitantes integer NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS resumen_ocupacion_hora (
+    hora           timestamptz PRIMARY KEY,
+    ocupados_max   integer NOT NULL,
+    ocupados_final integer NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS resumen_estacionamiento_hora (
+    hora               timestamptz NOT NULL,
+    id_estacionamiento integer NOT NULL,
+    segundos_ocupado   double precision NOT NULL DEFAULT 0,
+    PRIMARY KEY (hora, id_estacionamiento)
+);
+
+CREATE TABLE IF NOT EXISTS estacionamiento_ocupado_desde (
+    id_estacionamiento integer PRIMARY KEY,
+    desde              timestamptz NOT NULL
+);
+
+-- Un solo upsert por sentencia: los lotes de /registrar-eventos insertan
+-- muchas filas de una vez.
+CREATE OR REPLACE FUNCTION resumen_acceso_registrar() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO resumen_acceso_hora AS r (hora, ingresos, salidas, ingresos_residentes, ingresos_visitantes)
+    SELECT date_trunc('hour', hora),
+           COUNT(*) FILTER (WHERE tipo = 0),
+           COUNT(*) FILTER (WHERE tipo = 1),
+           COUNT(*) FILTER (WHERE tipo = 0 AND metodo = 0),
+           COUNT(*) FILTER (WHERE tipo = 0 AND metodo = 1)
+      FROM nuevos
+     GROUP BY 1
+    ON CONFLICT (hora) DO UPDATE
+       SET ingresos            = r.ingresos + EXCLUDED.ingresos,
+           salidas             = r.salidas + EXCLUDED.salidas,
+           ingresos_residentes = r.ingresos_residentes + EXCLUDED.ingresos_residentes,
+           ingresos_visitantes = r.ingresos_visitantes + EXCLUDED.ingresos_visitantes;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS registro_evento_acceso_resumen ON registro_evento_acceso;
+CREATE TRIGGER registro_evento_acceso_resumen
+    AFTER INSERT ON registro_evento_acceso
+    REFERENCING NEW TABLE AS nuevos
+    FOR EACH STATEMENT EXECUTE FUNCTION resumen_acceso_registrar();
+
+CREATE OR REPLACE FUNCTION resumen_ocupacion_registrar() RETURNS trigger AS $$
+DECLARE
+    ahora         timestamptz := NOW();
+    ocupado_desde timestamptz;
+    ocupados      integer;
+BEGIN
+    IF NEW.ocupado IS NOT DISTINCT FROM OLD.ocupado THEN
+        RETURN NULL;
+    END IF;
+
+    IF NEW.ocupado THEN
+        INSERT INTO estacionamiento_ocupado_desde (id_estacionamiento, desde)
+        VALUES (NEW.id, ahora)
+        ON CONFLICT (id_estacionamiento) DO NOTHING;
+    ELSE
+        DELETE FROM estacionamiento_ocupado_desde
+         WHERE id_estacionamiento = NEW.id
+        RETURNING desde INTO ocupado_desde;
+
+        IF ocupado_desde IS NOT NULL THEN
+            -- Reparte el intervalo ocupado entre las horas que abarca
+            INSERT INTO resumen_estacionamiento_hora AS r (hora, id_estacionamiento, segundos_ocupado)
+            SELECT h, NEW.id, EXTRACT(EPOCH FROM LEAST(h + interval '1 hour', ahora) - GREATEST(h, ocupado_desde))
+              FROM generate_series(date_trunc('hour', ocupado_desde), ahora, interval '1 hour') AS h
+            ON CONFLICT (hora, id_estacionamiento) DO UPDATE
+               SET segundos_ocupado = r.segundos_ocupado + EXCLUDED.segundos_ocupado;
+        END IF;
+    END IF;
+
+    SELECT COUNT(*) INTO ocupados FROM estacionamiento WHERE ocupado;
+    -- Si es el primer cambio de la hora, la ocupación al inicio de la hora
+    -- es la anterior al cambio.
+    INSERT INTO resumen_ocupacion_hora AS r (hora, ocupados_max, ocupados_final)
+    VALUES (date_trunc('hour', ahora), GREATEST(ocupados, ocupados + CASE WHEN NEW.ocupado THEN -1 ELSE 1 END), ocupados)
+    ON CONFLICT (hora) DO UPDATE
+       SET ocupados_max   = GREATEST(r.ocupados_max, EXCLUDED.ocupados_final),
+           ocupados_final = EXCLUDED.ocupados_final;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS estacionamiento_resumen_ocupacion ON estacionamiento;
+CREATE TRIGGER estacionamiento_resumen_ocupacion
+    AFTER UPDATE OF ocupado ON estacionamiento
+    FOR EACH ROW EXECUTE FUNCTION resumen_ocupacion_registrar();
+
+-- Carga inicial: accesos desde el registro existente, ocupación desde ahora
+INSERT INTO resumen_acceso_hora (hora, ingresos, salidas, ingresos_residentes, ingresos_visitantes)
+SELECT date_trunc('hour', hora),
+       COUNT(*) FILTER (WHERE tipo = 0),
+       COUNT(*) FILTER (WHERE tipo = 1),
+       COUNT(*) FILTER (WHERE tipo = 0 AND metodo = 0),
+       COUNT(*) FILTER (WHERE tipo = 0 AND metodo = 1)
+  FROM registro_evento_acceso
+ GROUP BY 1
+ON CONFLICT (hora) DO NOTHING;
+
+INSERT INTO estacionamiento_ocupado_desde (id_estacionamiento, desde)
+SELECT id, NOW() FROM estacionamiento WHERE ocupado
+ON CONFLICT (id_estacionamiento) DO NOTHING;
+
+INSERT INTO resumen_ocupacion_hora (hora, ocupados_max, ocupados_final)
+SELECT date_trunc('hour', NOW()), COUNT(*), COUNT(*) FROM estacionamiento WHERE ocupado
+ON CONFLICT (hora) DO NOTHING;
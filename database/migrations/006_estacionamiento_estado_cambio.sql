@@ -0,0 +1,59 @@
+-- Historial de estados de estacionamiento_estado.
+--
+-- Cada cambio de `estado` confirmado queda en estacionamiento_estado_cambio
+-- (solo se agrega, nunca se modifica). Para responder "estado del
+-- estacionamiento a la hora T" sin recorrer todo el historial, el servicio
+-- parking-availability guarda fotos periódicas del estado completo en
+-- estacionamiento_estado_snapshot y aplica encima los cambios posteriores
+-- (ver app/historial.py).
+
+CREATE TABLE IF NOT EXISTS estacionamiento_estado_cambio (
+    id                     bigserial PRIMARY KEY,
+    estacionamiento_numero integer NOT NULL,
+    estado                 smallint NOT NULL,
+    hora                   timestamptz NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS estacionamiento_estado_cambio_numero_hora_idx
+    ON estacionamiento_estado_cambio (estacionamiento_numero, hora);
+CREATE INDEX IF NOT EXISTS estacionamiento_estado_cambio_hora_idx
+    ON estacionamiento_estado_cambio (hora);
+
+CREATE TABLE IF NOT EXISTS estacionamiento_estado_snapshot (
+    id      bigserial PRIMARY KEY,
+    hora    timestamptz NOT NULL UNIQUE,
+    -- {"<numero>": {"estado": 1, "desde": "<hora del último cambio>"}}
+    estados jsonb NOT NULL
+);
+
+CREATE OR REPLACE FUNCTION estacionamiento_estado_registrar_cambio() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO estacionamiento_estado_cambio (estacionamiento_numero, estado)
+    VALUES (NEW.estacionamiento_numero, NEW.estado);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS estacionamiento_estado_cambio_insert ON estacionamiento_estado;
+CREATE TRIGGER estacionamiento_estado_cambio_insert
+    AFTER INSERT ON estacionamiento_estado
+    FOR EACH ROW EXECUTE FUNCTION estacionamiento_estado_registrar_cambio();
+
+DROP TRIGGER IF EXISTS estacionamiento_estado_cambio_update ON estacionamiento_estado;
+CREATE TRIGGER estacionamiento_estado_cambio_update
+    AFTER UPDATE OF estado ON estacionamiento_estado
+    FOR EACH ROW
+    WHEN (OLD.estado IS DISTINCT FROM NEW.estado)
+    EXECUTE FUNCTION estacionamiento_estado_registrar_cambio();
+
+-- Punto de partida: el estado actual como primer cambio y primera foto
+INSERT INTO estacionamiento_estado_cambio (estacionamiento_numero, estado, hora)
+SELECT estacionamiento_numero, estado, NOW()
+  FROM estacionamiento_estado
+ WHERE NOT EXISTS (SELECT 1 FROM estacionamiento_estado_cambio);
+
+INSERT INTO estacionamiento_estado_snapshot (hora, estados)
+SELECT NOW(), COALESCE(jsonb_object_agg(estacionamiento_numero::text,
+                       jsonb_build_object('estado', estado, 'desde', NOW())), '{}'::jsonb)
+  FROM estacionamiento_estado
+ WHERE NOT EXISTS (SELECT 1 FROM estacionamiento_estado_snapshot);
@@ -0,0 +1,17 @@
+-- Reservas vencidas: el backend web pasa a estado 3 (Vencida) las reservas
+-- activas cuyo hora_termino ya pasó y libera su estacionamiento
+-- (app/vencimiento.py). Así "estado_reserva = 0" queda con pocas filas y las
+-- consultas frecuentes usan índices parciales pequeños.
+--
+-- Las consultas mantienen "hora_termino > NOW()" para el minuto que puede
+-- pasar entre el vencimiento y la siguiente pasada del proceso.
+
+INSERT INTO estado_reserva (id, nombre) VALUES (3, 'Vencida')
+ON CONFLICT (id) DO NOTHING;
+
+CREATE INDEX IF NOT EXISTS reserva_activa_termino_idx
+    ON reserva (hora_termino) WHERE estado_reserva = 0;
+CREATE INDEX IF NOT EXISTS reserva_activa_patente_idx
+    ON reserva (placa_patente_visitante) WHERE estado_reserva = 0;
+CREATE INDEX IF NOT EXISTS reserva_activa_estacionamiento_idx
+    ON reserva (id_estacionamiento) WHERE estado_reserva = 0 AND id_estacionamiento IS NOT NULL;
@@ -0,0 +1,94 @@
+-- Estado canónico de cada estacionamiento, compartido por el dashboard web,
+-- la app móvil y parking-availability:
+--
+--   1 ocupado    si estacionamiento.ocupado
+--   2 reservado  si tiene asignada una reserva activa que no ha terminado
+--   0 libre      en otro caso
+--
+-- Se recalcula una sola vez por cambio (triggers por sentencia sobre
+-- estacionamiento y reserva) en la tabla estado_estacionamiento. Cada
+-- recálculo sube el número de estado_estacionamiento_version y avisa por
+-- NOTIFY estado_estacionamiento al confirmarse; los servicios guardan el
+-- estado en memoria y solo lo vuelven a leer al recibir el aviso.
+--
+-- La versión vive en una fila (no en una secuencia) para que cambie en la
+-- misma transacción que los estados, y su bloqueo ordena los recálculos
+-- concurrentes: el segundo espera al primero y calcula sobre sus cambios.
+--
+-- El vencimiento de reservas (migración 007) es una escritura sobre
+-- reserva, así que una reserva terminada también dispara el recálculo.
+
+CREATE TABLE IF NOT EXISTS estado_estacionamiento_version (
+    id      boolean PRIMARY KEY DEFAULT TRUE CHECK (id),
+    version bigint NOT NULL DEFAULT 0
+);
+INSERT INTO estado_estacionamiento_version DEFAULT VALUES ON CONFLICT DO NOTHING;
+
+CREATE TABLE IF NOT EXISTS estado_estacionamiento (
+    id_estacionamiento integer PRIMARY KEY,
+    estado             smallint NOT NULL,
+    desde              timestamptz NOT NULL DEFAULT NOW()
+);
+
+CREATE OR REPLACE FUNCTION estado_estacionamiento_refrescar() RETURNS bigint AS $$
+DECLARE
+    nueva bigint;
+BEGIN
+    UPDATE estado_estacionamiento_version SET version = version + 1 RETURNING version INTO nueva;
+
+    INSERT INTO estado_estacionamiento AS s (id_estacionamiento, estado)
+    SELECT e.id,
+           CASE
+             WHEN e.ocupado THEN 1
+             WHEN EXISTS (SELECT 1 FROM reserva r
+                           WHERE r.id_estacionamiento = e.id
+                             AND r.estado_reserva = 0
+                             AND r.hora_termino > NOW()) THEN 2
+             ELSE 0
+           END
+      FROM estacionamiento e
+    ON CONFLICT (id_estacionamiento) DO UPDATE
+       SET estado = EXCLUDED.estado, desde = NOW()
+     WHERE s.estado IS DISTINCT FROM EXCLUDED.estado;
+
+    DELETE FROM estado_estacionamiento s
+     WHERE NOT EXISTS (SELECT 1 FROM estacionamiento e WHERE e.id = s.id_estacionamiento);
+
+    PERFORM pg_notify('estado_estacionamiento', nueva::text);
+    RETURN nueva;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION estado_estacionamiento_recalcular() RETURNS trigger AS $$
+BEGIN
+    PERFORM estado_estacionamiento_refrescar();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS estacionamiento_estado_canonico ON estacionamiento;
+CREATE TRIGGER estacionamiento_estado_canonico
+    AFTER INSERT OR DELETE OR UPDATE OF ocupado ON estacionamiento
+    FOR EACH STATEMENT EXECUTE FUNCTION estado_estacionamiento_recalcular();
+
+DROP TRIGGER IF EXISTS reserva_estado_canonico ON reserva;
+CREATE TRIGGER reserva_estado_canonico
+    AFTER INSERT OR DELETE OR UPDATE OF estado_reserva, id_estacionamiento, hora_inicio, hora_termino ON reserva
+    FOR EACH STATEMENT EXECUTE FUNCTION estado_estacionamiento_recalcular();
+
+-- Lectura completa que usan los servicios: versión, estados y reservas
+-- activas aún sin estacionamiento (ocupan cupo aunque no tengan número).
+CREATE OR REPLACE FUNCTION estado_estacionamiento_actual()
+RETURNS TABLE (version bigint, id_estacionamiento integer, estado smallint, desde timestamptz, reservas_sin_asignar bigint) AS $$
+    SELECT (SELECT v.version FROM estado_estacionamiento_version v),
+           s.id_estacionamiento, s.estado, s.desde,
+           (SELECT COUNT(*) FROM reserva r
+             WHERE r.estado_reserva = 0
+               AND r.hora_termino > NOW()
+               AND r.id_estacionamiento IS NULL)
+      FROM estado_estacionamiento s
+     ORDER BY s.id_estacionamiento;
+$$ LANGUAGE sql STABLE;
+
+-- Carga inicial
+SELECT estado_estacionamiento_refrescar();
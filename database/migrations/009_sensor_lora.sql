@@ -0,0 +1,19 @@
+-- Seguimiento de los sensores LoRa de los estacionamientos.
+--
+-- El gateway (backend/parking-availability/app/gateway_lora.py) lee los
+-- paquetes del receptor LoRa por serial y escribe en lotes el estado en
+-- estacionamiento_estado / estacionamiento.ocupado y, por sensor, la última
+-- vez que se escuchó, la señal y los contadores de paquetes. `inactivo`
+-- lo marca el gateway cuando un sensor deja de enviar su latido.
+
+CREATE TABLE IF NOT EXISTS sensor_lora (
+    estacionamiento_numero integer PRIMARY KEY,
+    ultimo_visto           timestamptz NOT NULL,
+    secuencia              integer NOT NULL,
+    rssi                   smallint,
+    snr                    real,
+    paquetes               bigint NOT NULL DEFAULT 0,
+    perdidos               bigint NOT NULL DEFAULT 0,
+    duplicados             bigint NOT NULL DEFAULT 0,
+    inactivo               boolean NOT NULL DEFAULT FALSE
+);
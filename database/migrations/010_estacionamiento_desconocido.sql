@@ -0,0 +1,52 @@
+-- Estado canónico 3 'desconocido': el estacionamiento tiene un sensor LoRa
+-- que dejó de enviar su latido (sensor_lora.inactivo, lo marca el gateway
+-- de parking-availability). Su último estado conocido ya no es confiable,
+-- así que no cuenta como libre ni como ocupado.
+--
+--   3 desconocido  si su sensor está inactivo
+--   1 ocupado      si estacionamiento.ocupado
+--   2 reservado    si tiene asignada una reserva activa que no ha terminado
+--   0 libre        en otro caso
+
+CREATE OR REPLACE FUNCTION estado_estacionamiento_refrescar() RETURNS bigint AS $$
+DECLARE
+    nueva bigint;
+BEGIN
+    UPDATE estado_estacionamiento_version SET version = version + 1 RETURNING version INTO nueva;
+
+    INSERT INTO estado_estacionamiento AS s (id_estacionamiento, estado)
+    SELECT e.id,
+           CASE
+             WHEN EXISTS (SELECT 1 FROM sensor_lora sl
+                           WHERE sl.estacionamiento_numero = e.id
+                             AND sl.inactivo) THEN 3
+             WHEN e.ocupado THEN 1
+             WHEN EXISTS (SELECT 1 FROM reserva r
+                           WHERE r.id_estacionamiento = e.id
+                             AND r.estado_reserva = 0
+                             AND r.hora_termino > NOW()) THEN 2
+             ELSE 0
+           END
+      FROM estacionamiento e
+    ON CONFLICT (id_estacionamiento) DO UPDATE
+       SET estado = EXCLUDED.estado, desde = NOW()
+     WHERE s.estado IS DISTINCT FROM EXCLUDED.estado;
+
+    DELETE FROM estado_estacionamiento s
+     WHERE NOT EXISTS (SELECT 1 FROM estacionamiento e WHERE e.id = s.id_estacionamiento);
+
+    PERFORM pg_notify('estado_estacionamiento', nueva::text);
+    RETURN nueva;
+END;
+$$ LANGUAGE plpgsql;
+
+-- El gateway solo escribe `inactivo` cuando cambia, en una sentencia aparte
+-- del registro de cada lote, para no recalcular en cada paquete. Un sensor
+-- nuevo entra activo, así que los INSERT (los upsert de cada lote) no
+-- disparan el recálculo.
+DROP TRIGGER IF EXISTS sensor_lora_estado_canonico ON sensor_lora;
+CREATE TRIGGER sensor_lora_estado_canonico
+    AFTER DELETE OR UPDATE OF inactivo ON sensor_lora
+    FOR EACH STATEMENT EXECUTE FUNCTION estado_estacionamiento_recalcular();
+
+SELECT estado_estacionamiento_refrescar();
@@ -16,6 +16,7 @@ export default function ParkingSpotCard({ spot, onSelect, selected }: ParkingSpo
     reserved: "bg-yellow-50 border-yellow-500 text-yellow-900",
     occupied: "bg-red-50 border-red-500 text-red-900",
     occupiedReserved: "bg-blue-50 border-blue-500 text-blue-900",
+    unknown: "bg-gray-100 border-gray-400 text-gray-600",
   };
   const styles = stylesMap[status] ?? stylesMap.available;
 
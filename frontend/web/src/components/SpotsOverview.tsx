@@ -15,6 +15,7 @@ export default function SpotsOverview({ spots, onSelect, selectedSpotId, lastUpd
   const reserved = spots.filter((s) => s.status === "reserved");
   const occupiedReserved = spots.filter((s) => s.status === "occupiedReserved");
   const occupiedUnauthorized = spots.filter((s) => s.status === "occupied");
+  const unknown = spots.filter((s) => s.status === "unknown");
   const lastUpdatedLabel = lastUpdated
     ? lastUpdated.toLocaleTimeString("es-CL", {
         hour: "2-digit",
@@ -47,6 +48,9 @@ export default function SpotsOverview({ spots, onSelect, selectedSpotId, lastUpd
         <Chip label={`Reservados: ${reserved.length}`} color="warning" size="small" />
         <Chip label={`Ocupados con reserva: ${occupiedReserved.length}`} color="info" size="small" />
         <Chip label={`Ocupados sin reserva: ${occupiedUnauthorized.length}`} color="error" size="small" />
+        {unknown.length > 0 && (
+          <Chip label={`Sin sensor: ${unknown.length}`} size="small" />
+        )}
       </Box>
 
       <Box sx={{ flex: 1, minHeight: 0, overflowY: "auto", pr: 1 }}>
@@ -33,12 +33,13 @@ import type { ParkingSpot } from "../types";
 
 const REFRESH_MS = 5_000;
 
-// Mapear estado (0=libre,1=ocupado,2=reservado) → UI
+// Mapear estado (0=libre,1=ocupado,2=reservado,3=desconocido) → UI
 const mapSpot = (s: SpotAPI, assignedSpotIds: Set<string>): ParkingSpot => {
   const spotId = String(s.id);
   let status: ParkingSpot["status"];
   if (s.estado === 0) status = "available";
   else if (s.estado === 2) status = "reserved";
+  else if (s.estado === 3) status = "unknown";
   else if (assignedSpotIds.has(spotId)) status = "occupiedReserved";
   else status = "occupied";
 
@@ -36,7 +36,7 @@ export const getHistory = (q?: string) =>
   api.get('/historial', { params: { q } })
 
 // --- Tipos básicos ---
-export type SpotAPI = { id: string; estado: 0 | 1 | 2; estado_label: string }
+export type SpotAPI = { id: string; estado: 0 | 1 | 2 | 3; estado_label: string }
 export type PendingAPI = {
   id: number; depto: string; patente: string; rut: string;
   hora_inicio: string; hora_termino: string
@@ -1,4 +1,4 @@
-export type SpotStatus = 'available' | 'occupied' | 'occupiedReserved' | 'reserved'
+export type SpotStatus = 'available' | 'occupied' | 'occupiedReserved' | 'reserved' | 'unknown'
 export interface ParkingSpot { id: string; code: string; since?: string; status: SpotStatus }
 export interface HistoryRow { id: string; patente: string; tipo: 'Visita' | 'Residente'; entrada: string; salida: string }
 export interface PlateRow { id: string; depto: string; patente: string }